@@ -0,0 +1,249 @@
+"""
+Content-hashed build manifest for the asset generator.
+An asset is rebuilt only when the source of its generator, the helpers it
+reaches, the module-level constants they read, its parameters or the
+imaging libraries change, or when its output file has gone missing or
+been edited.
+
+Within one process, LAYER_CACHE memoizes small pure building blocks the
+generators share (a gradient's column, a rasterized light well smaller
+than its canvas) by primitive and parameters, so a second render with the
+same ones (at another seed, flat and then split into layers, or again for
+--verify) pastes the stored layer instead of rasterizing it again.
+"""
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import json
+import os
+import types
+
+import numpy
+import PIL
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_VERSION = 2
+DEFAULT_LAYER_CACHE_MB = 64
+
+
+# both are asked about the same functions for every job; inspect.getfile is not free
+@functools.lru_cache(maxsize=None)
+def _qualname(obj):
+    """File-qualified name, stable whether the module runs as __main__ or is imported."""
+    return f"{os.path.basename(inspect.getfile(obj))}:{obj.__qualname__}"
+
+@functools.lru_cache(maxsize=None)
+def _is_local(obj):
+    """True for functions and classes defined in this repo's modules."""
+    try:
+        return os.path.dirname(os.path.abspath(inspect.getfile(obj))) == ROOT
+    except (TypeError, OSError):
+        return False
+
+def _code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _code_names(const)
+    return names
+
+def _source(obj):
+    try:
+        return inspect.getsource(obj)
+    except OSError:
+        # namedtuple classes are generated; their fields are what matters
+        return repr(getattr(obj, "_fields", obj.__qualname__))
+
+def _constant(value):
+    """repr of a module-level value a function reads, or None when it can't stand for it.
+
+    Modules are not followed. Absolute paths would tie the key to the
+    checkout's location, and a repr with an address in it (a cache object,
+    a registry of functions) differs between processes.
+    """
+    if inspect.ismodule(value) or (isinstance(value, str) and os.path.isabs(value)):
+        return None
+    if isinstance(value, (set, frozenset)):
+        return repr(sorted(value, key=repr))
+    text = repr(value)
+    return None if " at 0x" in text else text
+
+@functools.lru_cache(maxsize=None)
+def _node(obj):
+    """(source, local functions and classes referenced, {key: "NAME = repr"} of constants read)
+    of one function or class; the same helpers turn up in every job's closure."""
+    if inspect.isclass(obj):
+        return _source(obj), [v for v in vars(obj).values() if inspect.isfunction(v) and _is_local(v)], {}
+    refs, constants = [], {}
+    module = os.path.basename(inspect.getfile(obj))
+    for name in _code_names(obj.__code__):
+        if name not in obj.__globals__:
+            continue
+        ref = obj.__globals__[name]
+        if callable(ref):
+            # look through a @cached_layer or lru_cache wrapper to the function it memoizes
+            ref = inspect.unwrap(ref)
+            if (inspect.isfunction(ref) or inspect.isclass(ref)) and _is_local(ref):
+                refs.append(ref)
+            continue
+        if isinstance(ref, dict) and ref and all(inspect.isfunction(v) for v in ref.values()):
+            # a dispatch table such as encode.SIBLING_ENCODERS: its functions run as ours do
+            refs.extend(v for v in ref.values() if _is_local(v))
+        value = _constant(ref)
+        if value is not None:
+            constants[f"{module}:{name}"] = f"{name} = {value}"
+    return _source(obj), refs, constants
+
+def source_closure(roots):
+    """{qualified name: source} for the roots and every local function or class they reference.
+
+    Module-level constants those functions read (WINDOW_PITCH, AVIF_QUALITY)
+    are included as "NAME = repr" entries, since editing one changes output
+    as surely as editing the code.
+    """
+    found, stack = {}, [r for r in roots if _is_local(r)]
+    while stack:
+        obj = inspect.unwrap(stack.pop())
+        key = _qualname(obj)
+        if key in found:
+            continue
+        found[key], refs, constants = _node(obj)
+        found.update(constants)
+        stack.extend(refs)
+    return found
+
+def _describe(arg):
+    return f"<{_qualname(arg)}>" if callable(arg) else repr(arg)
+
+def job_key(fn, args, extra_roots=()):
+    """Hash of everything that determines one job's output."""
+    roots = [fn, *extra_roots, *(a for a in args if callable(a))]
+    h = hashlib.sha256()
+    h.update(f"Pillow {PIL.__version__} numpy {numpy.__version__}\n".encode())
+    h.update(repr([_describe(a) for a in args]).encode())
+    for name, src in sorted(source_closure(roots).items()):
+        h.update(f"\n# {name}\n{src}".encode())
+    return h.hexdigest()
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+class BuildManifest:
+    """JSON record of the key and output hashes each asset was last built with.
+
+    `outputs` is the list of files one asset wrote (its PNG and any siblings);
+    the asset is fresh while its key matches and all of them are untouched.
+    `serial` is how long the asset took in a --jobs 1 build, kept for as long
+    as its key is, so a parallel build can be timed against a serial one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.assets = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.assets = data.get("assets", {})
+
+    def is_fresh(self, name, key, out_dir):
+        entry = self.assets.get(name)
+        if entry is None or entry["key"] != key:
+            return False
+        paths = {f: os.path.join(out_dir, f) for f in entry["outputs"]}
+        return all(os.path.exists(p) and file_hash(p) == entry["outputs"][f] for f, p in paths.items())
+
+    def record(self, name, key, outputs, serial=None):
+        entry = {"key": key, "outputs": {os.path.basename(p): file_hash(p) for p in outputs}}
+        old = self.assets.get(name, {})
+        if serial is None and old.get("key") == key:
+            serial = old.get("serial")
+        if serial is not None:
+            entry["serial"] = round(serial, 4)
+        self.assets[name] = entry
+
+    def serial_time(self, names):
+        """Seconds the named assets took at --jobs 1 with their current keys, or None if any is unknown."""
+        times = [self.assets.get(name, {}).get("serial") for name in names]
+        return None if None in times else sum(times)
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "assets": self.assets}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, self.path)
+
+def _nbytes(value):
+    """Pixel memory held by a layer: an image, an array, or a tuple of them and small values."""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    if isinstance(value, numpy.ndarray):
+        return value.nbytes
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+def _freeze(value):
+    """A hashable stand-in for a layer parameter: lists become tuples."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+class LayerCache:
+    """LRU of rendered layers, bounded by the pixel memory they hold; 0 bytes turns it off."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = self.hits = self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        if size > self.max_bytes:
+            return
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self.bytes -= self.entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+LAYER_CACHE = LayerCache(DEFAULT_LAYER_CACHE_MB * 1024 * 1024)
+
+def cached_layer(fn):
+    """Memoize a pure layer function in LAYER_CACHE, by the function and its arguments.
+
+    The result is shared between callers, who composite or paste it but
+    must never draw on it. A None result (nothing to draw) is not stored.
+    Keys hold the function object itself, so a reloaded module's layers
+    never answer for the old code's.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn, _freeze(args), _freeze(kwargs))
+        value = LAYER_CACHE.get(key)
+        if value is None:
+            value = fn(*args, **kwargs)
+            if value is not None:
+                LAYER_CACHE.put(key, value)
+        return value
+    return wrapper
@@ -0,0 +1,118 @@
+"""
+Texture atlas packing for the asset generator.
+Frames are placed with MaxRects (best short side fit) into the smallest
+bin that holds them, and each frame's edge pixels are extruded into its
+padding so bilinear sampling at the frame border never picks up a neighbour.
+"""
+from PIL import Image
+import numpy as np
+
+
+class MaxRects:
+    """Free-rectangle list of one bin; insert() returns a position or None."""
+
+    def __init__(self, w, h):
+        self.free = [(0, 0, w, h)]
+
+    def insert(self, w, h):
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if fw >= w and fh >= h:
+                dx, dy = fw - w, fh - h
+                score = (min(dx, dy), max(dx, dy), fy, fx)
+                if best is None or score < best[0]:
+                    best = (score, fx, fy)
+        if best is None:
+            return None
+        _, x, y = best
+        self._split(x, y, w, h)
+        return x, y
+
+    def _split(self, x, y, w, h):
+        """Carve the placed rect out of every free rect it overlaps, keeping maximal pieces."""
+        kept, out = [], []
+        for fx, fy, fw, fh in self.free:
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                kept.append((fx, fy, fw, fh))
+                continue
+            if x > fx:
+                out.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                out.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                out.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                out.append((fx, y + h, fw, fy + fh - y - h))
+        # the untouched rects were maximal already and each piece lies inside a rect
+        # that was, so only the pieces can be contained in something
+        self.free = kept + [r for i, r in enumerate(out)
+                            if not any(_contains(o, r) for o in kept)
+                            and not any(i != j and _contains(o, r) and (o != r or j < i) for j, o in enumerate(out))]
+
+def _contains(a, b):
+    return a[0] <= b[0] and a[1] <= b[1] and a[0] + a[2] >= b[0] + b[2] and a[1] + a[3] >= b[1] + b[3]
+
+def _try_pack(sizes, order, w, h):
+    bin_ = MaxRects(w, h)
+    placed = [None] * len(sizes)
+    for i in order:
+        placed[i] = bin_.insert(*sizes[i])
+        if placed[i] is None:
+            return None
+    return placed
+
+def _round_up(v, step):
+    return -(-v // step) * step
+
+def pack(sizes, padding=0, step=8, max_side=4096):
+    """Lay out (w, h) frames in the most nearly square small bin; returns (bin_w, bin_h, [(x, y), ...]).
+
+    The longest bin side is kept as short as possible (it is what runs into
+    texture size limits), then the other side is trimmed. Each frame gets
+    `padding` pixels on every side; the positions returned are of the frames
+    themselves. Bin sides are multiples of `step`.
+    """
+    cells = [(w + 2*padding, h + 2*padding) for w, h in sizes]
+    order = sorted(range(len(cells)), key=lambda i: (-max(cells[i]), -min(cells[i]), i))
+    area = sum(w * h for w, h in cells)
+    side = _round_up(max(max(max(c) for c in cells), int(area ** 0.5)), step)
+    while _try_pack(cells, order, side, side) is None:
+        side += step
+        if side > max_side:
+            raise ValueError(f"{len(sizes)} frames do not fit in {max_side}x{max_side}")
+    best = None
+    for w, h in ((side, None), (None, side)):
+        lo = _round_up(max(c[0 if w is None else 1] for c in cells), step)
+        lo = max(lo, _round_up(-(-area // side), step))
+        for short in range(lo, side + 1, step):
+            bw, bh = (w, short) if h is None else (short, h)
+            placed = _try_pack(cells, order, bw, bh)
+            if placed is not None:
+                if best is None or bw * bh < best[0] * best[1]:
+                    best = (bw, bh, placed)
+                break
+    bw, bh, placed = best
+    return bw, bh, [(x + padding, y + padding) for x, y in placed]
+
+def extrude(img, padding):
+    """Copy of `img` grown by `padding` on each side with its edge pixels repeated."""
+    if padding == 0:
+        return img
+    arr = np.asarray(img)
+    pad = ((padding, padding), (padding, padding)) + ((0, 0),) * (arr.ndim - 2)
+    return Image.fromarray(np.pad(arr, pad, mode="edge"), img.mode)
+
+def render(images, sizes, positions, bin_size, padding=0, scale=1):
+    """Draw the atlas at `scale` from logical frame sizes, positions and bin size.
+
+    Images that are not already size * scale are resampled to fit.
+    """
+    mode = "RGBA" if any(img.mode != "RGB" for img in images) else "RGB"
+    atlas = Image.new(mode, (round(bin_size[0]*scale), round(bin_size[1]*scale)))
+    pad = round(padding * scale)
+    for img, (w, h), (x, y) in zip(images, sizes, positions):
+        target = (round(w*scale), round(h*scale))
+        if img.size != target:
+            img = img.resize(target, Image.LANCZOS)
+        atlas.paste(extrude(img.convert(mode), pad), (round(x*scale) - pad, round(y*scale) - pad))
+    return atlas
@@ -0,0 +1,81 @@
+"""
+Sound synthesis for the asset generator.
+The game's sound effects are Web Audio oscillator and noise graphs; these
+helpers compute the same signals as NumPy arrays: AudioParam automation
+(value steps and exponential ramps), band-limited oscillators and noise,
+and 16-bit mono WAV output that every browser's decodeAudioData reads.
+"""
+import io
+import wave
+
+import numpy as np
+
+TAU = 2 * np.pi
+
+
+def automation(rate, duration, value, *events):
+    """Per-sample values of an AudioParam that starts at `value`.
+
+    Events are ("set", t, v) for setValueAtTime and ("exp", t, v) for
+    exponentialRampToValueAtTime, in time order; a ramp runs from the
+    previous event (or from 0) to its own time, as in Web Audio.
+    """
+    t = np.arange(round(duration * rate)) / rate
+    out = np.full(t.shape, float(value))
+    t0, v0 = 0.0, value
+    for kind, t1, v1 in events:
+        if kind == "exp":
+            seg = (t >= t0) & (t < t1)
+            out[seg] = v0 * (v1 / v0) ** ((t[seg] - t0) / (t1 - t0))
+        elif kind != "set":
+            raise ValueError(f"unknown automation event {kind!r}")
+        out[t >= t1] = v1
+        t0, v0 = t1, v1
+    return out
+
+def _blep(phase, dt):
+    """PolyBLEP correction of a unit step at phase 0, smoothed over one sample either side."""
+    out = np.zeros_like(phase)
+    a = phase < dt
+    x = phase[a] / dt[a]
+    out[a] = x + x - x*x - 1
+    b = phase > 1 - dt
+    x = (phase[b] - 1) / dt[b]
+    out[b] = x*x + x + x + 1
+    return out
+
+def oscillator(kind, freq, rate):
+    """An OscillatorNode of `kind` (sine, square, sawtooth) following a per-sample frequency.
+
+    Square and sawtooth are band-limited with PolyBLEP, as Web Audio's
+    are, and start at the same point of their cycle.
+    """
+    dt = freq / rate
+    phase = (np.cumsum(dt) - dt) % 1.0
+    if kind == "sine":
+        return np.sin(TAU * phase)
+    if kind == "sawtooth":
+        # rises through zero at phase 0, like the Fourier series Web Audio builds it from
+        p = (phase + 0.5) % 1.0
+        return 2*p - 1 - _blep(p, dt)
+    if kind == "square":
+        return np.where(phase < 0.5, 1.0, -1.0) + _blep(phase, dt) - _blep((phase + 0.5) % 1.0, dt)
+    raise ValueError(f"unknown oscillator type {kind!r}")
+
+def noise(rng, n):
+    """White noise in -1..1 from a numpy Generator, for reproducible bursts."""
+    return rng.uniform(-1, 1, n)
+
+def silence(rate, duration):
+    return np.zeros(round(duration * rate))
+
+def wav_bytes(samples, rate):
+    """16-bit mono PCM WAV of float samples in -1..1 (clipped)."""
+    pcm = np.round(np.clip(samples, -1, 1) * 32767).astype("<i2")
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+    return buf.getvalue()
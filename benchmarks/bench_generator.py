@@ -0,0 +1,179 @@
+"""
+Benchmark every render_* function and the shared drawing primitives of generate_assets.py.
+Reports best/median time over repeated runs and the peak memory of one run,
+writes them as JSON and fails when a case regresses past a baseline.
+
+    python benchmarks/bench_generator.py --json benchmarks/baseline.json   # on the base branch
+    python benchmarks/bench_generator.py --baseline benchmarks/baseline.json [--threshold 20]
+
+render cases time rendering only, in memory, since encoding is a separate
+stage (--encode adds one encode case per asset, also in memory). Every run
+starts with an empty layer cache, so a case's repeats each pay its full
+cost; --warm keeps the cache, for what a repeat render costs.
+"""
+from PIL import Image
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import weakref
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import generate_assets as ga
+from asset_cache import LAYER_CACHE
+from encode import DEFAULT_ENCODING, encode_bytes
+from raster_fx import canvas, ScaledDraw as pen, gradient_rect
+
+# ----- Cases: (name, setup(scale) -> state, run(state)) -----
+
+def _blank(size, mode="RGBA"):
+    return lambda scale: canvas(mode, size, scale)
+
+def primitive_cases():
+    return [
+        ("gradient_rect", _blank((1024, 576)),
+            lambda img: gradient_rect(img, 0, 0, 1024, 576, (12, 8, 40), (30, 15, 60))),
+        ("make_cityscape", lambda scale: scale,
+            lambda scale: ga.make_cityscape(1024, 576, (12, 8, 40), (30, 15, 60),
+                [(25,20,50),(30,25,60),(20,15,45)], (255,220,100,180), scale=scale)),
+        ("skyline", lambda scale: scale,
+            lambda scale: ga.skyline(1024, 576, [(25,20,50),(30,25,60),(20,15,45)])),
+        ("draw_city", lambda scale: (canvas("RGBA", (1024, 576), scale), ga.skyline(1024, 576, [(30,25,60)])[1]),
+            lambda state: ga.draw_city(pen(state[0]), state[1], 576, (255,220,100,180))),
+        ("draw_stars", _blank((1024, 576)), lambda img: ga.draw_stars(pen(img), 1024, 576)),
+        ("draw_moon", _blank((1024, 576)), lambda img: ga.draw_moon(img, 768, 96, 35, glow_r=80)),
+        ("draw_circle_bg", _blank((256, 256)), lambda img: ga.draw_circle_bg(img, (50, 20, 80), (123, 47, 247))),
+        ("render_sprites", lambda scale: scale, ga.render_sprites),
+        ("render_effects", lambda scale: scale, ga.render_effects),
+        ("render_sfx", lambda scale: scale, lambda scale: ga.render_sfx()),
+    ]
+
+def gen_cases():
+    def run(name):
+        return lambda scale: ga.render(name, scale=scale)
+    return [(f"gen:{name}", lambda scale: scale, run(name)) for name in ga.ASSETS]
+
+def encode_cases(scale):
+    """One case per asset encoding its rendered image with the default options."""
+    return [(f"encode:{ga.variant_name(name, scale)}", lambda scale, name=name: ga.render(name, scale=scale),
+             lambda img: encode_bytes(img, DEFAULT_ENCODING))
+            for name in ga.ASSETS]
+
+# ----- Measurement -----
+
+class PeakMemory:
+    """Peak of live Pillow image buffers plus traced Python/NumPy memory during a block.
+
+    Pillow allocates its pixel buffers outside the Python allocator, so they
+    are counted by hooking Image._new and releasing on garbage collection.
+    """
+
+    def __enter__(self):
+        self.live = self.peak = 0
+        self._orig = Image.Image._new
+        def _new(img, core):
+            out = self._orig(img, core)
+            size = out.width * out.height * len(out.getbands())
+            self._move(size)
+            weakref.finalize(out, self._move, -size)
+            return out
+        Image.Image._new = _new
+        tracemalloc.start()
+        return self
+
+    def _move(self, delta):
+        self.live += delta
+        if tracemalloc.is_tracing():
+            self.peak = max(self.peak, self.live + tracemalloc.get_traced_memory()[0])
+
+    def __exit__(self, *exc):
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        Image.Image._new = self._orig
+
+def measure(setup, run, scale, repeat, warm=False):
+    times = []
+    for _ in range(repeat):
+        if not warm:
+            LAYER_CACHE.clear()
+        state = setup(scale)
+        t0 = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - t0)
+    if not warm:
+        LAYER_CACHE.clear()
+    state = setup(scale)
+    with PeakMemory() as mem:
+        run(state)
+    return {"best_ms": min(times) * 1000, "median_ms": statistics.median(times) * 1000,
+            "peak_mb": mem.peak / 1e6}
+
+def compare(results, baseline, threshold, min_ms):
+    """Regression messages for cases slower (best time) or hungrier (peak) than the baseline."""
+    problems = []
+    for name, r in results["cases"].items():
+        b = baseline["cases"].get(name)
+        if b is None:
+            continue
+        if r["best_ms"] > b["best_ms"] * (1 + threshold/100) and r["best_ms"] - b["best_ms"] > min_ms:
+            problems.append(f"{name}: {b['best_ms']:.2f} -> {r['best_ms']:.2f} ms "
+                            f"({r['best_ms']/b['best_ms']-1:+.0%})")
+        if r["peak_mb"] > b["peak_mb"] * (1 + threshold/100) and r["peak_mb"] - b["peak_mb"] > 1:
+            problems.append(f"{name}: peak {b['peak_mb']:.1f} -> {r['peak_mb']:.1f} MB "
+                            f"({r['peak_mb']/b['peak_mb']-1:+.0%})")
+    return problems
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1, choices=ga.SCALES)
+    parser.add_argument("--only", metavar="SUBSTR", help="run only cases whose name contains this")
+    parser.add_argument("--encode", action="store_true", help="also time encoding each asset")
+    parser.add_argument("--warm", action="store_true", help="keep shared layers cached between runs")
+    parser.add_argument("--json", metavar="PATH", help="write the results here")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against results written earlier")
+    parser.add_argument("--threshold", type=float, default=20, metavar="PCT",
+        help="fail when a case is this much slower or bigger than the baseline (default 20)")
+    parser.add_argument("--min-ms", type=float, default=0.5,
+        help="ignore time regressions smaller than this, which are noise (default 0.5)")
+    args = parser.parse_args(argv)
+
+    cases = primitive_cases() + gen_cases() + (encode_cases(args.scale) if args.encode else [])
+    if args.only:
+        cases = [c for c in cases if args.only in c[0]]
+
+    results = {"meta": {"python": platform.python_version(), "pillow": Image.__version__,
+                        "machine": platform.machine(), "cpus": os.cpu_count(),
+                        "repeat": args.repeat, "scale": args.scale, "warm": args.warm},
+               "cases": {}}
+    print(f"{'case':<28} {'best ms':>9} {'median ms':>10} {'peak MB':>8}")
+    for name, setup, run in cases:
+        r = results["cases"][name] = measure(setup, run, args.scale, args.repeat, args.warm)
+        print(f"{name:<28} {r['best_ms']:9.2f} {r['median_ms']:10.2f} {r['peak_mb']:8.1f}")
+    gens = [r for n, r in results["cases"].items() if n.startswith("gen:")]
+    if gens:
+        print(f"{'all render_* (best)':<28} {sum(r['best_ms'] for r in gens):9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+            f.write("\n")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("scale") != args.scale:
+            sys.exit(f"baseline was taken at scale {baseline['meta'].get('scale')}, not {args.scale}")
+        problems = compare(results, baseline, args.threshold, args.min_ms)
+        for p in problems:
+            print(f"✗ {p}")
+        print(f"{'❌' if problems else '✅'} {len(problems)} regression(s) past {args.threshold:g}% "
+              f"against {args.baseline}")
+        return 1 if problems else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Stress the level compiler and its platform grid on synthetic levels 10-100x longer than the game's.
+Each synthetic level is a shipped level repeated end to end; the collision
+queries are bodies at random x (the player's, an enemy's and the boss's
+half-widths, and point bullets), tested the way updatePlaying does, once
+against every platform and once against the platforms of their grid cell.
+
+    python benchmarks/bench_levels.py [--level 0] [--lengths 1,10,100] [--queries 5000]
+
+Fails when the platforms tested per query through the grid grow more than
+--max-growth times from the shortest level to the longest: the point of the
+index is that collision cost does not depend on the level's length.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import levels
+
+HALF_WIDTHS = (0, 12, 14, 30)  # bullets, enemies, the player, the boss
+
+
+def stretch(level, times):
+    """The level repeated `times` times end to end, with the boss at the far end."""
+    length = level["length"]
+    shift = lambda items: [{**it, "x": it["x"] + k*length} for k in range(times) for it in items]
+    return {**level, "length": length * times, "bossX": level["bossX"] + (times - 1) * length,
+            "platforms": shift(level["platforms"]), "enemies": shift(level["enemies"])}
+
+def queries(level, n, seed=1):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, level["length"]), rng.choice(HALF_WIDTHS)) for _ in range(n)]
+
+def linear(platforms, cells, cell, qs):
+    tested = hits = 0
+    for x, h in qs:
+        for p in platforms:
+            tested += 1
+            if x + h > p["x"] and x - h < p["x"] + p["w"]:
+                hits += 1
+    return tested, hits
+
+def gridded(platforms, cells, cell, qs):
+    tested = hits = 0
+    for x, h in qs:
+        near = cells[max(int(x // cell), 0)] if x < len(cells) * cell else ()
+        for p in near:
+            tested += 1
+            if x + h > p["x"] and x - h < p["x"] + p["w"]:
+                hits += 1
+    return tested, hits
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - t0, out
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--level", type=int, default=0, help="shipped level to stretch (default 0)")
+    parser.add_argument("--lengths", default="1,10,100", metavar="LIST", help="multiples of its length")
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--max-growth", type=float, default=2.0,
+        help="fail when grid tests per query grow more than this from the shortest level to the longest")
+    args = parser.parse_args(argv)
+
+    base = levels.load()[args.level]
+    print(f"{'length':>8} {'platforms':>9} {'compile ms':>10} {'linear us/q':>11} {'grid us/q':>9} "
+          f"{'linear tests/q':>14} {'grid tests/q':>12}")
+    per_query = []
+    for times in (int(t) for t in args.lengths.split(",")):
+        level = stretch(base, times)
+        t_validate, (errors, _) = timed(levels.validate, level)
+        t_compile, compiled = timed(levels.compile_level, level)
+        t_compile += t_validate
+        platforms, grid = level["platforms"], compiled["grid"]
+        cells = [[platforms[i] for i in c] for c in grid["cells"]]
+        qs = queries(level, args.queries)
+        t_lin, (n_lin, hits_lin) = timed(linear, platforms, cells, grid["cell"], qs)
+        t_grid, (n_grid, hits_grid) = timed(gridded, platforms, cells, grid["cell"], qs)
+        if errors or hits_lin != hits_grid:
+            sys.exit(f"{times}x: {errors or f'grid found {hits_grid} contacts, linear {hits_lin}'}")
+        per_query.append(n_grid / len(qs))
+        print(f"{level['length']:8d} {len(platforms):9d} {t_compile*1000:10.1f} {t_lin/len(qs)*1e6:11.2f} "
+              f"{t_grid/len(qs)*1e6:9.2f} {n_lin/len(qs):14.1f} {n_grid/len(qs):12.1f}")
+    growth = per_query[-1] / per_query[0]
+    print(f"{'✅' if growth <= args.max_growth else '❌'} grid tests per query grew {growth:.2f}x "
+          f"over a {args.lengths.split(',')[-1]}x longer level")
+    return 0 if growth <= args.max_growth else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Benchmark the Overlay layer against the per-shape full-frame layers it replaced.
+Reports best-of-N time and the number/size of Pillow image buffers allocated.
+
+    python benchmarks/bench_overlay.py [--repeat N]
+"""
+from PIL import Image, ImageDraw
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from raster_fx import Overlay
+
+# ----- Previous implementations (one full-frame RGBA layer per shape) -----
+
+def old_greenhouse_beams(img):
+    for i in range(5):
+        bx = 100 + i*200
+        pts = [(bx, 0), (bx+30, 0), (bx+60, 576), (bx-30, 576)]
+        beam = Image.new("RGBA", (1024,576), (0,0,0,0))
+        bd = ImageDraw.Draw(beam)
+        bd.polygon(pts, fill=(100,200,100,25))
+        img = Image.alpha_composite(img.convert("RGBA"), beam)
+    return img
+
+def old_tint(img, color):
+    overlay = Image.new("RGBA", img.size, color)
+    return Image.alpha_composite(img.convert("RGBA"), overlay)
+
+def old_victory_glow(img):
+    overlay = Image.new("RGBA", (800,450), (0,0,0,0))
+    od = ImageDraw.Draw(overlay)
+    for r in range(200, 10, -5):
+        a = int(15*(1-r/200))
+        od.ellipse([400-r,200-r,400+r,200+r], fill=(255,200,50,a))
+    return Image.alpha_composite(img.convert("RGBA"), overlay)
+
+# ----- Overlay versions, as used by generate_assets.py -----
+
+def new_greenhouse_beams(img):
+    beams = Overlay()
+    for i in range(5):
+        bx = 100 + i*200
+        beams.polygon([(bx, 0), (bx+30, 0), (bx+60, 576), (bx-30, 576)], fill=(100,200,100,25))
+    return beams.flatten(img)
+
+def new_tint(img, color):
+    overlay = Overlay()
+    overlay.fill(color)
+    return overlay.flatten(img)
+
+def new_victory_glow(img):
+    overlay = Overlay()
+    overlay.light(400, 200, 200, (255,200,50), 15, inner=15)
+    return overlay.flatten(img)
+
+CASES = [
+    ("greenhouse beams", (1024, 576), old_greenhouse_beams, new_greenhouse_beams),
+    ("funhouse darken", (1024, 576), lambda im: old_tint(im, (40,10,45,140)), lambda im: new_tint(im, (40,10,45,140))),
+    ("gameOver tint", (800, 450), lambda im: old_tint(im, (80,20,40,40)), lambda im: new_tint(im, (80,20,40,40))),
+    ("victory glow", (800, 450), old_victory_glow, new_victory_glow),
+]
+
+def count_allocations(fn, base):
+    """Run fn once and return (buffers, bytes) of Pillow images it created."""
+    seen = []
+    orig = Image.Image._new
+    def _new(self, im):
+        out = orig(self, im)
+        if out.width and out.height:  # frombuffer() makes a 0x0 image before mapping the array
+            seen.append(out.width * out.height * len(out.getbands()))
+        return out
+    Image.Image._new = _new
+    try:
+        fn(base.copy())
+    finally:
+        Image.Image._new = orig
+    return len(seen) - 1, sum(seen[1:])  # minus the base.copy()
+
+def best_time(fn, base, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        img = base.copy()
+        t0 = time.perf_counter()
+        fn(img)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<18} {'old ms':>8} {'new ms':>8} {'old bufs':>9} {'new bufs':>9} {'old MB':>7} {'new MB':>7}")
+    for name, size, old, new in CASES:
+        base = Image.new("RGB", size, (20, 40, 20))
+        t_old, t_new = best_time(old, base, args.repeat), best_time(new, base, args.repeat)
+        (n_old, b_old), (n_new, b_new) = count_allocations(old, base), count_allocations(new, base)
+        print(f"{name:<18} {t_old*1000:8.2f} {t_new*1000:8.2f} {n_old:9d} {n_new:9d} {b_old/1e6:7.1f} {b_new/1e6:7.1f}")
+
+if __name__ == "__main__":
+    main()
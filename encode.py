@@ -0,0 +1,129 @@
+"""
+Output encoding for the asset generator.
+Rendered images are written as the smallest PNG we can find: opaque RGBA
+is stored as RGB, flat-shaded art is quantized to an adaptive palette when
+the error stays under a threshold, and the zlib settings are searched.
+WebP and AVIF siblings are written next to the PNG for browsers that take them.
+"""
+from collections import namedtuple
+import io
+import os
+
+from PIL import Image
+import numpy as np
+
+# palette_error: largest RMS error (in 8-bit levels) a 256-colour palette or a
+#   lossy sibling may introduce, 0 to always keep true colour
+# png_effort: "fast" is a single default-level encode, "best" searches
+#   compression strategies at level 9 and keeps the smallest
+# formats: sibling formats to write next to each PNG
+EncodeOptions = namedtuple("EncodeOptions", "palette_error png_effort formats")
+DEFAULT_ENCODING = EncodeOptions(3.0, "best", ("avif", "webp"))
+FORMATS = ("avif", "webp")
+
+# zlib strategies tried on true-colour PNGs: default, Z_FILTERED. Z_RLE and
+# Z_HUFFMAN_ONLY never won on our art, and on palette images the default always does.
+# Pillow already picks each row's filter adaptively.
+PNG_STRATEGIES = (0, 1)
+WEBP_QUALITY = 90
+AVIF_QUALITY, AVIF_SPEED = 60, 8
+
+
+def _encoded(img, **params):
+    buf = io.BytesIO()
+    img.save(buf, **params)
+    return buf.getvalue()
+
+def drop_opaque_alpha(img):
+    """RGB copy of an RGBA image whose alpha is 255 everywhere, else the image itself."""
+    if img.mode == "RGBA" and img.getchannel("A").getextrema() == (255, 255):
+        return img.convert("RGB")
+    return img
+
+def rms_error(a, b):
+    d = np.asarray(a.convert("RGBA"), dtype=np.float32) - np.asarray(b.convert("RGBA"), dtype=np.float32)
+    return float(np.sqrt(np.mean(d * d)))
+
+def visible_error(a, b):
+    """rms_error over premultiplied colour: what a browser draws, so colour under zero alpha is free."""
+    def drawn(img):
+        px = np.asarray(img.convert("RGBA"), dtype=np.float32)
+        return np.concatenate([px[..., :3] * (px[..., 3:] / 255), px[..., 3:]], axis=-1)
+    d = drawn(a) - drawn(b)
+    return float(np.sqrt(np.mean(d * d)))
+
+def quantize(img, max_error):
+    """Adaptive 256-colour palette version of `img`, or None if it strays more than `max_error`."""
+    if max_error <= 0 or img.mode not in ("RGB", "RGBA"):
+        return None
+    # median cut handles gradients better but only takes RGB; octree is the RGBA quantizer
+    method = Image.Quantize.MEDIANCUT if img.mode == "RGB" else Image.Quantize.FASTOCTREE
+    pal = img.quantize(256, method=method, dither=Image.Dither.NONE)
+    return pal if rms_error(img, pal) <= max_error else None
+
+def png_bytes(img, effort="best"):
+    if effort == "fast":
+        return _encoded(img, format="PNG")
+    strategies = PNG_STRATEGIES if img.mode != "P" else PNG_STRATEGIES[:1]
+    return min((_encoded(img, format="PNG", compress_level=9, compress_type=s) for s in strategies), key=len)
+
+def webp_bytes(img, pal=None):
+    """Lossless WebP of the palette image for flat art that quantized cleanly, lossy otherwise."""
+    if pal is not None:
+        return _encoded(pal, format="WEBP", lossless=True)
+    return _encoded(img, format="WEBP", quality=WEBP_QUALITY)
+
+def avif_bytes(img, pal=None):
+    return _encoded(img, format="AVIF", quality=AVIF_QUALITY, speed=AVIF_SPEED)
+
+def sibling_error(img, data):
+    """visible_error of an encoded sibling against the image it stands in for."""
+    with Image.open(io.BytesIO(data)) as decoded:
+        return visible_error(img, decoded)
+
+SIBLING_ENCODERS = {"avif": avif_bytes, "webp": webp_bytes}
+
+def encode_bytes(img, options=DEFAULT_ENCODING):
+    """Encode one image; returns ({extension: bytes}, stats) with stats as for encode().
+
+    "raw" is what a bare img.save() would have written. It is also a
+    candidate, so the PNG never gets bigger. A sibling is only kept when it
+    is smaller than the PNG, since the game would gain nothing from fetching
+    it, and when it decodes to within options.palette_error RMS of the PNG
+    (see visible_error), the same bound the palette gets: lossy AVIF smears
+    thin outlines and text far past what the PNG shows.
+    """
+    raw = _encoded(img, format="PNG")
+    img = drop_opaque_alpha(img)
+    pal = quantize(img, options.palette_error)
+    data = png_bytes(pal if pal is not None else img, options.png_effort)
+    if len(data) >= len(raw):
+        data, pal = raw, None
+    shown = pal if pal is not None else img
+    files = {"png": data}
+    for fmt in FORMATS:
+        if fmt in options.formats:
+            sibling = SIBLING_ENCODERS[fmt](img, pal)
+            # measured against the PNG the sibling stands in for, which --verify can check on disk
+            if len(sibling) < len(data) and sibling_error(shown, sibling) <= options.palette_error:
+                files[fmt] = sibling
+    stats = {"raw": len(raw), "palette": pal is not None, **{ext: len(b) for ext, b in files.items()}}
+    return files, stats
+
+def encode(img, stem, options=DEFAULT_ENCODING):
+    """Write <stem>.png and its siblings; returns {"raw", "png", <format>...: bytes, "palette": bool}."""
+    files, stats = encode_bytes(img, options)
+    for ext in ("png",) + FORMATS:
+        path = f"{stem}.{ext}"
+        if ext in files:
+            with open(path, "wb") as f:
+                f.write(files[ext])
+        elif os.path.exists(path):
+            os.remove(path)  # left over from a build with other options
+    return stats
+
+def describe(stats):
+    """One-line size report: '54.2 -> 26.8 KB (-51%, palette)  avif 23.6 KB  webp 45.6 KB'."""
+    raw, png = stats["raw"], stats["png"]
+    line = f"{raw/1024:.1f} -> {png/1024:.1f} KB ({(png-raw)/raw:+.0%}{', palette' if stats['palette'] else ''})"
+    return line + "".join(f"  {fmt} {stats[fmt]/1024:.1f} KB" for fmt in FORMATS if fmt in stats)
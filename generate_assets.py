@@ -1,218 +1,542 @@
 """
-Generate all 18 game assets for Darkwing Duck using Pillow.
+Generate the game assets for Darkwing Duck using Pillow.
 Creates stylized, atmospheric pixel/painted art.
+
+Every asset is registered with @asset (or @villain for boss portraits),
+which is also the source for the service worker's precache list:
+
+    python generate_assets.py                    # build what changed
+    python generate_assets.py --only portraitNegaduck
+    python generate_assets.py --category backgrounds --scale 2
+    python generate_assets.py --list | --check
+    python generate_assets.py --verify [--update-golden]  # render in memory, diff against golden/
+    python generate_assets.py --png-effort fast --formats ""   # quick iteration
+    python generate_assets.py --bundle dist/assets.zip      # everything in one archive
+    python generate_assets.py --serve 8000                   # play with assets rendered live
+    python generate_assets.py --variants 500 --formats ""    # 500 seeded backgrounds per level
+    python generate_assets.py --tile 512                     # level backgrounds as 512-wide repeating tiles
+    python generate_assets.py --profile gen.folded --only bgFortress   # where the render time goes
+
+Each asset is also a pure function for other tools to call without touching
+the disk: render_titleBg(size=(2048, 1152), seed=7, palette={"glow": (255, 80, 40)})
+returns the image, as does render("titleBg", scale=2); render("bgDam", tile=512)
+is a 512x576 tile that repeats seamlessly side by side, render_sprites(2)
+is every character pose of the game packed into one sheet and render_effects(2)
+every particle and bullet shape. Importing the module writes nothing;
+sinks.py stores renders in a directory, memory or an archive.
 """
 from PIL import Image, ImageDraw, ImageFilter, ImageFont
+import numpy as np
+from raster_fx import (gradient_rect, composite_ramp, LightBuffer, Overlay, Layers,
+    ScaledDraw as pen, canvas, scale_of, logical_size)
+from asset_cache import BuildManifest, job_key, file_hash, LAYER_CACHE, DEFAULT_LAYER_CACHE_MB
+from atlas import pack as pack_frames, render as render_atlas
+from encode import EncodeOptions, DEFAULT_ENCODING, FORMATS, describe, visible_error
+from sinks import DirectorySink, BundleSink, BUNDLE_EXTENSIONS
+from audio import automation, oscillator, noise, silence, wav_bytes
+# golden, preview, profiler and levels are imported by the modes that use them,
+# so a build with everything up to date pays for little more than the hashing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import functools
+import itertools
+import argparse
+import json
 import random
 import math
 import os
+import re
+import sys
+import time
 
 OUT = os.path.join(os.path.dirname(__file__), "assets")
-os.makedirs(OUT, exist_ok=True)
+MANIFEST = os.path.join(os.path.dirname(__file__), "assets.build.json")
+SW = os.path.join(os.path.dirname(__file__), "sw.js")
+INDEX = os.path.join(os.path.dirname(__file__), "index.html")
+GOLDEN = os.path.join(os.path.dirname(__file__), "golden")
+GOLDEN_DIFF = os.path.join(GOLDEN, "diff")
+
+# ===== ASSET REGISTRY =====
+
+Asset = namedtuple("Asset", "name fn args size category scales palette layers tileable")
+ASSETS = {}
+CATEGORIES = ("backgrounds", "portraits", "screens")
+# Render scales relative to the logical size. Every variant is drawn from the
+# same parametric code at its own resolution, never resampled from another.
+SCALES = (0.5, 1, 2)
+RESOLUTIONS = os.path.join(OUT, "resolutions.json")
+# Every portrait is also packed into assets/portraits[@<scale>x].png, indexed
+# by portraits.json, so the game loads them with one request and one decode.
+ATLAS = "portraits"
+ATLAS_INDEX = os.path.join(OUT, "portraits.json")
+ATLAS_PADDING = 2
+# Darkwing, the enemies and the bosses as they are drawn in play, one frame per
+# pose in assets/sprites[@<scale>x].png, indexed by sprites.json, so the game
+# blits a character instead of rebuilding it from canvas paths every frame.
+Sprite = namedtuple("Sprite", "name fn box axes period")
+SPRITES = {}
+SPRITE_SHEET = "sprites"
+SPRITE_INDEX = os.path.join(OUT, "sprites.json")
+# Sprites are drawn this many times larger and box-filtered down: at 30 pixels
+# Pillow's aliased edges show, and the canvas code they replace was antialiased.
+SPRITE_SUPERSAMPLE = 4
+# Particle, bullet and ember discs in assets/fx[@<scale>x].png, indexed by fx.json:
+# white masks (and the player's bolt in its own colours) at a few sizes each, which the
+# game tints once per colour and blits instead of filling canvas arcs every frame.
+Effect = namedtuple("Effect", "name fn sizes box")
+EFFECTS = {}
+FX_SHEET = "fx"
+FX_INDEX = os.path.join(OUT, "fx.json")
+# playSound's effects, synthesized into one clip after another in assets/sfx.wav;
+# sfx.json holds where each starts, so the game decodes one file and plays slices of it.
+Sound = namedtuple("Sound", "name fn duration")
+SOUNDS = {}
+SFX = "sfx"
+SFX_INDEX = os.path.join(OUT, "sfx.json")
+SFX_RATE = 22050
+SFX_GAP = 0.05      # silence between clips, in seconds
+SFX_VOLUME = 0.3    # playSound's default volume, which the clips are rendered at
+# Seeded alternatives the game picks from per run, in assets/variants/<name>/<seed>.png,
+# indexed by variants.json. --variants renders them for these unless told otherwise.
+VARIANTS = os.path.join(OUT, "variants")
+VARIANTS_INDEX = os.path.join(VARIANTS, "variants.json")
+LEVEL_BACKGROUNDS = ("bgRooftops", "bgFunhouse", "bgGreenhouse", "bgDam", "bgFortress")
+# Level backgrounds are also exported as depth layers in assets/layers/<name>.<layer>[@<scale>x].png,
+# cropped to their rows, with drawBackground's 25% dimming baked in; parallax.json
+# holds each layer's rows and scroll factor.
+LAYERS = os.path.join(OUT, "layers")
+PARALLAX = os.path.join(OUT, "parallax.json")
+BG_DIM = 0.25
+# Scroll factors: the whole image used to scroll at 0.1.
+PARALLAX_FACTORS = {"sky": 0.02, "far": 0.06, "near": 0.1, "fg": 0.16}
+# bgRooftops' building rows as data, for the game to draw when the image is missing.
+SKYLINE = os.path.join(OUT, "skyline.json")
+# Lit windows of a building: first one's offset from its top-left, pitch, and inclusive box size.
+WINDOW_INSET, WINDOW_PITCH, WINDOW_SIZE = (5, 8), (10, 14), (5, 7)
+# The game's load bundles (not --bundle's archive): the images each screen needs, loaded when it
+# comes up, and the content hash of every built file, which versions its URL for the service worker.
+BUNDLES = os.path.join(OUT, "bundles.json")
+TITLE_ASSETS = ("titleBg", "portraitDarkwing")  # what drawTitle shows
+PLAY_ASSETS = ("portraitLaunchpad", "portraitGosalyn", "portraitMorgana", "portraitGizmoduck")  # drawUI's abilities
+HASH_LENGTH = 12
+
+# Seed every asset is rendered with unless asked otherwise; it reproduces the shipped art.
+DEFAULT_SEED = 42
+
+def asset(name, size, category, *args, scales=SCALES, palette=None, layers=(), tileable=False):
+    """Register the decorated render_* function as the builder of assets/<name>.png.
+
+    `palette` holds the default for every colour a caller may override.
+    `layers` names the depth layers, back to front, that the renderer
+    returns as {name: image} when called with split=True. A tileable
+    renderer takes tile=<logical width> and then draws a horizontally
+    periodic image that wide.
+    """
+    assert category in CATEGORIES, category
+    assert set(layers) <= set(PARALLAX_FACTORS), layers
+    def register(fn):
+        ASSETS[name] = Asset(name, fn, args, size, category, scales, palette or {}, tuple(layers), tileable)
+        return fn
+    return register
+
+def villain(name, bg_color, accent, size=256, scales=SCALES):
+    """Register a render_villain_portrait job that draws with the decorated draw_* function.
+
+    It is also exposed as render_portrait<name>(size, seed, palette) like the other assets.
+    """
+    def register(draw_fn):
+        key = f"portrait{name}"
+        ASSETS[key] = Asset(key, render_villain_portrait, (key, draw_fn), (size, size), "portraits",
+            scales, {"bg": bg_color, "accent": accent}, (), False)
+        globals()[f"render_{key}"] = functools.partial(render_villain_portrait, key, draw_fn)
+        return draw_fn
+    return register
+
+def sprite(name, box, period=None, **axes):
+    """Register the decorated draw function as the sprite sheet frames of `name`.
+
+    `box` is the logical (x0, y0, x1, y1) every pose fits in, relative to
+    the point the game draws the character at. Each keyword is a pose axis
+    and its number of values; a frame is drawn for every combination with
+    fn(draw, cx, cy, **pose). An "anim" axis is a loop the game plays once
+    every `period` (in whatever clock the old draw code animated with) and
+    reaches fn as the fraction of the loop. Sprites face right; the game
+    mirrors them.
+    """
+    assert (box[2] - box[0]) % 2 == 0 and (box[3] - box[1]) % 2 == 0, box  # whole pixels at 0.5x
+    assert ("anim" in axes) == (period is not None), name
+    def register(fn):
+        SPRITES[name] = Sprite(name, fn, box, axes, period)
+        return fn
+    return register
+
+def effect(name, sizes, box):
+    """Register the decorated draw function as the fx sheet frames of `name`, one per size.
+
+    `box(r)` is the logical (x0, y0, x1, y1) the shape of size r fits in,
+    relative to the point the game draws it at; fn(draw, cx, cy, r) draws
+    it there. The game scales the frame of the nearest size up or down.
+    """
+    for r in sizes:
+        x0, y0, x1, y1 = box(r)
+        assert (x1 - x0) % 2 == 0 and (y1 - y0) % 2 == 0, (name, r)  # whole pixels at 0.5x
+    def register(fn):
+        EFFECTS[name] = Effect(name, fn, sizes, box)
+        return fn
+    return register
+
+def sound(name, duration):
+    """Register the decorated function as the synthesizer of playSound(`name`).
+
+    It is called as fn(rate, seed) and returns `duration` seconds of float
+    samples at SFX_VOLUME, what the old oscillator graph played before its stop().
+    """
+    def register(fn):
+        SOUNDS[name] = Sound(name, fn, duration)
+        return fn
+    return register
+
+def logical_width(name, tile=None):
+    """Logical width of the named asset, or of its tiles when rendered with tile=<width>."""
+    a = ASSETS[name]
+    if tile is not None and not a.tileable:
+        raise ValueError(f"{name} cannot be rendered as a tile")
+    return tile or a.size[0]
+
+def prepare(name, size, palette, tile=None):
+    """Render scale for an output `size` of the named asset, and its palette with overrides.
+
+    `size` is in pixels and must keep the asset's aspect ratio (or the
+    tile's, for a tile); None is 1x.
+    """
+    a = ASSETS[name]
+    unknown = set(palette or {}) - set(a.palette)
+    if unknown:
+        raise ValueError(f"{name} has no colour(s) {', '.join(sorted(unknown))}; it has {', '.join(a.palette)}")
+    pal = {**a.palette, **(palette or {})}
+    w = logical_width(name, tile)
+    if size is None:
+        return 1, pal
+    scale = size[0] / w
+    if round(a.size[1] * scale) != size[1]:
+        raise ValueError(f"{name} is {w}x{a.size[1]}; {size[0]}x{size[1]} changes its aspect ratio")
+    return scale, pal
+
+def columns(start, stop, step, tile=None, multiple=1):
+    """x positions from `start` every `step` up to `stop`.
+
+    For a tile, `step` is instead stretched so a whole number of them (a
+    multiple of `multiple`) spans the tile exactly, and the pattern carries
+    on across the seam.
+    """
+    if not tile:
+        return range(start, stop, step)
+    n = max(multiple, round(tile / step / multiple) * multiple)
+    return [start + round(i * tile / n) for i in range(n)]
+
+def tile_step(step, tile=None, multiple=1):
+    """The spacing columns() uses for `step`."""
+    return step if not tile else tile / max(multiple, round(tile / step / multiple) * multiple)
 
-random.seed(42)
+def seeded(seed, stream):
+    """RNG for one of an asset's random streams. The default seed gives Random(stream)."""
+    return random.Random(stream + seed - DEFAULT_SEED)
+
+def render(name, size=None, seed=DEFAULT_SEED, palette=None, scale=None, tile=None):
+    """Render a registered asset in memory, at a pixel `size` or a `scale` of its logical size.
+
+    With `tile`, a tileable asset comes out horizontally periodic and that many logical pixels wide.
+    """
+    a = ASSETS[name]
+    if size is None and scale is not None:
+        size = (round(logical_width(name, tile) * scale), round(a.size[1] * scale))
+    return a.fn(*a.args, size=size, seed=seed, palette=palette, **({"tile": tile} if tile else {}))
+
+def render_layers(name, size=None, seed=DEFAULT_SEED, palette=None, scale=None, tile=None):
+    """{layer: RGBA image} of a layered asset, back to front; composited they are render()."""
+    a = ASSETS[name]
+    if not a.layers:
+        raise ValueError(f"{name} is not drawn in layers")
+    if size is None and scale is not None:
+        size = (round(logical_width(name, tile) * scale), round(a.size[1] * scale))
+    layers = a.fn(*a.args, size=size, seed=seed, palette=palette, split=True, **({"tile": tile} if tile else {}))
+    return {layer: layers[layer] for layer in a.layers if layer in layers}
+
+def variant_name(name, scale):
+    """File stem of one render scale: titleBg, titleBg@0.5x, titleBg@2x."""
+    return name if scale == 1 else f"{name}@{scale:g}x"
 
 def lerp_color(c1, c2, t):
     return tuple(int(c1[i] + (c2[i]-c1[i])*t) for i in range(3))
 
 def draw_stars(draw, w, h, count=80, seed=42):
+    for x, y, size, color in star_field(w, h, count, seed):
+        draw.ellipse([x,y,x+size,y+size], fill=color)
+
+@functools.lru_cache(maxsize=64)
+def star_field(w, h, count, seed):
+    """draw_stars' (x, y, size, colour) per star, drawn from the seed once per field."""
     rng = random.Random(seed)
+    stars = []
     for _ in range(count):
         x, y = rng.randint(0,w), rng.randint(0, h//2)
         b = rng.randint(150, 255)
         s = rng.choice([1,1,1,2])
-        draw.ellipse([x,y,x+s,y+s], fill=(b,b,b+min(255-b,30)))
-
-def gradient_rect(draw, x, y, w, h, top_color, bot_color):
-    for row in range(h):
-        t = row / max(h-1, 1)
-        c = lerp_color(top_color, bot_color, t)
-        draw.line([(x, y+row), (x+w, y+row)], fill=c)
-
-def draw_building(draw, x, y, w, h, color, window_color, rng):
-    draw.rectangle([x, y, x+w, y+h], fill=color)
-    # Windows
-    for wy in range(y+8, y+h-8, 14):
-        for wx in range(x+5, x+w-5, 10):
-            if rng.random() > 0.3:
-                draw.rectangle([wx, wy, wx+5, wy+7], fill=window_color)
-
-def draw_moon(draw, cx, cy, r, glow_r=None):
+        stars.append((x, y, s, (b,b,b+min(255-b,30))))
+    return tuple(stars)
+
+# A row of buildings: x and top per building (arrays), the common width, a colour per
+# building and an (n, rows, cols) mask of lit windows, False past a building's own rows.
+Buildings = namedtuple("Buildings", "x top width color lit")
+
+def window_rows(height):
+    return len(range(WINDOW_INSET[1], height - WINDOW_INSET[1], WINDOW_PITCH[1]))
+
+def city_row(rng, xs, base, width, heights, color, windows=True):
+    """Seeded layout of buildings `width` wide standing on y=`base`, one at each of `xs`.
+
+    Per building it draws a height from `heights`, then color(rng), then
+    one rng.random() per window, in the order the per-window draw loops
+    always did, so layouts (and the art) stay the same for a seed.
+    """
+    xs = list(xs)
+    cols = len(range(WINDOW_INSET[0], width - WINDOW_INSET[0], WINDOW_PITCH[0])) if windows else 0
+    top, colors, grids = [], [], []
+    for _ in xs:
+        bh = rng.randint(*heights)
+        top.append(base - bh)
+        colors.append(color(rng))
+        n = window_rows(bh) * cols
+        grids.append(np.array([rng.random() for _ in range(n)]).reshape(-1, cols) > 0.3 if n else None)
+    lit = np.zeros((len(xs), max((len(g) for g in grids if g is not None), default=0), cols), dtype=bool)
+    for i, g in enumerate(grids):
+        if g is not None:
+            lit[i, :len(g)] = g
+    return Buildings(np.array(xs, dtype=np.int64), np.array(top, dtype=np.int64), width, colors, lit)
+
+def window_boxes(row):
+    """(n, 4) [x0, y0, x1, y1] boxes of every lit window in a Buildings row."""
+    i, r, c = np.nonzero(row.lit)
+    x = row.x[i] + WINDOW_INSET[0] + c * WINDOW_PITCH[0]
+    y = row.top[i] + WINDOW_INSET[1] + r * WINDOW_PITCH[1]
+    return np.stack([x, y, x + WINDOW_SIZE[0], y + WINDOW_SIZE[1]], axis=1)
+
+def draw_city(draw, row, base, window_color=None):
+    """Draw a Buildings row down to `base`: one rectangle per building, then all lit windows in one fill."""
+    for x, top, color in zip(row.x.tolist(), row.top.tolist(), row.color):
+        draw.rectangle([x, top, x + row.width, base], fill=color)
+    if window_color is not None and row.lit.any():
+        draw.rectangles(window_boxes(row), window_color)
+
+def draw_moon(img, cx, cy, r, glow_r=None):
     if glow_r:
-        for gr in range(glow_r, r, -1):
-            a = int(40 * (1 - (gr-r)/(glow_r-r)))
-            draw.ellipse([cx-gr, cy-gr, cx+gr, cy+gr], fill=(200, 200, 255, a))
+        # 40 alpha at the rim, fading out at glow_r
+        lights = LightBuffer()
+        lights.add(cx, cy, glow_r, (200, 200, 255), 40*glow_r/(glow_r-r), inner=r)
+        lights.composite(img)
+    draw = pen(img)
     draw.ellipse([cx-r, cy-r, cx+r, cy+r], fill=(240, 235, 200))
     # Craters
     draw.ellipse([cx-r//3, cy-r//4, cx-r//3+r//4, cy-r//4+r//4], fill=(220, 215, 185))
     draw.ellipse([cx+r//5, cy+r//6, cx+r//5+r//5, cy+r//6+r//5], fill=(225, 220, 190))
 
-def make_cityscape(w, h, sky_top, sky_bot, building_colors, window_color, has_moon=True, has_stars=True):
-    img = Image.new("RGBA", (w, h))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, w, h, sky_top, sky_bot)
+def make_cityscape(w, h, sky_top, sky_bot, building_colors, window_color, has_moon=True, has_stars=True,
+                   scale=1, seed=DEFAULT_SEED, layers=None, tile=None):
+    """Night sky and two rows of buildings; into the sky/far/near `layers` if given, else a new image.
+
+    With `tile` (then also w), the rows are spaced to repeat across the tile's seam.
+    """
+    out = layers if layers is not None else Layers("RGBA", (w, h), scale)
+    img = out["sky"]
+    draw = pen(img)
+    gradient_rect(img, 0, 0, w, h, sky_top, sky_bot)
     if has_stars:
-        draw_stars(draw, w, h)
+        draw_stars(draw, w, h, seed=seed)
     if has_moon:
-        draw_moon(draw, w*3//4, h//6, 35)
-    rng = random.Random(123)
-    # Far buildings
-    for i in range(0, w, 60):
-        bh = rng.randint(80, 200)
-        bc = lerp_color(building_colors[0], (0,0,0), 0.6)
-        draw.rectangle([i, h-bh, i+55, h], fill=bc)
-    # Near buildings
-    for i in range(0, w, 70):
-        bh = rng.randint(100, 280)
-        bc = building_colors[rng.randint(0, len(building_colors)-1)]
-        draw_building(draw, i, h-bh, 60, bh, bc, window_color, rng)
-    return img
+        draw_moon(img, w*3//4, h//6, 35)
+    far, near = skyline(w, h, building_colors, seed, tile)
+    draw_city(pen(out["far"]), far, h)
+    draw_city(pen(out["near"]), near, h, window_color)
+    return out if layers is not None else out.result()
+
+def skyline(w, h, building_colors, seed=DEFAULT_SEED, tile=None):
+    """make_cityscape's (far, near) Buildings rows: unlit silhouettes, then lit buildings."""
+    rng = seeded(seed, 123)
+    far_color = lerp_color(building_colors[0], (0,0,0), 0.6)
+    far = city_row(rng, columns(0, w, 60, tile), h, 55, (80, 200), lambda rng: far_color, windows=False)
+    near = city_row(rng, columns(0, w, 70, tile), h, 60, (100, 280),
+                    lambda rng: building_colors[rng.randint(0, len(building_colors)-1)])
+    return far, near
 
 # ===== BACKGROUNDS =====
 
-def gen_titleBg():
-    img = make_cityscape(1024, 576, (12, 8, 40), (30, 15, 60),
-        [(25,20,50),(30,25,60),(20,15,45)], (255,220,100,180))
+@asset("titleBg", (1024, 576), "backgrounds", palette={"sky_top": (12, 8, 40), "sky_bot": (30, 15, 60),
+    "buildings": [(25,20,50),(30,25,60),(20,15,45)], "windows": (255,220,100,180), "glow": (123,47,247)})
+def render_titleBg(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("titleBg", size, palette)
+    img = make_cityscape(1024, 576, pal["sky_top"], pal["sky_bot"],
+        pal["buildings"], pal["windows"], scale=scale, seed=seed)
     # Purple glow from below
-    glow = Image.new("RGBA", (1024,576), (0,0,0,0))
-    gd = ImageDraw.Draw(glow)
-    for y in range(450, 576):
-        t = (y-450)/126
-        a = int(60*t)
-        gd.line([(0,y),(1024,y)], fill=(123,47,247,a))
-    img = Image.alpha_composite(img.convert("RGBA"), glow)
+    img = composite_ramp(img, 450, 576, pal["glow"], 60)
     img = img.convert("RGB")
-    img = img.filter(ImageFilter.GaussianBlur(1))
-    img.save(os.path.join(OUT, "titleBg.png"))
-    print("✓ titleBg")
-
-def gen_bgRooftops():
-    img = make_cityscape(1024, 576, (10, 10, 42), (25, 20, 55),
-        [(35,30,65),(40,35,75),(28,22,52)], (255,220,80,150))
-    draw = ImageDraw.Draw(img)
+    return img.filter(ImageFilter.GaussianBlur(scale))
+
+@asset("bgRooftops", (1024, 576), "backgrounds", palette={"sky_top": (10, 10, 42), "sky_bot": (25, 20, 55),
+    "buildings": [(35,30,65),(40,35,75),(28,22,52)], "windows": (255,220,80,150),
+    "roof": (55,55,90), "roof_edge": (80,80,130)}, layers=("sky", "far", "near", "fg"), tileable=True)
+def render_bgRooftops(size=None, seed=DEFAULT_SEED, palette=None, split=False, tile=None):
+    scale, pal = prepare("bgRooftops", size, palette, tile)
+    w = tile or 1024
+    layers = Layers("RGBA", (w, 576), scale, split, wrap=bool(tile))
+    make_cityscape(w, 576, pal["sky_top"], pal["sky_bot"],
+        pal["buildings"], pal["windows"], scale=scale, seed=seed, layers=layers, tile=tile)
+    draw = pen(layers["fg"])
     # Rooftop platforms in foreground
-    for x in range(0, 1024, 150):
-        rng = random.Random(x)
+    for x in columns(0, w, 150, tile):
+        rng = seeded(seed, x)
         ry = 350 + rng.randint(0, 120)
         rw = rng.randint(80, 140)
-        draw.rectangle([x, ry, x+rw, ry+15], fill=(55,55,90))
-        draw.rectangle([x, ry, x+rw, ry+3], fill=(80,80,130))
-    img.save(os.path.join(OUT, "bgRooftops.png"))
-    print("✓ bgRooftops")
-
-def gen_bgFunhouse():
-    img = Image.new("RGB", (1024, 576))
-    draw = ImageDraw.Draw(img)
-    # Colorful striped background
-    colors = [(180,40,100),(200,80,40),(180,160,40),(40,160,80),(40,80,180),(120,40,180)]
-    stripe_w = 80
-    for i in range(0, 1024+200, stripe_w):
-        c = colors[i//stripe_w % len(colors)]
+        draw.rectangle([x, ry, x+rw, ry+15], fill=pal["roof"])
+        draw.rectangle([x, ry, x+rw, ry+3], fill=pal["roof_edge"])
+    return layers.result()
+
+@asset("bgFunhouse", (1024, 576), "backgrounds", palette={
+    "stripes": [(180,40,100),(200,80,40),(180,160,40),(40,160,80),(40,80,180),(120,40,180)],
+    "darken": (40,10,45,140), "floor": [(60,30,60),(40,20,40)]}, layers=("sky", "near", "fg"), tileable=True)
+def render_bgFunhouse(size=None, seed=DEFAULT_SEED, palette=None, split=False, tile=None):
+    scale, pal = prepare("bgFunhouse", size, palette, tile)
+    w = tile or 1024
+    layers = Layers("RGB", (w, 576), scale, split, wrap=bool(tile))
+    draw = pen(layers["sky"])
+    # Colorful striped background, whole colour cycles per tile
+    colors = pal["stripes"]
+    stripe_w = tile_step(80, tile, len(colors))
+    for k, i in enumerate(columns(0, w+200, 80, tile, len(colors))):
+        c = colors[k % len(colors)]
         # Angled stripes
         pts = [(i-100,0),(i+stripe_w-100,0),(i+stripe_w-200,576),(i-200,576)]
         draw.polygon(pts, fill=c)
     # Darken
-    overlay = Image.new("RGBA", (1024,576), (40,10,45,140))
-    img = Image.alpha_composite(img.convert("RGBA"), overlay)
-    draw = ImageDraw.Draw(img)
+    overlay = Overlay()
+    overlay.fill(pal["darken"])
+    layers["sky"] = overlay.flatten(layers["sky"])
+    draw = pen(layers["near"])
     # Balloons
-    rng = random.Random(77)
+    rng = seeded(seed, 77)
     for _ in range(15):
-        bx, by = rng.randint(50,974), rng.randint(30, 250)
+        bx, by = rng.randint(50, w-50), rng.randint(30, 250)
         bc = (rng.randint(180,255), rng.randint(50,200), rng.randint(100,255))
         draw.ellipse([bx-12,by-15,bx+12,by+15], fill=bc)
         draw.line([(bx,by+15),(bx+rng.randint(-5,5),by+50)], fill=(200,200,200), width=1)
     # Checkered floor
-    for x in range(0, 1024, 40):
+    draw = pen(layers["fg"])
+    for k, x in enumerate(columns(0, w, 40, tile, 2)):
         for y in range(480, 576, 40):
-            c = (60,30,60) if (x//40+y//40)%2==0 else (40,20,40)
+            c = pal["floor"][(k+y//40)%2]
             draw.rectangle([x,y,x+40,y+40], fill=c)
-    img.save(os.path.join(OUT, "bgFunhouse.png"))
-    print("✓ bgFunhouse")
+    return layers.result()
 
-def gen_bgGreenhouse():
-    img = Image.new("RGB", (1024, 576))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, 1024, 576, (15, 50, 15), (10, 35, 10))
+@asset("bgGreenhouse", (1024, 576), "backgrounds", palette={"sky_top": (15, 50, 15), "sky_bot": (10, 35, 10),
+    "frame": (60,100,60), "beam": (100,200,100,25), "vine": (30,80,30)}, layers=("sky", "near", "fg"),
+    tileable=True)
+def render_bgGreenhouse(size=None, seed=DEFAULT_SEED, palette=None, split=False, tile=None):
+    scale, pal = prepare("bgGreenhouse", size, palette, tile)
+    w = tile or 1024
+    layers = Layers("RGB", (w, 576), scale, split, wrap=bool(tile))
+    img = layers["sky"]
+    draw = pen(img)
+    gradient_rect(img, 0, 0, w, 576, pal["sky_top"], pal["sky_bot"])
     # Glass ceiling structure
-    for x in range(0, 1024, 120):
-        draw.line([(x, 0), (x+60, 100)], fill=(60,100,60), width=3)
-        draw.line([(x+120, 0), (x+60, 100)], fill=(60,100,60), width=3)
+    span = tile_step(120, tile)
+    for x in columns(0, w, 120, tile):
+        draw.line([(x, 0), (x+span/2, 100)], fill=pal["frame"], width=3)
+        draw.line([(x+span, 0), (x+span/2, 100)], fill=pal["frame"], width=3)
     for y in range(0, 120, 30):
-        draw.line([(0,y),(1024,y)], fill=(50,90,50), width=2)
+        draw.line([(0,y),(w,y)], fill=(50,90,50), width=2)
     # Light beams
-    for i in range(5):
-        bx = 100 + i*200
-        pts = [(bx, 0), (bx+30, 0), (bx+60, 576), (bx-30, 576)]
-        beam = Image.new("RGBA", (1024,576), (0,0,0,0))
-        bd = ImageDraw.Draw(beam)
-        bd.polygon(pts, fill=(100,200,100,25))
-        img = Image.alpha_composite(img.convert("RGBA"), beam)
-    draw = ImageDraw.Draw(img)
+    beams = Overlay()
+    for bx in columns(100, w, 200, tile):
+        beams.polygon([(bx, 0), (bx+30, 0), (bx+60, 576), (bx-30, 576)], fill=pal["beam"])
+    layers["sky"] = beams.flatten(img)
+    draw = pen(layers["near"])
     # Vines and plants
-    rng = random.Random(55)
-    for x in range(0, 1024, 50):
+    rng = seeded(seed, 55)
+    for x in columns(0, w, 50, tile):
         vine_h = rng.randint(80, 300)
-        draw.line([(x, 0), (x + rng.randint(-20,20), vine_h)], fill=(30,80,30), width=rng.randint(2,4))
+        draw.line([(x, 0), (x + rng.randint(-20,20), vine_h)], fill=pal["vine"], width=rng.randint(2,4))
         for ly in range(20, vine_h, 25):
             lx = x + rng.randint(-15, 15)
             draw.ellipse([lx-8, ly-4, lx+8, ly+4], fill=(40,100+rng.randint(0,50),30))
     # Ground plants
-    for x in range(0, 1024, 30):
+    draw = pen(layers["fg"])
+    for x in columns(0, w, 30, tile):
         ph = rng.randint(20, 80)
         draw.polygon([(x,576),(x+8,576-ph),(x+16,576)], fill=(30,80+rng.randint(0,40),25))
-    img.save(os.path.join(OUT, "bgGreenhouse.png"))
-    print("✓ bgGreenhouse")
+    return layers.result()
 
-def gen_bgDam():
-    img = Image.new("RGB", (1024, 576))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, 1024, 576, (10, 25, 55), (15, 35, 75))
+@asset("bgDam", (1024, 576), "backgrounds", palette={"sky_top": (10, 25, 55), "sky_bot": (15, 35, 75),
+    "wall": (50, 60, 80), "water_top": (30,80,160), "water_bot": (20,50,120), "pipe": (70,80,100)},
+    layers=("sky", "far", "near", "fg"), tileable=True)
+def render_bgDam(size=None, seed=DEFAULT_SEED, palette=None, split=False, tile=None):
+    scale, pal = prepare("bgDam", size, palette, tile)
+    w = tile or 1024
+    layers = Layers("RGB", (w, 576), scale, split, wrap=bool(tile))
+    gradient_rect(layers["sky"], 0, 0, w, 576, pal["sky_top"], pal["sky_bot"])
+    img = layers["far"]
+    draw = pen(img)
     # Dam wall structure
-    draw.rectangle([0, 200, 1024, 576], fill=(50, 60, 80))
+    draw.rectangle([0, 200, w, 576], fill=pal["wall"])
     # Metal panels
-    for x in range(0, 1024, 80):
-        draw.rectangle([x+2, 202, x+78, 574], fill=(55, 65, 85))
+    panel = tile_step(80, tile)
+    for x in columns(0, w, 80, tile):
+        draw.rectangle([x+2, 202, x+panel-2, 574], fill=(55, 65, 85))
         draw.line([(x, 200), (x, 576)], fill=(40, 50, 70), width=3)
     # Horizontal lines
     for y in range(200, 576, 60):
-        draw.line([(0,y),(1024,y)], fill=(45, 55, 75), width=2)
+        draw.line([(0,y),(w,y)], fill=(45, 55, 75), width=2)
     # Rivets
-    for x in range(20, 1024, 80):
+    for x in columns(20, w, 80, tile):
         for y in range(220, 576, 60):
             draw.ellipse([x-3,y-3,x+3,y+3], fill=(65,75,95))
     # Water at bottom
-    for y in range(480, 576):
-        t = (y-480)/96
-        c = lerp_color((30,80,160), (20,50,120), t)
-        draw.line([(0,y),(1024,y)], fill=c)
+    img = layers["fg"]
+    draw = pen(img)
+    gradient_rect(img, 0, 480, w, 96, pal["water_top"], pal["water_bot"], span=96)
     # Water ripples
-    rng = random.Random(33)
+    rng = seeded(seed, 33)
     for _ in range(40):
-        rx, ry = rng.randint(0,1024), rng.randint(485,570)
+        rx, ry = rng.randint(0, w), rng.randint(485,570)
         rw = rng.randint(15,40)
         draw.arc([rx,ry,rx+rw,ry+6], 0, 180, fill=(80,150,220), width=1)
     # Pipes
+    draw = pen(layers["near"])
     for py in [250, 350, 450]:
-        draw.rectangle([0, py, 1024, py+12], fill=(70,80,100))
-        draw.rectangle([0, py, 1024, py+3], fill=(90,100,120))
-    img.save(os.path.join(OUT, "bgDam.png"))
-    print("✓ bgDam")
-
-def gen_bgFortress():
-    img = Image.new("RGB", (1024, 576))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, 1024, 576, (25, 8, 8), (50, 18, 18))
+        draw.rectangle([0, py, w, py+12], fill=pal["pipe"])
+        draw.rectangle([0, py, w, py+3], fill=(90,100,120))
+    return layers.result()
+
+@asset("bgFortress", (1024, 576), "backgrounds", palette={"sky_top": (25, 8, 8), "sky_bot": (50, 18, 18),
+    "torch": (255,100,20), "floor_glow": (255,30,0)}, layers=("sky", "near", "fg"), tileable=True)
+def render_bgFortress(size=None, seed=DEFAULT_SEED, palette=None, split=False, tile=None):
+    scale, pal = prepare("bgFortress", size, palette, tile)
+    w = tile or 1024
+    layers = Layers("RGB", (w, 576), scale, split, wrap=bool(tile))
+    img = layers["sky"]
+    draw = pen(img)
+    gradient_rect(img, 0, 0, w, 576, pal["sky_top"], pal["sky_bot"])
     # Stone walls
-    rng = random.Random(66)
+    rng = seeded(seed, 66)
+    brick = tile_step(65, tile) - 5
     for y in range(0, 576, 35):
         offset = 20 if (y//35)%2 else 0
-        for x in range(-20+offset, 1024, 65):
+        for x in columns(-20+offset, w, 65, tile):
             c = rng.randint(35,55)
-            draw.rectangle([x,y,x+60,y+30], fill=(c+10, c-5, c-5))
-            draw.rectangle([x,y,x+60,y+30], outline=(c-10,c-15,c-15), width=1)
+            draw.rectangle([x,y,x+brick,y+30], fill=(c+10, c-5, c-5))
+            draw.rectangle([x,y,x+brick,y+30], outline=(c-10,c-15,c-15), width=1)
     # Torches
-    for tx in [150, 400, 650, 900]:
+    lights = LightBuffer()
+    draw = pen(layers["near"])
+    for tx in columns(150, w, 250, tile):
         # Bracket
         draw.rectangle([tx-3, 180, tx+3, 230], fill=(80,60,30))
         draw.rectangle([tx-8, 175, tx+8, 185], fill=(90,70,35))
@@ -222,56 +546,47 @@ def gen_bgFortress():
             fc = lerp_color((255,60,0), (255,200,50), 1-fr/25)
             draw.ellipse([tx-fr//2, 150-fr, tx+fr//2, 155], fill=fc)
         # Glow
-        glow = Image.new("RGBA", (1024,576), (0,0,0,0))
-        gd = ImageDraw.Draw(glow)
-        for gr in range(80, 5, -5):
-            a = int(20*(1-gr/80))
-            gd.ellipse([tx-gr, 155-gr, tx+gr, 155+gr], fill=(255,100,20,a))
-        img = Image.alpha_composite(img.convert("RGBA"), glow)
-        draw = ImageDraw.Draw(img)
+        lights.add(tx, 155, 80, pal["torch"], 20, inner=10)
+    layers["sky"] = lights.composite(img)
+    draw = pen(layers["near"])
     # Chains
-    for cx in [250, 550, 800]:
+    for cx in [x * w // 1024 for x in (250, 550, 800)]:
         for cy in range(0, 400, 15):
             draw.ellipse([cx-3,cy,cx+3,cy+12], outline=(100,100,110), width=2)
     # Red glow from floor
-    glow = Image.new("RGBA", (1024,576), (0,0,0,0))
-    gd = ImageDraw.Draw(glow)
-    for y in range(500, 576):
-        t = (y-500)/76
-        a = int(50*t)
-        gd.line([(0,y),(1024,y)], fill=(255,30,0,a))
-    img = Image.alpha_composite(img.convert("RGBA"), glow)
-    img = img.convert("RGB")
-    img.save(os.path.join(OUT, "bgFortress.png"))
-    print("✓ bgFortress")
+    layers["fg"] = composite_ramp(layers["fg"], 500, 576, pal["floor_glow"], 50)
+    return layers.result("RGB")
 
 # ===== PORTRAITS =====
 
-def draw_circle_bg(draw, w, h, color, accent):
-    gradient_rect(draw, 0, 0, w, h, color, lerp_color(color, (0,0,0), 0.4))
+def draw_circle_bg(img, color, accent):
+    w, h = logical_size(img)
+    gradient_rect(img, 0, 0, w, h, color, lerp_color(color, (0,0,0), 0.4))
     # Radial highlight
-    cx, cy = w//2, h//2
-    for r in range(min(w,h)//2, 10, -3):
-        a = int(30 * (1 - r/(min(w,h)//2)))
-        draw.ellipse([cx-r, cy-r, cx+r, cy+r], fill=(*accent, a))
-
-def gen_portraitDarkwing():
-    img = Image.new("RGBA", (256, 256))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, 256, 256, (50, 20, 80), (123, 47, 247))
+    lights = LightBuffer()
+    lights.add(w//2, h//2, min(w,h)//2, accent, 30, inner=11)
+    lights.composite(img)
+
+@asset("portraitDarkwing", (256, 256), "portraits", palette={"bg": (50, 20, 80), "accent": (123, 47, 247),
+    "suit": (123, 47, 247), "cape": (100,30,160)})
+def render_portraitDarkwing(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("portraitDarkwing", size, palette)
+    img = canvas("RGBA", (256, 256), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
     cx, cy = 128, 140
     # Cape
-    draw.polygon([(cx-50,cy-20),(cx-80,cy+90),(cx+80,cy+90),(cx+50,cy-20)], fill=(100,30,160))
+    draw.polygon([(cx-50,cy-20),(cx-80,cy+90),(cx+80,cy+90),(cx+50,cy-20)], fill=pal["cape"])
     # Body
-    draw.rounded_rectangle([cx-30, cy-10, cx+30, cy+60], radius=8, fill=(123, 47, 247))
+    draw.rounded_rectangle([cx-30, cy-10, cx+30, cy+60], radius=8, fill=pal["suit"])
     # Head
     draw.ellipse([cx-35, cy-70, cx+35, cy-10], fill=(245, 222, 179))
     # Hat brim
-    draw.ellipse([cx-45, cy-58, cx+45, cy-38], fill=(123, 47, 247))
+    draw.ellipse([cx-45, cy-58, cx+45, cy-38], fill=pal["suit"])
     # Hat top
-    draw.rounded_rectangle([cx-18, cy-85, cx+18, cy-50], radius=5, fill=(123, 47, 247))
+    draw.rounded_rectangle([cx-18, cy-85, cx+18, cy-50], radius=5, fill=pal["suit"])
     # Mask
-    draw.rectangle([cx-38, cy-52, cx+38, cy-38], fill=(123, 47, 247))
+    draw.rectangle([cx-38, cy-52, cx+38, cy-38], fill=pal["suit"])
     # Eyes
     draw.ellipse([cx-18, cy-52, cx-6, cy-38], fill="white")
     draw.ellipse([cx+6, cy-52, cx+18, cy-38], fill="white")
@@ -284,18 +599,19 @@ def gen_portraitDarkwing():
     draw.rectangle([cx+60, cy, cx+70, cy+20], fill=(170,170,170))
     # Confident smirk on bill
     draw.arc([cx-8, cy-30, cx+15, cy-22], 0, 180, fill=(200,130,70), width=2)
-    img.save(os.path.join(OUT, "portraitDarkwing.png"))
-    print("✓ portraitDarkwing")
-
-def gen_villain_portrait(name, size, bg_color, accent, draw_fn):
-    img = Image.new("RGBA", (size, size))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, size, size, bg_color, accent)
-    draw_fn(draw, size//2, int(size*0.55), size)
-    img.save(os.path.join(OUT, f"portrait{name}.png"))
-    print(f"✓ portrait{name}")
-
-def draw_megavolt(draw, cx, cy, s):
+    return img
+
+def render_villain_portrait(name, draw_fn, size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare(name, size, palette)
+    s = ASSETS[name].size[0]
+    img = canvas("RGBA", (s, s), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
+    draw_fn(draw, s//2, int(s*0.55), s, seeded(seed, DEFAULT_SEED))
+    return img
+
+@villain("Megavolt", (60,50,10), (255,238,68))
+def draw_megavolt(draw, cx, cy, s, rng):
     # Body - yellow jumpsuit
     draw.rounded_rectangle([cx-30,cy-10,cx+30,cy+55], radius=6, fill=(255,220,0))
     # Battery pack
@@ -316,7 +632,8 @@ def draw_megavolt(draw, cx, cy, s):
     draw.rectangle([cx-18,cy+50,cx-8,cy+75], fill=(220,190,0))
     draw.rectangle([cx+8,cy+50,cx+18,cy+75], fill=(220,190,0))
 
-def draw_quackerjack(draw, cx, cy, s):
+@villain("Quackerjack", (60,15,40), (255,68,170))
+def draw_quackerjack(draw, cx, cy, s, rng):
     # Body
     draw.rounded_rectangle([cx-28,cy-10,cx+28,cy+50], radius=6, fill=(255,68,170))
     # Buttons
@@ -339,7 +656,8 @@ def draw_quackerjack(draw, cx, cy, s):
     # Bill
     draw.ellipse([cx-15,cy-30,cx+20,cy-18], fill=(244,164,96))
 
-def draw_bushroot(draw, cx, cy, s):
+@villain("Bushroot", (15,50,15), (68,187,68))
+def draw_bushroot(draw, cx, cy, s, rng):
     # Body - plant-like
     draw.polygon([(cx-25,cy+60),(cx+25,cy+60),(cx+20,cy-15),(cx+10,cy-40),(cx,cy-45),(cx-10,cy-40),(cx-20,cy-15)], fill=(50,135,50))
     # Leaves on head
@@ -356,9 +674,10 @@ def draw_bushroot(draw, cx, cy, s):
     draw.ellipse([cx+7,cy-36,cx+11,cy-30], fill=(180,0,0))
     # Roots at bottom
     for rx in range(-25,26,10):
-        draw.line([(cx+rx,cy+60),(cx+rx+random.randint(-8,8),cy+80)], fill=(80,60,30), width=3)
+        draw.line([(cx+rx,cy+60),(cx+rx+rng.randint(-8,8),cy+80)], fill=(80,60,30), width=3)
 
-def draw_liquidator(draw, cx, cy, s):
+@villain("Liquidator", (10,30,60), (68,170,255))
+def draw_liquidator(draw, cx, cy, s, rng):
     # Watery body - translucent blue
     body_color = (68, 170, 255)
     # Body shape - wavy
@@ -381,10 +700,11 @@ def draw_liquidator(draw, cx, cy, s):
     draw.arc([cx-15,cy-28,cx+15,cy-15], 0, 180, fill=(0,80,150), width=2)
     # Water drips
     for dx in [-20, -5, 15, 25]:
-        dy = random.randint(40, 70)
+        dy = rng.randint(40, 70)
         draw.ellipse([cx+dx-2,cy+dy,cx+dx+2,cy+dy+8], fill=(100,190,255))
 
-def draw_negaduck(draw, cx, cy, s):
+@villain("Negaduck", (50,10,10), (255,34,68))
+def draw_negaduck(draw, cx, cy, s, rng):
     # Red cape
     draw.polygon([(cx-45,cy-15),(cx-55,cy+80),(cx+55,cy+80),(cx+45,cy-15)], fill=(140,0,0))
     # Body - red/yellow
@@ -418,10 +738,12 @@ def draw_negaduck(draw, cx, cy, s):
 
 # ===== ALLY PORTRAITS (128x128) =====
 
-def gen_portraitLaunchpad():
-    img = Image.new("RGBA", (128,128))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, 128, 128, (60,30,15), (255,100,50))
+@asset("portraitLaunchpad", (128, 128), "portraits", palette={"bg": (60,30,15), "accent": (255,100,50)})
+def render_portraitLaunchpad(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("portraitLaunchpad", size, palette)
+    img = canvas("RGBA", (128, 128), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
     cx, cy = 64, 72
     # Body - brown jacket
     draw.rounded_rectangle([cx-22,cy-5,cx+22,cy+35], radius=5, fill=(140,90,40))
@@ -441,13 +763,14 @@ def gen_portraitLaunchpad():
     # Big bill with goofy grin
     draw.ellipse([cx-15,cy-20,cx+18,cy-6], fill=(244,164,96))
     draw.arc([cx-10,cy-14,cx+12,cy-4], 0, 180, fill=(200,130,70), width=2)
-    img.save(os.path.join(OUT, "portraitLaunchpad.png"))
-    print("✓ portraitLaunchpad")
+    return img
 
-def gen_portraitGosalyn():
-    img = Image.new("RGBA", (128,128))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, 128, 128, (50,20,60), (200,50,150))
+@asset("portraitGosalyn", (128, 128), "portraits", palette={"bg": (50,20,60), "accent": (200,50,150)})
+def render_portraitGosalyn(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("portraitGosalyn", size, palette)
+    img = canvas("RGBA", (128, 128), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
     cx, cy = 64, 72
     # Body - purple
     draw.rounded_rectangle([cx-18,cy-5,cx+18,cy+30], radius=4, fill=(140,50,160))
@@ -468,13 +791,14 @@ def gen_portraitGosalyn():
     draw.ellipse([cx-10,cy-22,cx+12,cy-12], fill=(244,164,96))
     # Determined expression
     draw.arc([cx-6,cy-16,cx+8,cy-10], 0, 180, fill=(200,130,70), width=2)
-    img.save(os.path.join(OUT, "portraitGosalyn.png"))
-    print("✓ portraitGosalyn")
+    return img
 
-def gen_portraitMorgana():
-    img = Image.new("RGBA", (128,128))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, 128, 128, (40,15,50), (180,60,255))
+@asset("portraitMorgana", (128, 128), "portraits", palette={"bg": (40,15,50), "accent": (180,60,255)})
+def render_portraitMorgana(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("portraitMorgana", size, palette)
+    img = canvas("RGBA", (128, 128), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
     cx, cy = 64, 72
     # Dark elegant dress
     draw.polygon([(cx-25,cy),(cx-35,cy+45),(cx+35,cy+45),(cx+25,cy)], fill=(60,20,80))
@@ -496,13 +820,14 @@ def gen_portraitMorgana():
         ax = cx + int(30*math.cos(i*math.pi/4))
         ay = cy - 20 + int(25*math.sin(i*math.pi/4))
         draw.ellipse([ax-2,ay-2,ax+2,ay+2], fill=(180,100,255))
-    img.save(os.path.join(OUT, "portraitMorgana.png"))
-    print("✓ portraitMorgana")
+    return img
 
-def gen_portraitGizmoduck():
-    img = Image.new("RGBA", (128,128))
-    draw = ImageDraw.Draw(img)
-    draw_circle_bg(draw, 128, 128, (30,40,60), (100,150,220))
+@asset("portraitGizmoduck", (128, 128), "portraits", palette={"bg": (30,40,60), "accent": (100,150,220)})
+def render_portraitGizmoduck(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("portraitGizmoduck", size, palette)
+    img = canvas("RGBA", (128, 128), scale)
+    draw = pen(img)
+    draw_circle_bg(img, pal["bg"], pal["accent"])
     cx, cy = 64, 72
     # Armor body - rounded
     draw.rounded_rectangle([cx-25,cy-10,cx+25,cy+30], radius=10, fill=(180,190,200))
@@ -520,21 +845,23 @@ def gen_portraitGizmoduck():
     # Arm cannons
     draw.rounded_rectangle([cx-38,cy-5,cx-22,cy+15], radius=3, fill=(160,170,180))
     draw.rounded_rectangle([cx+22,cy-5,cx+38,cy+15], radius=3, fill=(160,170,180))
-    img.save(os.path.join(OUT, "portraitGizmoduck.png"))
-    print("✓ portraitGizmoduck")
+    return img
 
 # ===== GAME OVER / VICTORY =====
 
-def gen_gameOver():
-    img = Image.new("RGB", (800, 450))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, 800, 450, (20, 5, 10), (40, 10, 20))
+@asset("gameOver", (800, 450), "screens", palette={"sky_top": (20, 5, 10), "sky_bot": (40, 10, 20),
+    "rain": (60,60,80), "tint": (80,20,40,40)})
+def render_gameOver(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("gameOver", size, palette)
+    img = canvas("RGB", (800, 450), scale)
+    draw = pen(img)
+    gradient_rect(img, 0, 0, 800, 450, pal["sky_top"], pal["sky_bot"])
     # Rain
-    rng = random.Random(99)
+    rng = seeded(seed, 99)
     for _ in range(200):
         rx, ry = rng.randint(0,800), rng.randint(0,450)
         rl = rng.randint(5,15)
-        draw.line([(rx,ry),(rx-2,ry+rl)], fill=(60,60,80), width=1)
+        draw.line([(rx,ry),(rx-2,ry+rl)], fill=pal["rain"], width=1)
     # City silhouette
     for i in range(0, 800, 50):
         bh = rng.randint(60,180)
@@ -547,23 +874,26 @@ def gen_gameOver():
     draw.rectangle([cx-30,cy+25,cx-10,cy+55], fill=(10,3,5))  # leg
     draw.rectangle([cx+5,cy+15,cx+35,cy+55], fill=(10,3,5))  # leg
     # Purple tint
-    overlay = Image.new("RGBA", (800,450), (80,20,40,40))
-    img = Image.alpha_composite(img.convert("RGBA"), overlay)
-    img.save(os.path.join(OUT, "gameOver.png"))
-    print("✓ gameOver")
-
-def gen_victory():
-    img = Image.new("RGB", (800, 450))
-    draw = ImageDraw.Draw(img)
-    gradient_rect(draw, 0, 0, 800, 450, (10, 10, 40), (20, 15, 50))
+    overlay = Overlay()
+    overlay.fill(pal["tint"])
+    return overlay.flatten(img)
+
+@asset("victory", (800, 450), "screens", palette={"sky_top": (10, 10, 40), "sky_bot": (20, 15, 50),
+    "fireworks": [(255,50,50),(50,255,50),(50,50,255),(255,255,50),(255,50,255),(50,255,255)],
+    "glow": (255,200,50)})
+def render_victory(size=None, seed=DEFAULT_SEED, palette=None):
+    scale, pal = prepare("victory", size, palette)
+    img = canvas("RGB", (800, 450), scale)
+    draw = pen(img)
+    gradient_rect(img, 0, 0, 800, 450, pal["sky_top"], pal["sky_bot"])
     # City
-    rng = random.Random(88)
-    for i in range(0, 800, 55):
-        bh = rng.randint(80,200)
+    rng = seeded(seed, 88)
+    def grey(rng):
         c = rng.randint(20,40)
-        draw_building(draw, i, 450-bh, 50, bh, (c,c,c+15), (255,220,80,120), rng)
+        return (c, c, c+15)
+    draw_city(draw, city_row(rng, range(0, 800, 55), 450, 50, (80,200), grey), 450, (255,220,80,120))
     # Fireworks
-    fw_colors = [(255,50,50),(50,255,50),(50,50,255),(255,255,50),(255,50,255),(50,255,255)]
+    fw_colors = pal["fireworks"]
     for i in range(8):
         fx, fy = rng.randint(50,750), rng.randint(30,200)
         fc = fw_colors[i%len(fw_colors)]
@@ -575,45 +905,1175 @@ def gen_victory():
             draw.line([(fx,fy),(ex,ey)], fill=fc, width=2)
             draw.ellipse([ex-2,ey-2,ex+2,ey+2], fill=(255,255,200))
     # Golden glow
-    overlay = Image.new("RGBA", (800,450), (0,0,0,0))
-    od = ImageDraw.Draw(overlay)
-    for r in range(200, 10, -5):
-        a = int(15*(1-r/200))
-        od.ellipse([400-r,200-r,400+r,200+r], fill=(255,200,50,a))
-    img = Image.alpha_composite(img.convert("RGBA"), overlay)
-    img.save(os.path.join(OUT, "victory.png"))
-    print("✓ victory")
+    overlay = Overlay()
+    overlay.light(400, 200, 200, pal["glow"], 15, inner=15)
+    return overlay.flatten(img)
+
+# ===== SPRITES =====
+# Ports of drawDarkwing, drawEnemy and drawBoss in index.html: a canvas
+# fillRect(x, y, w, h) is the inclusive box [x, y, x+w-1, y+h-1], an arc or
+# ellipse of radius r around c spans c-r..c+r-1.
+
+def sprite_poses(name):
+    """(frame key, pose) of every frame of a sprite: ('drone.anim3.flash1', {"anim": 3, "flash": 1})."""
+    s = SPRITES[name]
+    for values in itertools.product(*(range(n) for n in s.axes.values())):
+        pose = dict(zip(s.axes, values))
+        yield name + "".join(f".{axis}{v}" for axis, v in pose.items()), pose
+
+def render_sprite(name, pose, scale=1):
+    """One frame of a sprite at `scale`, with its anchor (-x0, -y0) logical pixels from the top-left."""
+    s = SPRITES[name]
+    x0, y0, x1, y1 = s.box
+    img = canvas("RGBA", (x1 - x0, y1 - y0), scale * SPRITE_SUPERSAMPLE)
+    if "anim" in pose:
+        pose = {**pose, "anim": pose["anim"] / s.axes["anim"]}
+    s.fn(pen(img), -x0, -y0, **pose)
+    # premultiplied, so the transparent surroundings do not darken the edges
+    return img.convert("RGBa").reduce(SPRITE_SUPERSAMPLE).convert("RGBA")
+
+@functools.lru_cache(maxsize=None)
+def sprite_layout():
+    """Frame keys, logical sizes and anchors of every sprite pose, and their packing: shared by all scales."""
+    keys, sizes, anchors = [], [], []
+    for name, s in SPRITES.items():
+        x0, y0, x1, y1 = s.box
+        for key, _ in sprite_poses(name):
+            keys.append(key)
+            sizes.append((x1 - x0, y1 - y0))
+            anchors.append((-x0, -y0))
+    bin_w, bin_h, positions = pack_frames(sizes, ATLAS_PADDING)
+    return keys, sizes, anchors, (bin_w, bin_h), positions
+
+def render_sprites(scale=1):
+    """The sprite sheet at `scale`, laid out as sprite_layout() says."""
+    _, sizes, _, bin_size, positions = sprite_layout()
+    images = [render_sprite(name, pose, scale) for name in SPRITES for _, pose in sprite_poses(name)]
+    return render_atlas(images, sizes, positions, bin_size, ATLAS_PADDING, scale)
+
+def flash_of(flash):
+    """Colour picker of the old `flash?'#fff':color` fills: white on a hit-flash frame."""
+    return (lambda color: (255, 255, 255)) if flash else (lambda color: color)
+
+def quad_curve(p0, ctrl, p1, steps=10):
+    """Points of the quadratic Bézier p0 -> p1 (ctx.quadraticCurveTo), without p0."""
+    return [((1-t)**2 * p0[0] + 2*(1-t)*t * ctrl[0] + t*t * p1[0],
+             (1-t)**2 * p0[1] + 2*(1-t)*t * ctrl[1] + t*t * p1[1])
+            for t in (i / steps for i in range(1, steps + 1))]
+
+def ellipse_points(cx, cy, rx, ry, angle=0, steps=32):
+    """Outline of an ellipse rotated by `angle` radians (ctx.ellipse with a rotation)."""
+    ca, sa = math.cos(angle), math.sin(angle)
+    return [(cx + rx*math.cos(t)*ca - ry*math.sin(t)*sa, cy + rx*math.cos(t)*sa + ry*math.sin(t)*ca)
+            for t in (2 * math.pi * i / steps for i in range(steps))]
+
+@sprite("darkwing", (-24, -32, 38, 32), period=20, anim=10, shoot=2, flash=2)
+def draw_sprite_darkwing(draw, cx, cy, anim, shoot, flash):
+    c = flash_of(flash)
+    frame = anim * 20  # animFrame ticks
+    # Shadow
+    draw.ellipse([cx-16, cy+19, cx+15, cy+28], fill=(0, 0, 0, 77))
+    # Cape
+    cw = math.sin(frame*0.3) * 3
+    draw.polygon([(cx-8, cy-10), *quad_curve((cx-8, cy-10), (cx-22, cy+5+cw), (cx-18, cy+24)),
+                  (cx-5, cy+20), (cx-5, cy-5)], fill=c((106, 47, 160)))
+    # Body
+    draw.rectangle([cx-10, cy-5, cx+9, cy+19], fill=c((123, 47, 247)))
+    # Legs
+    la = math.sin(frame*0.4) * 6 * (1 if frame % 20 < 10 else -1)
+    draw.rectangle([cx-8, cy+18, cx-3, cy+25+la], fill=c((90, 31, 176)))
+    draw.rectangle([cx+2, cy+18, cx+7, cy+25-la], fill=c((90, 31, 176)))
+    # Head
+    draw.ellipse([cx-12, cy-24, cx+11, cy-5], fill=c((245, 222, 179)))
+    # Hat
+    draw.ellipse([cx-14, cy-27, cx+13, cy-18], fill=c((123, 47, 247)))
+    draw.rectangle([cx-6, cy-30, cx+5, cy-21], fill=c((123, 47, 247)))
+    # Mask
+    draw.rectangle([cx-12, cy-18, cx+11, cy-13], fill=c((123, 47, 247)))
+    # Eyes
+    draw.ellipse([cx-7, cy-17, cx-2, cy-12], fill="white")
+    draw.ellipse([cx+1, cy-17, cx+6, cy-12], fill="white")
+    draw.ellipse([cx-4.5, cy-15.5, cx-2.5, cy-13.5], fill="black")
+    draw.ellipse([cx+3.5, cy-15.5, cx+5.5, cy-13.5], fill="black")
+    # Bill
+    draw.ellipse([cx-6, cy-13, cx+9, cy-6], fill=c((244, 164, 96)))
+    # Gas gun, with the muzzle flash at the middle of its flicker
+    if shoot:
+        draw.rectangle([cx+10, cy-4, cx+27, cy], fill=(136, 136, 136))
+        draw.rectangle([cx+25, cy-6, cx+28, cy+2], fill=(170, 170, 170))
+        draw.ellipse([cx+22, cy-9, cx+37, cy+6], fill=(255, 136, 68))
+    else:
+        draw.rectangle([cx+8, cy-2, cx+21, cy+1], fill=(136, 136, 136))
+
+@sprite("shield", (-28, -32, 28, 32))
+def draw_sprite_shield(draw, cx, cy):
+    # Opaque: the game pulses it with globalAlpha
+    draw.ellipse([cx-26.5, cy-31.5, cx+25.5, cy+30.5], outline=(68, 136, 255), width=3)
+
+@sprite("goon", (-16, -32, 20, 18), flash=2)
+def draw_sprite_goon(draw, cx, cy, flash):
+    c = flash_of(flash)
+    draw.rectangle([cx-12, cy-18, cx+11, cy+17], fill=c((68, 68, 68)))
+    draw.rectangle([cx-14, cy-18, cx+13, cy-9], fill=c((102, 102, 102)))
+    draw.ellipse([cx-8, cy-30, cx+7, cy-15], fill=c((245, 222, 179)))
+    draw.rectangle([cx-10, cy-30, cx+9, cy-25], fill=c((51, 51, 51)))
+    # Gun
+    draw.rectangle([cx+10, cy-5, cx+19, cy-3], fill=(119, 119, 119))
+
+@sprite("drone", (-24, -14, 16, 10), period=2*math.pi/0.03, anim=8, flash=2)
+def draw_sprite_drone(draw, cx, cy, anim, flash):
+    c = flash_of(flash)
+    draw.ellipse([cx-15, cy-10, cx+14, cy+9], fill=c((136, 136, 136)))
+    draw.ellipse([cx+3, cy-5, cx+8, cy], fill=c((255, 68, 68)))
+    # Propeller, seen edge-on as it spins
+    k = abs(math.cos(anim * 2*math.pi)) * 10
+    if k >= 0.5:
+        draw.rectangle([cx-12-k, cy-13, cx-13+k, cy-12], fill=(170, 170, 170))
+
+@sprite("toySoldier", (-18, -28, 12, 16), flash=2)
+def draw_sprite_toySoldier(draw, cx, cy, flash):
+    c = flash_of(flash)
+    draw.rectangle([cx-10, cy-16, cx+9, cy+15], fill=c((238, 51, 68)))
+    draw.rectangle([cx-12, cy-16, cx+11, cy-9], fill=c((255, 204, 0)))
+    draw.ellipse([cx-7, cy-27, cx+6, cy-14], fill=c((245, 222, 179)))
+    # Rifle
+    draw.rectangle([cx-18, cy-5, cx-11, cy-3], fill=(204, 153, 0))
+
+@sprite("jackbox", (-16, -38, 16, 16), popped=2, flash=2)
+def draw_sprite_jackbox(draw, cx, cy, popped, flash):
+    c = flash_of(flash)
+    draw.rectangle([cx-14, cy-5, cx+13, cy+14], fill=c((255, 102, 170)))
+    draw.rectangle([cx-16, cy-5, cx+15, cy-1], fill=c((255, 170, 0)))
+    if popped:
+        draw.ellipse([cx-12, cy-37, cx+11, cy-14], fill=c((255, 68, 170)))
+        draw.ellipse([cx-6, cy-29, cx-3, cy-26], fill="black")
+        draw.ellipse([cx+2, cy-29, cx+5, cy-26], fill="black")
+
+@sprite("vine", (-12, -26, 12, 26), period=2*math.pi/0.003, anim=8, flash=2)
+def draw_sprite_vine(draw, cx, cy, anim, flash):
+    c = flash_of(flash)
+    sw = math.sin(anim * 2*math.pi) * 3
+    pts = [(cx-6, cy+25), (cx+6, cy+25)]
+    pts += quad_curve(pts[-1], (cx+8+sw, cy), (cx+4+sw, cy-20))
+    pts += quad_curve(pts[-1], (cx+sw, cy-28), (cx-4+sw, cy-20))
+    pts += quad_curve(pts[-1], (cx-8+sw, cy), (cx-6, cy+25))
+    draw.polygon(pts, fill=c((51, 136, 51)))
+    draw.ellipse([cx-6+sw, cy-18, cx-1+sw, cy-13], fill=c((255, 68, 68)))
+    draw.ellipse([cx+sw, cy-18, cx+5+sw, cy-13], fill=c((255, 68, 68)))
+
+@sprite("spore", (-14, -14, 14, 14), flash=2)
+def draw_sprite_spore(draw, cx, cy, flash):
+    c = flash_of(flash)
+    # Halo at 40% and core at 80% over it
+    draw.ellipse([cx-14, cy-14, cx+13, cy+13], fill=c((136, 204, 68)) + (102,))
+    draw.ellipse([cx-10, cy-10, cx+9, cy+9], fill=c((136, 204, 68)) + (224,))
+    draw.ellipse([cx-5, cy-4, cx-2, cy-1], fill=(68, 102, 34))
+    draw.ellipse([cx+1, cy-4, cx+4, cy-1], fill=(68, 102, 34))
+
+@sprite("bossMegavolt", (-44, -38, 44, 36), bolts=5, flash=2)
+def draw_sprite_megavolt(draw, cx, cy, bolts, flash):
+    c = flash_of(flash)
+    draw.rectangle([cx-20, cy-15, cx+19, cy+24], fill=c((255, 221, 0)))
+    # Battery packs
+    draw.rectangle([cx-25, cy-10, cx-16, cy+19], fill=c((136, 136, 136)))
+    draw.rectangle([cx+15, cy-10, cx+24, cy+19], fill=c((136, 136, 136)))
+    draw.ellipse([cx-14, cy-36, cx+13, cy-9], fill=c((245, 222, 179)))
+    # Goggles
+    draw.ellipse([cx-12, cy-29, cx-1, cy-20], fill=c((255, 68, 68)))
+    draw.ellipse([cx, cy-29, cx+11, cy-20], fill=c((255, 68, 68)))
+    # Crackling sparks: bolts 1..4 are the game's random picks, 0 is none (defeated)
+    if bolts:
+        rng = seeded(DEFAULT_SEED, bolts)
+        for _ in range(3):
+            px, py = -20 + rng.random()*40, -30 + rng.random()*20
+            pts = [(cx+px, cy+py)]
+            for _ in range(3):
+                px, py = px + (rng.random()-0.5)*15, py + rng.random()*10
+                pts.append((cx+px, cy+py))
+            draw.line(pts, fill=(255, 255, 0), width=2)
+    # Legs
+    draw.rectangle([cx-12, cy+22, cx-5, cy+35], fill=c((221, 187, 0)))
+    draw.rectangle([cx+4, cy+22, cx+11, cy+35], fill=c((221, 187, 0)))
+
+@sprite("bossQuackerjack", (-20, -50, 20, 28), period=2*math.pi/0.005, anim=6, flash=2)
+def draw_sprite_quackerjack(draw, cx, cy, anim, flash):
+    c = flash_of(flash)
+    draw.rectangle([cx-18, cy-10, cx+17, cy+27], fill=c((255, 68, 170)))
+    if not flash:
+        for i in range(5):
+            bx, by = cx - 10 + i*7, cy - 2 + (i % 2)*12
+            draw.ellipse([bx-3, by-3, bx+2, by+2], fill=(255, 170, 0))
+    draw.ellipse([cx-14, cy-32, cx+13, cy-5], fill=c((245, 222, 179)))
+    # Jester hat
+    draw.polygon([(cx-14, cy-28), *quad_curve((cx-14, cy-28), (cx-20, cy-50), (cx-10, cy-45)), (cx, cy-30)],
+                 fill=c((255, 68, 170)))
+    draw.polygon([(cx, cy-30), *quad_curve((cx, cy-30), (cx+20, cy-50), (cx+10, cy-45)), (cx+14, cy-28)],
+                 fill=c((255, 170, 0)))
+    draw.ellipse([cx-14, cy-49, cx-7, cy-42], fill=(255, 238, 0))
+    draw.ellipse([cx+6, cy-49, cx+13, cy-42], fill=(255, 238, 0))
+    # Rolling eyes
+    draw.ellipse([cx-10, cy-26, cx-1, cy-15], fill="white")
+    draw.ellipse([cx, cy-26, cx+9, cy-15], fill="white")
+    eo = math.sin(anim * 2*math.pi) * 2
+    draw.ellipse([cx-7.5+eo, cy-22.5, cx-3.5+eo, cy-18.5], fill="black")
+    draw.ellipse([cx+2.5+eo, cy-22.5, cx+6.5+eo, cy-18.5], fill="black")
+    # Bill
+    draw.ellipse([cx-8, cy-15, cx+11, cy-6], fill=c((244, 164, 96)))
+
+@sprite("bossBushroot", (-22, -44, 22, 30), flash=2)
+def draw_sprite_bushroot(draw, cx, cy, flash):
+    c = flash_of(flash)
+    pts = [(cx-15, cy+30), (cx+15, cy+30)]
+    for ctrl, end in (((20, 0), (15, -15)), ((10, -30), (0, -25)), ((-10, -30), (-15, -15)), ((-20, 0), (-15, 30))):
+        pts += quad_curve(pts[-1], (cx+ctrl[0], cy+ctrl[1]), (cx+end[0], cy+end[1]))
+    draw.polygon(pts, fill=c((51, 136, 51)))
+    # Leaves
+    for i in range(5):
+        a = -math.pi/2 + (i-2)*0.4
+        draw.polygon(ellipse_points(cx + math.cos(a)*12, cy - 25 + math.sin(a)*8, 10, 5, a), fill=c((68, 170, 68)))
+    draw.ellipse([cx-10, cy-19, cx-3, cy-12], fill=(255, 68, 68))
+    draw.ellipse([cx+2, cy-19, cx+9, cy-12], fill=(255, 68, 68))
+
+@sprite("bossLiquidator", (-20, -38, 20, 30), period=2*math.pi/0.008, anim=8, flash=2)
+def draw_sprite_liquidator(draw, cx, cy, anim, flash):
+    c = flash_of(flash)
+    alpha = lambda a: () if flash else (a,)
+    # Sloshing body
+    pts = [(cx-18, cy+30)] + [(cx-18+i, cy+30 - (36-abs(i-18))*1.8 + math.sin(anim*2*math.pi + i*0.3)*2)
+                              for i in range(37)]
+    draw.polygon(pts, fill=c((68, 170, 255)) + alpha(204))
+    draw.ellipse([cx-16, cy-34, cx+15, cy-3], fill=c((68, 170, 255)) + alpha(230))
+    draw.ellipse([cx-9, cy-25, cx-2, cy-16], fill="white")
+    draw.ellipse([cx+1, cy-25, cx+8, cy-16], fill="white")
+    draw.ellipse([cx-7, cy-22, cx-4, cy-19], fill=(0, 51, 102))
+    draw.ellipse([cx+3, cy-22, cx+6, cy-19], fill=(0, 51, 102))
+
+@sprite("bossNegaduck", (-30, -42, 42, 36), period=2*math.pi/0.005, anim=6, saw=2, flash=2)
+def draw_sprite_negaduck(draw, cx, cy, anim, saw, flash):
+    c = flash_of(flash)
+    # Billowing cape
+    nw = math.sin(anim * 2*math.pi) * 4
+    pts = [(cx-12, cy-15), *quad_curve((cx-12, cy-15), (cx-30, cy+5+nw), (cx-25, cy+35)), (cx+25, cy+35)]
+    pts += quad_curve(pts[-1], (cx+30, cy+5-nw), (cx+12, cy-15))
+    draw.polygon(pts, fill=c((136, 0, 0)))
+    # Body
+    draw.rectangle([cx-15, cy-8, cx+14, cy+26], fill=c((204, 34, 34)))
+    draw.rectangle([cx-15, cy-8, cx+14, cy+1], fill=c((255, 204, 0)))
+    draw.ellipse([cx-15, cy-33, cx+14, cy-4], fill=c((245, 222, 179)))
+    # Hat and mask
+    draw.ellipse([cx-17, cy-36, cx+16, cy-25], fill=c((204, 34, 34)))
+    draw.rectangle([cx-8, cy-40, cx+7, cy-29], fill=c((204, 34, 34)))
+    draw.rectangle([cx-16, cy-24, cx+15, cy-17], fill=c((204, 34, 34)))
+    draw.ellipse([cx-9, cy-22, cx-2, cy-15], fill="white")
+    draw.ellipse([cx+1, cy-22, cx+8, cy-15], fill="white")
+    draw.ellipse([cx-6, cy-20, cx-3, cy-17], fill=(255, 0, 0))
+    draw.ellipse([cx+4, cy-20, cx+7, cy-17], fill=(255, 0, 0))
+    # Bill
+    draw.ellipse([cx-8, cy-17, cx+11, cy-8], fill=c((244, 164, 96)))
+    # Legs
+    draw.rectangle([cx-10, cy+24, cx-3, cy+35], fill=c((170, 17, 17)))
+    draw.rectangle([cx+2, cy+24, cx+9, cy+35], fill=c((170, 17, 17)))
+    # Chainsaw, from phase 3
+    if saw:
+        draw.rectangle([cx+15, cy-8, cx+39, cy-3], fill=(136, 136, 136))
+        draw.rectangle([cx+35, cy-10, cx+40, cy-1], fill=(170, 170, 170))
+        for i in range(5):
+            draw.rectangle([cx+17+i*5, cy-10, cx+18+i*5, cy-8], fill=(204, 204, 204))
+            draw.rectangle([cx+17+i*5, cy, cx+18+i*5, cy+2], fill=(204, 204, 204))
+
+# ===== EFFECTS =====
+# Ports of the arcs of Particle.draw, drawPlaying's bullets and
+# drawBackground's embers and balloons, drawn like the sprites: an arc of
+# radius r around c spans c-r..c+r-1.
+
+def effect_frames():
+    """(frame key, effect, size) of every fx sheet frame: ('disc8', <disc>, 8)."""
+    return [(f"{e.name}{r}", e, r) for e in EFFECTS.values() for r in e.sizes]
+
+def render_effect(name, r, scale=1):
+    """One fx frame at `scale`, with its anchor (-x0, -y0) logical pixels from the top-left."""
+    e = EFFECTS[name]
+    x0, y0, x1, y1 = e.box(r)
+    img = canvas("RGBA", (x1 - x0, y1 - y0), scale * SPRITE_SUPERSAMPLE)
+    e.fn(pen(img), -x0, -y0, r)
+    return img.convert("RGBa").reduce(SPRITE_SUPERSAMPLE).convert("RGBA")
+
+@functools.lru_cache(maxsize=None)
+def effect_layout():
+    """Frame keys, logical sizes and anchors of every fx frame, and their packing: shared by all scales."""
+    keys, sizes, anchors = [], [], []
+    for key, e, r in effect_frames():
+        x0, y0, x1, y1 = e.box(r)
+        keys.append(key)
+        sizes.append((x1 - x0, y1 - y0))
+        anchors.append((-x0, -y0))
+    bin_w, bin_h, positions = pack_frames(sizes, ATLAS_PADDING)
+    return keys, sizes, anchors, (bin_w, bin_h), positions
+
+def render_effects(scale=1):
+    """The fx sheet at `scale`, laid out as effect_layout() says."""
+    _, sizes, _, bin_size, positions = effect_layout()
+    images = [render_effect(e.name, r, scale) for _, e, r in effect_frames()]
+    return render_atlas(images, sizes, positions, bin_size, ATLAS_PADDING, scale)
+
+# Particles (circle and smoke), enemy bullets, embers and balloons: 1.5 to 18 px
+@effect("disc", (2, 4, 8, 16, 32), lambda r: (-r-1, -r-1, r+1, r+1))
+def draw_fx_disc(draw, cx, cy, r):
+    draw.ellipse([cx-r, cy-r, cx+r-1, cy+r-1], fill=(255, 255, 255))
+
+# The player's bullet without its trail, in its own colours
+@effect("bolt", (4,), lambda r: (-r-1, -r-1, r+1, r+1))
+def draw_fx_bolt(draw, cx, cy, r):
+    draw.ellipse([cx-r, cy-r, cx+r-1, cy+r-1], fill=(196, 113, 245))
+    draw.ellipse([cx-r//2, cy-r//2, cx+r//2-1, cy+r//2-1], fill=(255, 255, 255))
+
+# ===== SOUNDS =====
+# Ports of playSound in index.html. Frequencies and gains follow its
+# AudioParam calls; `vol` there is SFX_VOLUME here.
+
+def synthesize(name, rate=SFX_RATE, seed=DEFAULT_SEED):
+    """One registered sound as float samples, deterministic for a seed."""
+    s = SOUNDS[name]
+    out = s.fn(rate, seed)
+    assert len(out) == round(s.duration * rate), name
+    return out
+
+def sfx_offsets(rate=SFX_RATE):
+    """{name: (first sample, sample count)} of each sound in the bank: back to back, SFX_GAP apart."""
+    offsets, at = {}, 0
+    for name, s in SOUNDS.items():
+        n = round(s.duration * rate)
+        offsets[name] = (at, n)
+        at += n + round(SFX_GAP * rate)
+    return offsets
+
+def render_sfx(rate=SFX_RATE, seed=DEFAULT_SEED):
+    """The whole bank as float samples, laid out as sfx_offsets() says."""
+    offsets = sfx_offsets(rate)
+    return np.concatenate([np.concatenate([synthesize(name, rate, seed), silence(rate, SFX_GAP)])
+                           for name in offsets])
+
+def tone(kind, rate, duration, freq, *freq_events):
+    """An oscillator whose frequency follows automation() events, fading from SFX_VOLUME to 0.01 as it stops."""
+    f = automation(rate, duration, freq, *freq_events)
+    return oscillator(kind, f, rate) * automation(rate, duration, SFX_VOLUME, ("exp", duration, 0.01))
+
+@sound("shoot", 0.12)
+def sound_shoot(rate, seed):
+    return tone("sawtooth", rate, 0.12, 800, ("exp", 0.1, 200))
+
+@sound("jump", 0.18)
+def sound_jump(rate, seed):
+    return tone("sine", rate, 0.18, 300, ("exp", 0.15, 600))
+
+@sound("hit", 0.25)
+def sound_hit(rate, seed):
+    return tone("square", rate, 0.25, 150, ("exp", 0.2, 50))
+
+@sound("explosion", 0.4)
+def sound_explosion(rate, seed):
+    # a fading noise burst, played at 60% volume
+    n = round(0.4 * rate)
+    burst = noise(np.random.default_rng(seed), n) * (1 - np.arange(n) / n)
+    return burst * automation(rate, 0.4, SFX_VOLUME * 0.6, ("exp", 0.4, 0.01))
+
+@sound("powerup", 0.3)
+def sound_powerup(rate, seed):
+    return tone("sine", rate, 0.3, 400, ("set", 0.05, 500), ("set", 0.1, 600), ("set", 0.15, 800))
+
+@sound("boss", 0.8)
+def sound_boss(rate, seed):
+    return tone("sawtooth", rate, 0.8, 80, ("set", 0.3, 60), ("set", 0.6, 100))
+
+@sound("death", 1.0)
+def sound_death(rate, seed):
+    return tone("sawtooth", rate, 1.0, 400, ("exp", 0.8, 30))
+
+@sound("select", 0.1)
+def sound_select(rate, seed):
+    return tone("sine", rate, 0.1, 500, ("set", 0.05, 700))
+
+@sound("bossDeath", 1.2)
+def sound_bossDeath(rate, seed):
+    return tone("square", rate, 1.2, 200, *(("set", i * 0.1, 200 + i*50) for i in range(8)))
 
 
 # ===== GENERATE ALL =====
-if __name__ == "__main__":
+
+def select(only=(), categories=(), scales=(), tile=None):
+    """Jobs for the named assets and/or categories (everything if neither is given).
+
+    Each asset expands to one (stem, asset name, scale, tile) job per render
+    scale, optionally limited to `scales`; `tile` applies to tileable assets only.
+    """
+    unknown = [n for n in only if n not in ASSETS]
+    if unknown:
+        sys.exit(f"unknown asset(s): {', '.join(unknown)} (see --list)")
+    return [(variant_name(a.name, sc), a.name, sc, tile if a.tileable else None) for a in ASSETS.values()
+            if (not only and not categories) or a.name in only or a.category in categories
+            for sc in a.scales if not scales or sc in scales]
+
+def job_inputs(job, encoding):
+    """job_key() arguments of one job: the renderer, what it is called with and the encoding."""
+    _, name, sc, tile = job
+    a = ASSETS[name]
+    return a.fn, a.args + (a.palette, DEFAULT_SEED, sc, tile, encoding)
+
+def run_job(job, encoding=DEFAULT_ENCODING, sink=None):
+    """Render one asset job into `sink` (assets/ by default); returns (name, (seconds, encoding stats))."""
+    name, asset_name, sc, tile = job
+    t0 = time.perf_counter()
+    img = render(asset_name, scale=sc, tile=tile)
+    stats = (sink or DirectorySink(OUT, encoding)).write(name, img)
+    print(f"✓ {name:<22} {describe(stats)}")
+    return name, (time.perf_counter() - t0, stats)
+
+def set_layer_cache(max_bytes):
+    LAYER_CACHE.max_bytes = max_bytes
+
+def worker_pool(workers):
+    """Process pool whose workers get this process's layer cache cap, whichever the start method:
+    under spawn or forkserver they import this module afresh, with the default."""
+    return ProcessPoolExecutor(max_workers=workers, initializer=set_layer_cache, initargs=(LAYER_CACHE.max_bytes,))
+
+def build(jobs, workers, encoding=DEFAULT_ENCODING):
+    """Run every job, serially or in a process pool. Returns {name: (seconds, encoding stats)}."""
+    run = functools.partial(run_job, encoding=encoding)
+    if workers <= 1:
+        return dict(run(job) for job in jobs)
+    with worker_pool(workers) as pool:
+        return dict(pool.map(run, jobs))
+
+def build_bundle(jobs, path, encoding=DEFAULT_ENCODING):
+    """Render the jobs straight into one archive, leaving assets/ alone; returns run_job results.
+
+    Renders happen in this process, one at a time, so only the archive is
+    ever open and nothing is staged on disk.
+    """
+    with BundleSink(path, encoding) as sink:
+        return dict(run_job(job, encoding, sink) for job in jobs)
+
+def run_variant(job, encoding=DEFAULT_ENCODING):
+    """Render one seeded variant into assets/variants/<name>/; returns (name, seed, encoding stats)."""
+    name, sc, seed, tile = job
+    img = render(name, seed=seed, scale=sc, tile=tile)
+    return name, seed, DirectorySink(os.path.join(VARIANTS, name), encoding).write(str(seed), img)
+
+def stream(fn, jobs, workers):
+    """Yield fn(job) for each job as it finishes, in any order.
+
+    At most two jobs per worker are in flight and results are handed on
+    as they arrive, so memory stays flat however many jobs there are.
+    """
+    if workers <= 1:
+        yield from map(fn, jobs)
+        return
+    jobs = iter(jobs)
+    with worker_pool(workers) as pool:
+        pending = {pool.submit(fn, job) for job in itertools.islice(jobs, 2 * workers)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            pending |= {pool.submit(fn, job) for job in itertools.islice(jobs, len(done))}
+            for future in done:
+                yield future.result()
+
+def build_variants(names, seeds, sc, workers, encoding=DEFAULT_ENCODING, force=False, tile=None):
+    """Render every seed of the named assets and index them in variants.json; returns the encoding stats.
+
+    Seeds already on disk and rendered by the same code, palette, scale, tile
+    and encoding are kept; when any of those change, the asset's variants start over.
+    """
+    index = {}
+    if os.path.exists(VARIANTS_INDEX):
+        with open(VARIANTS_INDEX) as f:
+            index = json.load(f)
+    jobs = []
+    for name in names:
+        a = ASSETS[name]
+        t = tile if a.tileable else None
+        key = job_key(a.fn, a.args + (a.palette, sc, t, encoding), extra_roots=(run_variant,))
+        entry = index.get(name)
+        if entry is None or entry["key"] != key:
+            entry = index[name] = {"key": key, "scale": sc, "w": round(logical_width(name, t) * sc),
+                                   "h": round(a.size[1] * sc), **({"tile": True} if t else {}), "seeds": {}}
+        jobs += [(name, sc, seed, t) for seed in seeds
+                 if force or str(seed) not in entry["seeds"]
+                 or not os.path.exists(os.path.join(OUT, entry["seeds"][str(seed)]["file"]))]
+    stats = []
+    every = max(1, len(jobs) // 20)
+    try:
+        for name, seed, st in stream(functools.partial(run_variant, encoding=encoding), jobs, workers):
+            index[name]["seeds"][str(seed)] = {"file": f"variants/{name}/{seed}.png",
+                                              "formats": sorted((f for f in FORMATS if f in st), key=st.get)}
+            stats.append(st)
+            if len(stats) % every == 0 or len(stats) == len(jobs):
+                print(f"  {len(stats)}/{len(jobs)} variant(s), last {name} seed {seed}: {describe(st)}")
+    finally:
+        # also on Ctrl-C, so a long run resumes where it stopped
+        for entry in index.values():
+            entry["seeds"] = dict(sorted(entry["seeds"].items(), key=lambda kv: int(kv[0])))
+        os.makedirs(VARIANTS, exist_ok=True)
+        write_json(VARIANTS_INDEX, index, indent=None)
+    return stats
+
+def output_path(name):
+    return os.path.join(OUT, f"{name}.png")
+
+def sibling_path(name, fmt):
+    return os.path.join(OUT, f"{name}.{fmt}")
+
+def outputs(name):
+    """Files one job wrote: its PNG and whichever siblings came out smaller."""
+    return [output_path(name)] + [sibling_path(name, f) for f in FORMATS if os.path.exists(sibling_path(name, f))]
+
+def formats_on_disk(name):
+    """Siblings of one variant, smallest first: the order the game tries them in."""
+    return sorted((f for f in FORMATS if os.path.exists(sibling_path(name, f))),
+                  key=lambda f: os.path.getsize(sibling_path(name, f)))
+
+def sibling_errors(max_error):
+    """(path, error) for every sibling in assets/ whose visible_error against its PNG exceeds max_error."""
+    found = []
+    for folder, _, files in os.walk(OUT):
+        for fname in sorted(files):
+            stem, ext = os.path.splitext(os.path.join(folder, fname))
+            if ext[1:] not in FORMATS or not os.path.exists(stem + ".png"):
+                continue
+            with Image.open(stem + ".png") as png, Image.open(stem + ext) as sibling:
+                err = visible_error(png, sibling)
+            if err > max_error:
+                found.append((os.path.relpath(stem + ext, OUT), err))
+    return found
+
+def write_json(path, data, indent=1):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.write("\n")
+    os.replace(tmp, path)
+
+def pack_atlas(manifest, encoding=DEFAULT_ENCODING, force=False):
+    """Pack the portraits into one atlas per render scale and write portraits.json.
+
+    A scale is packed only when every portrait has been built at it; the
+    layout is computed once in logical pixels and shared by all scales.
+    Returns {atlas variant: (seconds, encoding stats)} for the atlases that were rebuilt.
+    """
+    members = [a for a in ASSETS.values() if a.category == "portraits"]
+    sizes = [a.size for a in members]
+    bin_w, bin_h, positions = pack_frames(sizes, ATLAS_PADDING)
+    results, variants = {}, []
+    for sc in SCALES:
+        inputs = [output_path(variant_name(a.name, sc)) for a in members]
+        out = variant_name(ATLAS, sc)
+        if not all(os.path.exists(p) for p in inputs):
+            continue
+        key = job_key(render_atlas, ([file_hash(p) for p in inputs], sizes, positions, (bin_w, bin_h),
+            ATLAS_PADDING, sc, encoding), extra_roots=(pack_frames, DirectorySink))
+        if force or not manifest.is_fresh(out, key, OUT):
+            t0 = time.perf_counter()
+            images = [Image.open(p) for p in inputs]
+            img = render_atlas(images, sizes, positions, (bin_w, bin_h), ATLAS_PADDING, sc)
+            stats = DirectorySink(OUT, encoding).write(out, img)
+            manifest.record(out, key, outputs(out))
+            results[out] = (time.perf_counter() - t0, stats)
+            print(f"✓ {out:<22} {describe(stats)} ({len(members)} frames)")
+        variants.append({"scale": sc, "file": f"{out}.png", "w": round(bin_w * sc), "h": round(bin_h * sc),
+                         "formats": formats_on_disk(out)})
+    if not variants:
+        if os.path.exists(ATLAS_INDEX):
+            os.remove(ATLAS_INDEX)
+        return results
+    frames = {a.name: {"x": x, "y": y, "w": a.size[0], "h": a.size[1]}
+              for a, (x, y) in zip(members, positions)}
+    write_json(ATLAS_INDEX, {"w": bin_w, "h": bin_h, "padding": ATLAS_PADDING,
+                             "frames": frames, "variants": variants})
+    return results
+
+def build_sprites(manifest, encoding=DEFAULT_ENCODING, force=False):
+    """Render the sprite sheet at every render scale and write sprites.json.
+
+    Each frame's x, y, w, h are in logical pixels of the sheet, and ox, oy
+    is where in the frame the character's position goes. Per sprite, the
+    index lists its pose axes in frame key order and the period of its loop.
+    Returns {sheet variant: (seconds, encoding stats)} for the sheets that were rebuilt.
+    """
+    keys, sizes, anchors, (bin_w, bin_h), positions = sprite_layout()
+    sprites = tuple((s.name, s.box, s.axes, s.period) for s in SPRITES.values())
+    results, variants = {}, []
+    for sc in SCALES:
+        out = variant_name(SPRITE_SHEET, sc)
+        key = job_key(render_sprites, (sprites, sc, encoding),
+                      extra_roots=(pack_frames, DirectorySink, *(s.fn for s in SPRITES.values())))
+        if force or not manifest.is_fresh(out, key, OUT):
+            t0 = time.perf_counter()
+            stats = DirectorySink(OUT, encoding).write(out, render_sprites(sc))
+            manifest.record(out, key, outputs(out))
+            results[out] = (time.perf_counter() - t0, stats)
+            print(f"✓ {out:<22} {describe(stats)} ({len(keys)} frames)")
+        variants.append({"scale": sc, "file": f"{out}.png", "w": round(bin_w * sc), "h": round(bin_h * sc),
+                         "formats": formats_on_disk(out)})
+    frames = {k: {"x": x, "y": y, "w": w, "h": h, "ox": ox, "oy": oy}
+              for k, (w, h), (ox, oy), (x, y) in zip(keys, sizes, anchors, positions)}
+    write_json(SPRITE_INDEX, {"w": bin_w, "h": bin_h, "padding": ATLAS_PADDING,
+                              "sprites": {s.name: {"axes": s.axes, **({"period": round(s.period, 1)} if s.period else {})}
+                                          for s in SPRITES.values()},
+                              "frames": frames, "variants": variants}, indent=None)
+    return results
+
+def build_effects(manifest, encoding=DEFAULT_ENCODING, force=False):
+    """Render the fx sheet at every render scale and write fx.json.
+
+    Each frame's x, y, w, h are in logical pixels of the sheet, ox, oy is
+    where in the frame the shape's centre goes and r the size it was drawn
+    at. Per effect, the index lists its sizes, smallest first.
+    Returns {sheet variant: (seconds, encoding stats)} for the sheets that were rebuilt.
+    """
+    keys, sizes, anchors, (bin_w, bin_h), positions = effect_layout()
+    effects = tuple((e.name, e.sizes, tuple(e.box(r) for r in e.sizes)) for e in EFFECTS.values())
+    results, variants = {}, []
+    for sc in SCALES:
+        out = variant_name(FX_SHEET, sc)
+        key = job_key(render_effects, (effects, sc, encoding),
+                      extra_roots=(pack_frames, DirectorySink, *(e.fn for e in EFFECTS.values())))
+        if force or not manifest.is_fresh(out, key, OUT):
+            t0 = time.perf_counter()
+            stats = DirectorySink(OUT, encoding).write(out, render_effects(sc))
+            manifest.record(out, key, outputs(out))
+            results[out] = (time.perf_counter() - t0, stats)
+            print(f"✓ {out:<22} {describe(stats)} ({len(keys)} frames)")
+        variants.append({"scale": sc, "file": f"{out}.png", "w": round(bin_w * sc), "h": round(bin_h * sc),
+                         "formats": formats_on_disk(out)})
+    frames = {k: {"x": x, "y": y, "w": w, "h": h, "ox": ox, "oy": oy, "r": r}
+              for k, (w, h), (ox, oy), (x, y), (_, _, r) in zip(keys, sizes, anchors, positions, effect_frames())}
+    write_json(FX_INDEX, {"w": bin_w, "h": bin_h, "padding": ATLAS_PADDING,
+                          "effects": {e.name: list(e.sizes) for e in EFFECTS.values()},
+                          "frames": frames, "variants": variants}, indent=None)
+    return results
+
+def build_sounds(manifest, force=False):
+    """Synthesize the sound bank into assets/sfx.wav and write sfx.json.
+
+    sfx.json has each sound's start and duration in the file, in seconds,
+    and the volume the clips are at. Returns {"sfx": (seconds, None)} when rebuilt.
+    """
+    path = os.path.join(OUT, f"{SFX}.wav")
+    key = job_key(render_sfx, (tuple((s.name, s.duration) for s in SOUNDS.values()), SFX_RATE, SFX_GAP,
+                               SFX_VOLUME, DEFAULT_SEED), extra_roots=(wav_bytes, *(s.fn for s in SOUNDS.values())))
+    results = {}
+    if force or not manifest.is_fresh(SFX, key, OUT):
+        t0 = time.perf_counter()
+        samples = render_sfx()
+        data = wav_bytes(samples, SFX_RATE)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        manifest.record(SFX, key, [path])
+        results[SFX] = (time.perf_counter() - t0, None)
+        print(f"✓ {SFX:<22} {len(data)/1024:.1f} KB ({len(SOUNDS)} sounds, {len(samples)/SFX_RATE:.2f}s)")
+    write_json(SFX_INDEX, {"file": os.path.basename(path), "volume": SFX_VOLUME,
+                           "sounds": {name: {"start": round(at / SFX_RATE, 6), "duration": round(n / SFX_RATE, 6)}
+                                      for name, (at, n) in sfx_offsets().items()}})
+    return results
+
+def dim(img, amount):
+    """Copy of an RGBA image with its colour scaled by 1 - amount, alpha kept.
+
+    Composited, dimmed layers give the dimmed composite, so this bakes in
+    a translucent black fill laid over all of them.
+    """
+    arr = np.array(img)
+    arr[..., :3] = (arr[..., :3] * (1 - amount) + 0.5).astype(np.uint8)
+    out = Image.fromarray(arr, "RGBA")
+    out.info["scale"] = scale_of(img)
+    return out
+
+def crop_rows(img):
+    """(image cropped to the rows it paints, first logical row, logical height)."""
+    sc = scale_of(img)
+    box = img.getchannel("A").getbbox() or (0, 0, img.width, 1)
+    y0, y1 = math.floor(box[1] / sc), math.ceil(box[3] / sc)
+    return img.crop((0, round(y0 * sc), img.width, min(round(y1 * sc), img.height))), y0, y1 - y0
+
+def run_layers(job, encoding=DEFAULT_ENCODING):
+    """Render one layered job's depth layers into assets/layers/, dimmed and cropped.
+
+    Returns (name, scale, [(layer, stem, y, h, seconds, encoding stats)]); the
+    shared split render is charged evenly to the layers.
+    """
+    _, name, sc, tile = job
+    t0 = time.perf_counter()
+    layers = render_layers(name, scale=sc, tile=tile)
+    share = (time.perf_counter() - t0) / len(layers)
+    sink, out = DirectorySink(LAYERS, encoding), []
+    for layer, img in layers.items():
+        t0 = time.perf_counter()
+        img, y, h = crop_rows(dim(img, BG_DIM))
+        stem = variant_name(f"{name}.{layer}", sc)
+        stats = sink.write(stem, img)
+        out.append((layer, stem, y, h, share + time.perf_counter() - t0, stats))
+    return name, sc, out
+
+def layer_outputs(stems):
+    return [os.path.join(LAYERS, f"{stem}.{ext}") for stem in stems for ext in ("png",) + FORMATS
+            if os.path.exists(os.path.join(LAYERS, f"{stem}.{ext}"))]
+
+def export_layers(jobs, manifest, workers, encoding=DEFAULT_ENCODING, force=False):
+    """Export the depth layers of the layered jobs and write parallax.json.
+
+    Layers of a job whose inputs are unchanged are kept along with their
+    rows from the previous parallax.json, as are the rows of scales not
+    rebuilt this time unless the asset's width (its tile) changed. Returns
+    {layer stem: (seconds, encoding stats)} for the layers that were rendered.
+    """
+    index = {}
+    if os.path.exists(PARALLAX):
+        with open(PARALLAX) as f:
+            index = json.load(f)
+    previous = {(name, v["scale"], layer["name"]): v for name, entry in index.items()
+                for layer in entry["layers"] for v in layer["variants"]}
+    widths = {name: logical_width(name, tile) for _, name, _, tile in jobs}
+    keys, stale = {}, []
+    rows = {k: v for k, v in previous.items() if index[k[0]]["w"] == widths.get(k[0], index[k[0]]["w"])}
+    for job in jobs:
+        stem, name, sc, _ = job
+        a = ASSETS[name]
+        keys[stem] = job_key(*job_inputs(job, encoding), extra_roots=(run_layers,))
+        kept = [previous.get((name, sc, layer)) for layer in a.layers]
+        if force or None in kept or not manifest.is_fresh(f"layers/{stem}", keys[stem], LAYERS):
+            stale.append(job)
+        else:
+            rows.update({(name, sc, layer): v for layer, v in zip(a.layers, kept)})
+    results = {}
+    for name, sc, layers in stream(functools.partial(run_layers, encoding=encoding), stale, workers):
+        for layer, stem, y, h, secs, stats in layers:
+            rows[name, sc, layer] = {"scale": sc, "file": f"layers/{stem}.png", "y": y, "h": h,
+                                     "formats": sorted((f for f in FORMATS if f in stats), key=stats.get)}
+            results[f"layers/{stem}"] = (secs, stats)
+            print(f"✓ {'layers/' + stem:<22} {describe(stats)}")
+        vstem = variant_name(name, sc)
+        manifest.record(f"layers/{vstem}", keys[vstem], layer_outputs(stem for _, stem, *_ in layers))
+    for a in ASSETS.values():
+        variants = {layer: [rows[a.name, sc, layer] for sc in sorted(a.scales) if (a.name, sc, layer) in rows]
+                    for layer in a.layers}
+        if any(variants.values()):
+            w = widths.get(a.name, index.get(a.name, {}).get("w", a.size[0]))
+            index[a.name] = {"w": w, "h": a.size[1], **({"tile": True} if w != a.size[0] else {}), "layers": [
+                {"name": layer, "factor": PARALLAX_FACTORS[layer], "variants": variants[layer]}
+                for layer in a.layers if variants[layer]]}
+    if index:
+        write_json(PARALLAX, index)
+    return results
+
+def write_resolutions():
+    """Write assets/resolutions.json: the variants of each asset present on disk.
+
+    The loader in index.html reads it to fetch the smallest variant that
+    covers what it will draw, in the first of its `formats` the browser
+    decodes, and falls back to <name>.png without it. A tileable asset
+    built with --tile is listed at its tile width and marked "tile"; scales
+    last built at another width are left out.
+    """
+    def width(sc):
+        with Image.open(output_path(variant_name(a.name, sc))) as img:
+            return round(img.width / sc)
+    index = {}
+    for a in ASSETS.values():
+        built = [sc for sc in sorted(a.scales) if os.path.exists(output_path(variant_name(a.name, sc)))]
+        if not built:
+            continue
+        w, h = a.size
+        if a.tileable:
+            w = width(max(built, key=lambda sc: os.path.getmtime(output_path(variant_name(a.name, sc)))))
+            built = [sc for sc in built if width(sc) == w]
+        variants = [{"scale": sc, "file": f"{variant_name(a.name, sc)}.png",
+                     "w": round(w * sc), "h": round(h * sc), "formats": formats_on_disk(variant_name(a.name, sc))}
+                    for sc in built]
+        index[a.name] = {"category": a.category, "w": w, "h": h, **({"tile": True} if w != a.size[0] else {}),
+                         "variants": variants}
+    write_json(RESOLUTIONS, index)
+    return index
+
+def write_skyline(resolutions):
+    """Write assets/skyline.json: bgRooftops' far and near building rows, at the width it was built at.
+
+    drawBackground draws these when the background image failed to load, so
+    the fallback shows the same skyline instead of an unrelated one. Each
+    building's lit windows are strings of 0/1, one per window row.
+    """
+    a = ASSETS["bgRooftops"]
+    w, h = resolutions.get(a.name, {}).get("w", a.size[0]), a.size[1]
+    far, near = skyline(w, h, a.palette["buildings"], DEFAULT_SEED, w if w != a.size[0] else None)
+    def row(name, b):
+        lit = [["".join("01"[v] for v in line) for line in grid[:window_rows(h - top)]]
+               for top, grid in zip(b.top.tolist(), b.lit.tolist())]
+        return {"name": name, "factor": PARALLAX_FACTORS[name], "width": b.width, "x": b.x.tolist(),
+                "top": b.top.tolist(), "color": [list(c) for c in b.color], **({"lit": lit} if b.lit.size else {})}
+    write_json(SKYLINE, {"w": w, "h": h, **({"tile": True} if w != a.size[0] else {}),
+                         "windows": {"x": WINDOW_INSET[0], "y": WINDOW_INSET[1], "dx": WINDOW_PITCH[0],
+                                     "dy": WINDOW_PITCH[1], "w": WINDOW_SIZE[0] + 1, "h": WINDOW_SIZE[1] + 1,
+                                     "color": list(a.palette["windows"])},
+                         "rows": [row("far", far), row("near", near)]}, indent=None)
+
+# ===== LOAD BUNDLES =====
+
+def content_hash(path):
+    return file_hash(path)[:HASH_LENGTH]
+
+def load_bundles():
+    """Image keys per bundle: the title's, each level's (its background, boss and the HUD's
+    portraits, from levels/) and the rest (the game over and victory screens)."""
+    import levels
+    bundles = {"title": [n for n in TITLE_ASSETS if n in ASSETS]}
+    for n, level in enumerate(levels.load(), 1):
+        keys = dict.fromkeys([level["bg"].get("img"), level["bossPortrait"], *PLAY_ASSETS])
+        bundles[f"level{n}"] = [k for k in keys if k in ASSETS]
+    listed = {k for keys in bundles.values() for k in keys}
+    bundles["rest"] = [k for k in ASSETS if k not in listed]
+    return bundles
+
+def write_bundles():
+    """Write assets/bundles.json: the load bundles and the content hash of every file in assets/
+    the game fetches by name (not the JSON indexes, nor the variants, which it picks at random)."""
+    files = {}
+    for root, dirs, names in os.walk(OUT):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != VARIANTS)
+        for f in sorted(names):
+            if not f.endswith((".json", ".tmp")):
+                path = os.path.join(root, f)
+                files[os.path.relpath(path, OUT).replace(os.sep, "/")] = content_hash(path)
+    write_json(BUNDLES, {"bundles": load_bundles(), "files": files})
+
+# ===== SERVICE WORKER / CHECKS =====
+
+SW_PREFIX = "/darkwing-duck-game/assets/"
+SW_BLOCK = re.compile(r"( *)// <generated-assets>.*?// </generated-assets>\n", re.S)
+
+def sw_files():
+    """Files to precache: the 1x assets, with the portraits swapped for the atlas once it is built,
+    the 1x depth layers once they are, the skyline, the 1x sprite and fx sheets, the sound bank and bundles.json."""
+    if not (os.path.exists(output_path(ATLAS)) and os.path.exists(ATLAS_INDEX)):
+        files = [f"{name}.png" for name in ASSETS]
+    else:
+        files = [f"{a.name}.png" for a in ASSETS.values() if a.category != "portraits"]
+        files += [f"{ATLAS}.png", os.path.basename(ATLAS_INDEX)]
+    if os.path.exists(PARALLAX):
+        with open(PARALLAX) as f:
+            index = json.load(f)
+        files += [v["file"] for entry in index.values() for layer in entry["layers"]
+                  for v in layer["variants"] if v["scale"] == 1]
+        files.append(os.path.basename(PARALLAX))
+    if os.path.exists(SKYLINE):
+        files.append(os.path.basename(SKYLINE))
+    if os.path.exists(output_path(SPRITE_SHEET)) and os.path.exists(SPRITE_INDEX):
+        files += [f"{SPRITE_SHEET}.png", os.path.basename(SPRITE_INDEX)]
+    if os.path.exists(output_path(FX_SHEET)) and os.path.exists(FX_INDEX):
+        files += [f"{FX_SHEET}.png", os.path.basename(FX_INDEX)]
+    if os.path.exists(os.path.join(OUT, f"{SFX}.wav")) and os.path.exists(SFX_INDEX):
+        files += [f"{SFX}.wav", os.path.basename(SFX_INDEX)]
+    if os.path.exists(BUNDLES):
+        files.append(os.path.basename(BUNDLES))
+    return files
+
+def sw_candidates(name):
+    """One precached file as the files the game tries for it, in order: a PNG's AVIF/WebP
+    siblings smallest first (as the indexes list them), then the PNG itself."""
+    stem, ext = os.path.splitext(name)
+    return [f"{stem}.{f}" for f in formats_on_disk(stem)] + [name] if ext == ".png" else [name]
+
+def sw_block(indent="  "):
+    """The precache list, each URL versioned by its file's content hash: the service worker
+    keeps assets across versions of itself and downloads only the URLs it has not cached.
+    A file with siblings is a list, of which the worker caches the first the browser decodes."""
+    def url(name):
+        return f"'{SW_PREFIX}{name}?v={content_hash(os.path.join(OUT, name))}'"
+    lines = [f"{indent}// <generated-assets> from generate_assets.py, do not edit"]
+    for name in sw_files():
+        urls = [url(n) for n in sw_candidates(name)]
+        lines.append(f"{indent}{urls[0] if len(urls) == 1 else '[' + ', '.join(urls) + ']'},")
+    lines.append(f"{indent}// </generated-assets>")
+    return "\n".join(lines) + "\n"
+
+def sync_sw():
+    """Rewrite the generated part of sw.js's ASSETS list from the registry."""
+    with open(SW) as f:
+        src = f.read()
+    new = SW_BLOCK.sub(lambda m: sw_block(m.group(1)), src)
+    if new != src:
+        with open(SW, "w") as f:
+            f.write(new)
+        print("✓ sw.js precache list updated")
+
+def check():
+    """Report drift between the registry, assets/, sw.js and index.html (and levels/, see levels.py).
+    Returns an exit code."""
+    import levels
+    problems = []
+    names = set(ASSETS)
+    variants = {variant_name(a.name, sc) for a in ASSETS.values() for sc in a.scales}
+    # the 1x images are committed; the other scales are build outputs the game does without,
+    # as long as resolutions.json does not send it looking for them
+    for name in sorted(variant_name(a.name, 1) for a in ASSETS.values() if 1 in a.scales):
+        if not os.path.exists(output_path(name)):
+            problems.append(f"missing assets/{name}.png")
+    if os.path.exists(RESOLUTIONS):
+        with open(RESOLUTIONS) as f:
+            listed = sorted(v["file"] for res in json.load(f).values() for v in res["variants"])
+        problems += [f"resolutions.json lists missing assets/{f}, rebuild it" for f in listed
+                     if not os.path.exists(os.path.join(OUT, f))]
+    on_disk = {f[:-4] for f in os.listdir(OUT) if f.endswith(".png")}
+    atlases = {variant_name(stem, sc) for stem in (ATLAS, SPRITE_SHEET, FX_SHEET) for sc in SCALES}
+    problems += [f"unregistered assets/{n}.png" for n in sorted(on_disk - variants - atlases)]
+    with open(SW) as f:
+        sw = f.read()
+    cached = dict(re.findall(re.escape(SW_PREFIX) + r"([\w@./]+)(?:\?v=(\w*))?'", sw))
+    expected = {n for name in sw_files() for n in sw_candidates(name)}
+    problems += [f"sw.js precaches {n}, which is not built from the registry" for n in sorted(cached.keys() - expected)]
+    problems += [f"sw.js does not precache {n}" for n in sorted(expected - cached.keys())]
+    problems += [f"sw.js precaches an outdated {n}" for n in sorted(expected & cached.keys())
+                 if cached[n] != content_hash(os.path.join(OUT, n))]
+    with open(INDEX) as f:
+        html = f.read()
+    block = re.search(r"const imageManifest = \{(.*?)\n\};", html, re.S)
+    listed = set(re.findall(r"^\s*(\w+): \{", block.group(1), re.M)) if block else set()
+    problems += [f"index.html imageManifest lists unregistered {n}" for n in sorted(listed - names)]
+    problems += [f"index.html imageManifest is missing {n}" for n in sorted(names - listed)]
+    problems += levels.problems()
+    for p in problems:
+        print(f"✗ {p}")
+    print(f"{'✅' if not problems else '❌'} {len(ASSETS)} registered assets, {len(problems)} problem(s)")
+    return 1 if problems else 0
+
+def list_assets():
+    for a in ASSETS.values():
+        built = [f"{sc:g}x" for sc in a.scales if os.path.exists(output_path(variant_name(a.name, sc)))]
+        print(f"{a.name:<22} {a.size[0]:>4}x{a.size[1]:<4} {a.category:<12} {' '.join(built) or 'missing'}")
+
+def golden_path(name):
+    return os.path.join(GOLDEN, f"{name}.png")
+
+def verify(jobs, max_error, min_ssim, update=False, sibling_error=DEFAULT_ENCODING.palette_error):
+    """Render the jobs in memory and compare them with golden/. Returns an exit code.
+
+    A render passes when it is pixel-identical, or when no channel is off by
+    more than max_error and SSIM stays at or above min_ssim. Failures get a
+    heatmap in golden/diff/. With update, the renders become the new references.
+    The AVIF/WebP siblings already in assets/ must also decode to within
+    sibling_error RMS of their PNG, since the game loads them in its place.
+    """
+    from golden import compare as compare_golden, heatmap
+    t0 = time.perf_counter()
+    failed = diffs = 0
+    for name, asset_name, sc, _ in jobs:
+        img = render(asset_name, scale=sc)
+        if update:
+            os.makedirs(GOLDEN, exist_ok=True)
+            img.save(golden_path(name), optimize=True)
+            print(f"✓ {name:<22} reference updated")
+            continue
+        if not os.path.exists(golden_path(name)):
+            failed += 1
+            print(f"✗ {name:<22} no reference (run with --update-golden)")
+            continue
+        with Image.open(golden_path(name)) as ref:
+            ref.load()
+        r = compare_golden(img, ref)
+        if r["exact"]:
+            print(f"✓ {name:<22} exact")
+            continue
+        if "size" in r:
+            failed += 1
+            print(f"✗ {name:<22} size {r['size'][0]} -> {r['size'][1]}")
+            continue
+        ok = max(r["max_error"]) <= max_error and r["ssim"] >= min_ssim
+        print(f"{'≈' if ok else '✗'} {name:<22} max error {r['max_error']}  SSIM {r['ssim']:.5f}")
+        if not ok:
+            failed += 1
+            diffs += 1
+            os.makedirs(GOLDEN_DIFF, exist_ok=True)
+            heatmap(img, ref).save(os.path.join(GOLDEN_DIFF, f"{name}.png"))
+    wall = time.perf_counter() - t0
+    if update:
+        print(f"\n✅ {len(jobs)} reference(s) written to {GOLDEN} ({wall:.2f}s)")
+        return 0
+    strays = sibling_errors(sibling_error)
+    for path, err in strays:
+        print(f"✗ {path:<22} RMS error {err:.2f} against its PNG (over {sibling_error})")
+    print(f"\n{'❌' if failed else '✅'} {len(jobs) - failed}/{len(jobs)} match golden/ ({wall:.2f}s)"
+          + (f", {diffs} heatmap(s) in {GOLDEN_DIFF}" if diffs else ""))
+    if strays:
+        print(f"❌ {len(strays)} sibling(s) stray from their PNG; rebuild with -f")
+    return 1 if failed or strays else 0
+
+def profile(jobs, path):
+    """Render the jobs in memory, one at a time, under the profiler. Returns an exit code.
+
+    Writes collapsed stacks to `path` (for flamegraph.pl, inferno or
+    speedscope) and prints where each asset's time went, per primitive and
+    per helper. Encoding is a separate stage and is not profiled; nothing
+    in assets/ is touched. Tracing slows Python-heavy code down more than
+    Pillow and NumPy work, so compare shares, not absolute times.
+    """
+    t0 = time.perf_counter()
+    from profiler import Profiler
+    with Profiler() as prof:
+        for name, asset_name, sc, tile in jobs:
+            with prof.frame(name):
+                render(asset_name, scale=sc, tile=tile)
+    prof.report()
+    prof.write(path)
+    print(f"\n✅ {len(jobs)} job(s) profiled, collapsed stacks in {path} ({time.perf_counter() - t0:.2f}s)")
+    return 0
+
+def report_encoding(stats):
+    """Totals of the per-asset size reports run_job() prints."""
+    raw, png = sum(s["raw"] for s in stats), sum(s["png"] for s in stats)
+    print(f"Encoded {len(stats)} file(s): PNG {raw/1024:.0f} -> {png/1024:.0f} KB "
+          f"({(png-raw)/max(raw, 1):+.0%}, {sum(s['palette'] for s in stats)} palettized)"
+          + "".join(f", {fmt} {sum(s.get(fmt, 0) for s in stats)/1024:.0f} KB" for fmt in FORMATS
+                    if any(fmt in s for s in stats)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Darkwing Duck game assets.")
+    parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1,
+        help="worker processes (default: CPU count, 1 = serial). A serial build records each "
+             "asset's time, which later parallel builds report their speedup against")
+    parser.add_argument("--force", "-f", action="store_true",
+        help="rebuild every asset even if its inputs are unchanged")
+    parser.add_argument("--only", action="append", default=[], metavar="NAME",
+        help="build only this asset (repeatable, or comma-separated)")
+    parser.add_argument("--category", action="append", default=[], choices=CATEGORIES,
+        help="build only this category (repeatable)")
+    parser.add_argument("--scale", action="append", default=[], type=float, choices=SCALES,
+        help="build only this render scale (repeatable)")
+    parser.add_argument("--palette-error", type=float, default=DEFAULT_ENCODING.palette_error, metavar="RMS",
+        help="quantize to a 256-colour palette, and keep lossy AVIF/WebP siblings, only when "
+             "the RMS error stays under this (0 = never)")
+    parser.add_argument("--png-effort", choices=("fast", "best"), default=DEFAULT_ENCODING.png_effort,
+        help="fast: one default encode; best: search zlib settings for the smallest PNG")
+    parser.add_argument("--formats", default=",".join(DEFAULT_ENCODING.formats), metavar="LIST",
+        help=f"sibling formats to write next to each PNG, from {','.join(FORMATS)} (empty for none)")
+    parser.add_argument("--verify", action="store_true",
+        help="render in memory and compare with golden/ instead of building (1x unless --scale)")
+    parser.add_argument("--update-golden", action="store_true",
+        help="with --verify, store the renders as the new references")
+    parser.add_argument("--max-error", type=int, default=2, metavar="LEVELS",
+        help="--verify: largest per-channel difference a non-identical render may have (default 2)")
+    parser.add_argument("--min-ssim", type=float, default=0.995,
+        help="--verify: lowest SSIM a non-identical render may have (default 0.995)")
+    parser.add_argument("--variants", type=int, metavar="N",
+        help="render N seeded variants of each selected asset (default: the level backgrounds) "
+             "into assets/variants/ and index them in variants.json")
+    parser.add_argument("--seed-start", type=int, default=1, metavar="SEED",
+        help="--variants: first seed (default 1)")
+    parser.add_argument("--tile", type=int, metavar="WIDTH",
+        help="render the tileable backgrounds horizontally periodic at this even logical width, "
+             "for the game to repeat while scrolling")
+    parser.add_argument("--profile", metavar="PATH",
+        help="render the selected assets in memory under the profiler, write collapsed stacks "
+             "(flame graph input) to PATH and print per-primitive call counts, time and pixels")
+    parser.add_argument("--bundle", metavar="PATH",
+        help="write the selected assets into one .zip/.tar/.tar.gz instead of assets/ (no manifest, atlas, sprites, fx, sounds or sw.js)")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+        help="run the preview server: the game with assets rendered on request (see preview.py)")
+    parser.add_argument("--cache-mb", type=int,
+        help="--serve: size of the render cache (default: preview.DEFAULT_CACHE_MB, 64)")
+    parser.add_argument("--layer-cache-mb", type=int, default=DEFAULT_LAYER_CACHE_MB,
+        help="memory per process for gradient columns and small lights shared between renders; "
+             f"0 renders every one afresh (default {DEFAULT_LAYER_CACHE_MB})")
+    parser.add_argument("--list", action="store_true", help="list registered assets and exit")
+    parser.add_argument("--check", action="store_true",
+        help="check assets/, sw.js and index.html against the registry and exit")
+    args = parser.parse_args(argv)
+
+    set_layer_cache(args.layer_cache_mb * 1024 * 1024)
+    if args.list:
+        return list_assets()
+    if args.serve:
+        from preview import serve, DEFAULT_CACHE_MB
+        return serve(args.serve, DEFAULT_CACHE_MB if args.cache_mb is None else args.cache_mb)
+    os.makedirs(OUT, exist_ok=True)
+    if args.check:
+        return check()
+    if (args.verify or args.variants) and not args.scale:
+        args.scale = [1]
+    if args.variants and len(args.scale) > 1:
+        parser.error("--variants renders one --scale at a time")
+    if args.variants and not args.only and not args.category:
+        args.only = list(LEVEL_BACKGROUNDS)
+    if args.tile is not None and (args.tile < 2 or args.tile % 2):
+        parser.error("--tile must be an even width, so that 0.5x tiles are whole pixels")
+    if args.tile and args.verify:
+        parser.error("--verify compares full-width renders with golden/; drop --tile")
+    if args.bundle and not args.bundle.endswith(BUNDLE_EXTENSIONS):
+        parser.error(f"--bundle must end in {', '.join(BUNDLE_EXTENSIONS)}: {args.bundle}")
+    jobs = select([n for o in args.only for n in o.split(",") if n], args.category, args.scale, args.tile)
+    if args.verify:
+        return verify(jobs, args.max_error, args.min_ssim, args.update_golden, args.palette_error)
+    if args.profile:
+        return profile(jobs, args.profile)
+    formats = tuple(f for f in FORMATS if f in args.formats.split(","))
+    unknown = set(args.formats.split(",")) - set(FORMATS) - {""}
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+    encoding = EncodeOptions(args.palette_error, args.png_effort, formats)
+    if args.variants:
+        t0 = time.perf_counter()
+        names = list(dict.fromkeys(job[1] for job in jobs))
+        seeds = range(args.seed_start, args.seed_start + args.variants)
+        stats = build_variants(names, seeds, args.scale[0], args.jobs, encoding, args.force, args.tile)
+        if stats:
+            report_encoding(stats)
+        print(f"\n✅ {len(stats)} rendered, {len(names) * len(seeds) - len(stats)} up to date in {VARIANTS} "
+              f"({time.perf_counter() - t0:.2f}s)")
+        return 0
+    if args.bundle:
+        t0 = time.perf_counter()
+        results = build_bundle(jobs, args.bundle, encoding)
+        report_encoding([stats for _, stats in results.values()])
+        print(f"\n✅ {len(results)} asset(s) bundled into {args.bundle} ({time.perf_counter() - t0:.2f}s)")
+        return 0
+
     print("Generating Darkwing Duck game assets...")
     print(f"Output: {OUT}\n")
-    
-    # Backgrounds
-    gen_titleBg()
-    gen_bgRooftops()
-    gen_bgFunhouse()
-    gen_bgGreenhouse()
-    gen_bgDam()
-    gen_bgFortress()
-    
-    # Villain portraits (256x256)
-    gen_portraitDarkwing()
-    gen_villain_portrait("Megavolt", 256, (60,50,10), (255,238,68), draw_megavolt)
-    gen_villain_portrait("Quackerjack", 256, (60,15,40), (255,68,170), draw_quackerjack)
-    gen_villain_portrait("Bushroot", 256, (15,50,15), (68,187,68), draw_bushroot)
-    gen_villain_portrait("Liquidator", 256, (10,30,60), (68,170,255), draw_liquidator)
-    gen_villain_portrait("Negaduck", 256, (50,10,10), (255,34,68), draw_negaduck)
-    
-    # Ally portraits (128x128)
-    gen_portraitLaunchpad()
-    gen_portraitGosalyn()
-    gen_portraitMorgana()
-    gen_portraitGizmoduck()
-    
-    # Game over / Victory
-    gen_gameOver()
-    gen_victory()
-    
-    print(f"\n✅ All 18 assets generated in {OUT}")
+
+    t0 = time.perf_counter()
+    manifest = BuildManifest(MANIFEST)
+    keys = {job[0]: job_key(*job_inputs(job, encoding), extra_roots=(run_job,)) for job in jobs}
+    stale = [job for job in jobs
+             if args.force or not manifest.is_fresh(job[0], keys[job[0]], OUT)]
+    t1 = time.perf_counter()
+    results = build(stale, args.jobs, encoding) if stale else {}
+    jobs_wall = time.perf_counter() - t1
+    serial = manifest.serial_time(results)
+    for name, (secs, _) in results.items():
+        manifest.record(name, keys[name], outputs(name), serial=secs if args.jobs <= 1 else None)
+    results.update(pack_atlas(manifest, encoding, args.force))
+    results.update(build_sprites(manifest, encoding, args.force))
+    results.update(build_effects(manifest, encoding, args.force))
+    results.update(build_sounds(manifest, args.force))
+    results.update(export_layers([job for job in jobs if ASSETS[job[1]].layers], manifest, args.jobs,
+                                 encoding, args.force))
+    manifest.save()
+    write_skyline(write_resolutions())
+    write_bundles()
+    sync_sw()
+    wall = time.perf_counter() - t0
+
+    if results:
+        print("\nPer-asset time:")
+        for name, (secs, _) in results.items():
+            print(f"  {name:<22} {secs*1000:8.1f} ms")
+        busy = sum(secs for secs, _ in results.values())
+        # per-job times stretch when workers contend for cores, so this is how many jobs ran at
+        # once on average; the speedup is measured against the times a --jobs 1 build recorded
+        print(f"\nWall {wall:.2f}s, job time sum {busy:.2f}s, parallelism {busy/wall:.2f}x with {args.jobs} job(s)")
+        if stale and args.jobs > 1:
+            print(f"Asset jobs {jobs_wall:.2f}s, "
+                  + (f"{serial:.2f}s at --jobs 1: speedup {serial/jobs_wall:.2f}x" if serial is not None
+                     else "no --jobs 1 times recorded for them yet: build with -j 1 -f for a speedup"))
+        report_encoding([stats for _, stats in results.values() if stats])
+    print(f"\n✅ {len(stale)} rebuilt, {len(jobs) - len(stale)} up to date in {OUT} ({wall:.2f}s)")
+
+if __name__ == "__main__":
+    sys.exit(main())
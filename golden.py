@@ -0,0 +1,61 @@
+"""
+Golden-image comparison for the asset generator.
+Rendered images are compared with reference PNGs as decoded arrays: an
+exact fingerprint first, then per-channel max error and a windowed SSIM
+on luminance, and a heatmap of where they differ.
+"""
+import hashlib
+
+from PIL import Image
+import numpy as np
+
+SSIM_WINDOW = 8
+_C1, _C2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+
+def fingerprint(img):
+    """Hash of the decoded pixels, independent of how the PNG was compressed."""
+    h = hashlib.sha256(f"{img.mode} {img.width}x{img.height}\n".encode())
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+def _box_mean(a, n):
+    """Mean over every n x n window (valid positions only), via an integral image."""
+    s = np.pad(a, ((1, 0), (1, 0))).cumsum(0).cumsum(1)
+    return (s[n:, n:] - s[:-n, n:] - s[n:, :-n] + s[:-n, :-n]) / (n * n)
+
+def _luma(img):
+    return np.asarray(img.convert("L"), dtype=np.float64)
+
+def ssim(img, ref, window=SSIM_WINDOW):
+    """Mean SSIM of the two images' luminance over sliding window x window blocks."""
+    x, y = _luma(img), _luma(ref)
+    n = min(window, *x.shape)
+    mx, my = _box_mean(x, n), _box_mean(y, n)
+    vx = _box_mean(x * x, n) - mx * mx
+    vy = _box_mean(y * y, n) - my * my
+    cov = _box_mean(x * y, n) - mx * my
+    s = ((2*mx*my + _C1) * (2*cov + _C2)) / ((mx*mx + my*my + _C1) * (vx + vy + _C2))
+    return float(s.mean())
+
+def compare(img, ref):
+    """{"exact", "max_error" (per channel), "ssim"} of a render against its reference."""
+    if img.size != ref.size:
+        return {"exact": False, "size": (ref.size, img.size)}
+    if ref.mode != img.mode:
+        ref = ref.convert(img.mode)
+    if fingerprint(img) == fingerprint(ref):
+        return {"exact": True}
+    d = np.abs(np.asarray(img, dtype=np.int16) - np.asarray(ref, dtype=np.int16))
+    d = d.reshape(d.shape[0], d.shape[1], -1)
+    return {"exact": False, "max_error": [int(m) for m in d.max(axis=(0, 1))], "ssim": ssim(img, ref)}
+
+def heatmap(img, ref, gain=16):
+    """Dimmed greyscale reference with the largest per-pixel channel difference in red to yellow."""
+    a = np.asarray(img.convert("RGBA"), dtype=np.int16)
+    b = np.asarray(ref.convert(img.mode).convert("RGBA"), dtype=np.int16)
+    heat = np.clip(np.abs(a - b).max(axis=2) * gain, 0, 510)
+    base = np.asarray(ref.convert("L"), dtype=np.int16) // 3
+    hot = np.stack([np.minimum(heat + 64, 255), np.clip(heat - 255, 0, 255), np.zeros_like(heat)], axis=2)
+    out = np.where((heat > 0)[..., None], hot, base[..., None])
+    return Image.fromarray(out.astype(np.uint8), "RGB")
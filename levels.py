@@ -0,0 +1,259 @@
+"""
+Level compiler for the game.
+The levels are data, one levels/<n>-<name>.json per level in play order;
+this checks them against the game's physics and writes them into the
+generated LEVELS block of index.html, each with a baked spatial index:
+
+    python levels.py            # validate and rewrite index.html's LEVELS
+    python levels.py --check    # validate, and fail when index.html is out of date
+
+The checks: the boss can be reached from the start by jumps the player can
+make, no platform cuts through the boss's spawn box and the boss has a
+floor, and walking enemies start on (or just above) a platform. The index
+is a uniform grid over x: cell i lists every platform whose x-range comes
+within REACH of [i*CELL, (i+1)*CELL), so a body no wider than REACH either
+side of x collides against the platforms of x's cell instead of all of them.
+"""
+from bisect import bisect_left, bisect_right
+from collections import deque
+import argparse
+import functools
+import json
+import math
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LEVELS_DIR = os.path.join(ROOT, "levels")
+INDEX = os.path.join(ROOT, "index.html")
+LEVELS_BLOCK = re.compile(r"( *)// <generated-levels>.*?// </generated-levels>\n", re.S)
+
+CELL = 256   # grid cell width in px
+REACH = 32   # widest half-width of a body that collides through the grid (the boss's is 30)
+
+# updatePlaying's physics, per frame
+GRAVITY = 0.55
+TERMINAL_VEL = 12
+JUMP_VY = 11
+RUN_SPEED = 4.5            # playerStats.speed before upgrades and boosts
+PLAYER_SPAWN = (100, 400)  # createPlayer
+PLAYER_HALF, PLAYER_FEET, PLAYER_SLACK = 14, 24, 8
+BOSS_Y, BOSS_HALF, BOSS_FEET, BOSS_SLACK = 480, 30, 35, 10
+BOSS_TRIGGER = 400         # the boss appears when the player is this far left of bossX
+# walking enemies: (half-width, feet below y); the jackbox never moves, the rest fall onto a platform
+WALKERS = {"goon": (14, 20), "toySoldier": (12, 18), "vine": (12, 25), "jackbox": (15, 15)}
+FLYERS = ("drone", "spore")
+MAX_DROP = 40              # how far above its platform a walker may start
+
+
+def level_files():
+    return sorted(os.path.join(LEVELS_DIR, f) for f in os.listdir(LEVELS_DIR) if f.endswith(".json"))
+
+def load():
+    """The level definitions, in play order."""
+    levels = []
+    for path in level_files():
+        with open(path) as f:
+            levels.append(json.load(f))
+    return levels
+
+# ----- physics -----
+
+@functools.lru_cache(maxsize=None)
+def jump_reach(rise, band):
+    """Furthest a full-speed jump carries the player sideways and still lands on a surface
+    `rise` px above its take-off (negative: below); None when the surface is out of reach.
+
+    A landing counts on any falling frame whose feet are within `band` px below the
+    surface, as in updatePlaying, so the last such frame is the furthest one.
+    """
+    y, vy, frame, last = 0.0, -JUMP_VY, 0, None
+    while True:
+        vy = min(vy + GRAVITY, TERMINAL_VEL)
+        y += vy
+        frame += 1
+        if vy >= 0 and -rise < y < -rise + band:
+            last = frame
+        if vy >= 0 and y >= -rise + band:
+            return None if last is None else last * RUN_SPEED
+
+def landing(platforms, x, half, feet, slack):
+    """Index of the platform a body falling at x with its feet at `feet` comes to rest on, or None."""
+    best = None
+    for i, p in enumerate(platforms):
+        if x + half > p["x"] and x - half < p["x"] + p["w"] and feet < p["y"] + p["h"] + slack:
+            if best is None or p["y"] < platforms[best]["y"]:
+                best = i
+    return best
+
+def jumps(platforms):
+    """Adjacency lists of the platforms: j in jumps[i] when a jump from i can land on j."""
+    top = min(p["y"] for p in platforms)
+    bottom = max(p["y"] + p["h"] for p in platforms)
+    span = (jump_reach(top - bottom, bottom - top + PLAYER_SLACK) or 0) + 2 * PLAYER_HALF
+    widest = max(p["w"] for p in platforms)
+    order = sorted(range(len(platforms)), key=lambda i: platforms[i]["x"])
+    xs = [platforms[i]["x"] for i in order]
+    out = []
+    for a in platforms:
+        lo = bisect_left(xs, a["x"] - span - widest)
+        hi = bisect_right(xs, a["x"] + a["w"] + span)
+        edges = []
+        for j in order[lo:hi]:
+            b = platforms[j]
+            if b is a:
+                continue
+            # the player stands on a until its centre is PLAYER_HALF past the edge, and lands
+            # on b from PLAYER_HALF before b's
+            gap = max(b["x"] - (a["x"] + a["w"]), a["x"] - (b["x"] + b["w"])) - 2 * PLAYER_HALF
+            reach = jump_reach(a["y"] - b["y"], b["h"] + PLAYER_SLACK)
+            if reach is not None and reach >= max(gap, 0):
+                edges.append(j)
+        out.append(edges)
+    return out
+
+# ----- validation -----
+
+def validate(level):
+    """(errors, warnings) of one level definition."""
+    errors, warnings = [], []
+    platforms, boss_x = level["platforms"], level["bossX"]
+    if not platforms:
+        return ["has no platforms"], warnings
+    if boss_x - BOSS_TRIGGER > level["length"]:
+        errors.append(f"bossX {boss_x} is never triggered: the player stops at {level['length']}")
+    x0, x1 = boss_x - BOSS_HALF, boss_x + BOSS_HALF
+    y0, y1 = BOSS_Y - BOSS_FEET, BOSS_Y + BOSS_FEET
+    for i, p in enumerate(platforms):
+        if p["x"] < x1 and p["x"] + p["w"] > x0 and p["y"] < y1 and p["y"] + p["h"] > y0:
+            errors.append(f"platform {i} at ({p['x']}, {p['y']}) overlaps the boss's spawn box")
+    arena = landing(platforms, boss_x, BOSS_HALF, BOSS_Y + BOSS_FEET, BOSS_SLACK)
+    if arena is None:
+        errors.append(f"nothing under the boss at x={boss_x}")
+    start = landing(platforms, PLAYER_SPAWN[0], PLAYER_HALF, PLAYER_SPAWN[1] + PLAYER_FEET, PLAYER_SLACK)
+    if start is None:
+        errors.append(f"nothing under the player's spawn at x={PLAYER_SPAWN[0]}")
+    elif arena is not None:
+        edges, seen, queue = jumps(platforms), {start}, deque([start])
+        while queue:
+            for j in edges[queue.popleft()]:
+                if j not in seen:
+                    seen.add(j)
+                    queue.append(j)
+        if arena not in seen:
+            errors.append(f"the boss's floor (platform {arena}) cannot be reached from the start")
+        warnings += [f"platform {i} at ({p['x']}, {p['y']}) cannot be reached from the start"
+                     for i, p in enumerate(platforms) if i not in seen]
+    for e in level["enemies"]:
+        where = f"{e['type']} at ({e['x']}, {e['y']})"
+        if e["type"] in FLYERS:
+            continue
+        if e["type"] not in WALKERS:
+            errors.append(f"{where} is not an enemy type")
+            continue
+        half, feet = WALKERS[e["type"]]
+        i = landing(platforms, e["x"], half, e["y"] + feet, 5)
+        if i is None:
+            errors.append(f"{where} spawns in mid-air with no platform below")
+        elif platforms[i]["y"] - (e["y"] + feet) > MAX_DROP:
+            errors.append(f"{where} spawns in mid-air, {platforms[i]['y'] - e['y'] - feet} px above platform {i}")
+    return errors, warnings
+
+# ----- compilation -----
+
+def grid(platforms, cell=CELL, reach=REACH):
+    """Cell i: indices of the platforms whose x-range comes within `reach` of [i*cell, (i+1)*cell).
+
+    Cell 0 also stands for everything left of x=0, where the runtime clamps its lookups.
+    """
+    right = max(p["x"] + p["w"] for p in platforms)
+    cells = [[] for _ in range(math.ceil((right + reach) / cell))]
+    for i, p in enumerate(platforms):
+        first = max(math.floor((p["x"] - reach) / cell), 0)
+        last = max(math.floor((p["x"] + p["w"] + reach) / cell), 0)
+        for c in range(first, min(last, len(cells) - 1) + 1):
+            cells[c].append(i)
+    return cells
+
+def compile_level(level, cell=CELL, reach=REACH):
+    return {**level, "grid": {"cell": cell, "reach": reach, "cells": grid(level["platforms"], cell, reach)}}
+
+def js(value):
+    """A JSON-like value as a JS literal in index.html's style: bare keys, single quotes."""
+    if isinstance(value, dict):
+        return "{" + ",".join(f"{k}:{js(v)}" for k, v in value.items()) + "}"
+    if isinstance(value, list):
+        return "[" + ",".join(js(v) for v in value) + "]"
+    if isinstance(value, str):
+        return f"'{value}'" if "'" not in value and "\\" not in value else json.dumps(value)
+    return json.dumps(value)
+
+def levels_block(levels, indent=""):
+    lines = [f"{indent}// <generated-levels> from levels/*.json by levels.py, do not edit",
+             f"{indent}const LEVELS=["]
+    for n, level in enumerate(levels):
+        body = [f"{k}:{js(v)}" for k, v in compile_level(level).items()]
+        lines.append(f"{indent}  {{" + f",\n{indent}   ".join(body) + "}" + ("," if n < len(levels) - 1 else ""))
+    lines += [f"{indent}];", f"{indent}// </generated-levels>"]
+    return "\n".join(lines) + "\n"
+
+def report(levels):
+    """Print every level's problems; returns the number of errors."""
+    count = 0
+    for path, level in zip(level_files(), levels):
+        errors, warnings = validate(level)
+        name = os.path.relpath(path, ROOT)
+        for e in errors:
+            print(f"✗ {name}: {e}")
+        for w in warnings:
+            print(f"⚠ {name}: {w}")
+        count += len(errors)
+    return count
+
+def problems(levels=None):
+    """Validation errors and a stale index.html, as generate_assets.check() lists them."""
+    levels = load() if levels is None else levels
+    out = [f"{os.path.relpath(path, ROOT)}: {e}" for path, level in zip(level_files(), levels)
+           for e in validate(level)[0]]
+    with open(INDEX) as f:
+        html = f.read()
+    m = LEVELS_BLOCK.search(html)
+    if not m:
+        out.append("index.html has no generated LEVELS block")
+    elif m.group(0) != levels_block(levels, m.group(1)):
+        out.append("index.html LEVELS is out of date with levels/, run levels.py")
+    return out
+
+def sync_index(levels):
+    """Rewrite the generated LEVELS block of index.html."""
+    with open(INDEX) as f:
+        src = f.read()
+    new = LEVELS_BLOCK.sub(lambda m: levels_block(levels, m.group(1)), src)
+    if new != src:
+        with open(INDEX, "w") as f:
+            f.write(new)
+        print("✓ index.html LEVELS updated")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate levels/*.json and compile them into index.html.")
+    parser.add_argument("--check", action="store_true",
+        help="validate and check index.html is up to date, without writing it")
+    args = parser.parse_args(argv)
+
+    levels = load()
+    errors = report(levels)
+    if args.check:
+        stale = [p for p in problems(levels) if p.startswith("index.html")]
+        for p in stale:
+            print(f"✗ {p}")
+        errors += len(stale)
+    elif not errors:
+        sync_index(levels)
+    cells = [len(c) for level in levels for c in grid(level["platforms"])]
+    print(f"{'✅' if not errors else '❌'} {len(levels)} level(s), {sum(len(l['platforms']) for l in levels)} platforms, "
+          f"at most {max(cells, default=0)} per {CELL} px cell, {errors} error(s)")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Local preview server for the asset generator.
+Serves the game from this directory with every assets/<name>.png rendered
+on demand, so a palette or drawing tweak shows up on the next page reload:
+
+    python generate_assets.py --serve 8000
+    http://localhost:8000/                                   # the game
+    http://localhost:8000/assets/portraitBushroot.png?seed=7&bg=0a3a0a
+    http://localhost:8000/assets/titleBg@2x.png?w=1280&glow=ff5028
+    http://localhost:8000/assets/bgDam.png?tile=512
+
+Query parameters are seed, w and/or h (pixels, aspect ratio kept), tile (the
+logical width of a repeating tile, for the level backgrounds) and any
+palette colour of the asset as hex, comma-separated for lists. Renders sit
+in a size-bounded LRU cache keyed by those parameters and the source hash
+of the asset's generator, and are sent with an ETag, so a reload costs a
+304 and only a changed parameter or a changed generator renders again.
+Edited modules are reloaded on the next request.
+"""
+from collections import OrderedDict
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+import functools
+import hashlib
+import importlib
+import os
+import re
+import sys
+import threading
+import time
+
+from sinks import to_buffer
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Reloaded in this order when any of them changes; generate_assets imports the rest.
+MODULES = ("asset_cache", "raster_fx", "atlas", "encode", "sinks", "golden", "profiler", "audio", "levels", "generate_assets")
+# Built files that would shadow the live renders: the loader falls back to <name>.png
+# without the indexes, and without sw.js nothing is served from a stale cache.
+HIDDEN = re.compile(r"^/(sw\.js|assets/(resolutions|portraits|parallax|sprites|fx|bundles)\.json|assets/.*\.(avif|webp)|assets/(variants|layers)/.*)$")
+ASSET_URL = re.compile(r"^/assets/(\w+?)(?:@([\d.]+)x)?\.png$")
+DEFAULT_CACHE_MB = 64
+
+
+class RenderCache:
+    """LRU of encoded renders, bounded by the total size of the PNGs it holds."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = self.hits = self.misses = 0
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if key in self.entries:
+            self.bytes -= len(self.entries.pop(key))
+        self.entries[key] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self.bytes -= len(self.entries.popitem(last=False)[1])
+
+class Generator:
+    """The asset modules as last loaded, reloaded when one of their files changes."""
+
+    def __init__(self):
+        self.mtimes = None
+        self.lock = threading.Lock()
+
+    def _stamp(self):
+        return [os.path.getmtime(os.path.join(ROOT, f"{m}.py")) for m in MODULES]
+
+    def current(self):
+        """The generate_assets module, freshly reloaded if its source or a helper's changed."""
+        with self.lock:
+            stamp = self._stamp()
+            if stamp != self.mtimes:
+                for m in MODULES:
+                    if m in sys.modules:
+                        importlib.reload(sys.modules[m])
+                    else:
+                        importlib.import_module(m)
+                if self.mtimes is not None:
+                    print("↻ reloaded generator modules", file=sys.stderr)
+                self.mtimes = stamp
+                self.source_hash.cache_clear()
+            return sys.modules["generate_assets"]
+
+    @functools.lru_cache(maxsize=None)
+    def source_hash(self, name):
+        """Hash of the asset's renderer, every local helper it reaches and its default palette."""
+        ga = sys.modules["generate_assets"]
+        a = ga.ASSETS[name]
+        return ga.job_key(a.fn, a.args + (a.palette,))
+
+def parse_color(text):
+    text = text.lstrip("#")
+    if len(text) not in (6, 8) or not re.fullmatch(r"[0-9a-fA-F]+", text):
+        raise ValueError(f"not a hex colour: {text!r}")
+    return tuple(int(text[i:i+2], 16) for i in range(0, len(text), 2))
+
+def parse_request(ga, name, scale, query):
+    """(size, seed, palette overrides, tile) of one asset URL; raises ValueError on bad parameters."""
+    if name not in ga.ASSETS:
+        raise LookupError(name)
+    a = ga.ASSETS[name]
+    params = dict(query)
+    seed = int(params.pop("seed", ga.DEFAULT_SEED))
+    tile = params.pop("tile", None)
+    tile = int(tile) if tile is not None else None
+    if tile is not None and not 2 <= tile <= 8192:
+        raise ValueError(f"tile {tile} is out of range")
+    w, h = params.pop("w", None), params.pop("h", None)
+    lw, lh = ga.logical_width(name, tile), a.size[1]
+    if w is not None:
+        w = int(w)
+        size = (w, round(lh * w / lw))
+    elif h is not None:
+        h = int(h)
+        size = (round(lw * h / lh), h)
+    else:
+        size = (round(lw * scale), round(lh * scale))
+    if min(size) < 1 or max(size) > 8192:
+        raise ValueError(f"size {size[0]}x{size[1]} is out of range")
+    palette = {}
+    for key, value in sorted(params.items()):
+        colors = [parse_color(v) for v in value.split(",")]
+        palette[key] = colors if isinstance(a.palette.get(key), list) else colors[0]
+    return size, seed, palette, tile
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    generator = cache = None  # set by serve()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=ROOT, **kwargs)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if HIDDEN.match(url.path):
+            return self.send_error(404, "not served in preview")
+        m = ASSET_URL.match(url.path)
+        if not m:
+            return super().do_GET()
+        try:
+            self.send_asset(m.group(1), float(m.group(2) or 1), parse_qsl(url.query))
+        except LookupError as e:
+            self.send_error(404, f"no asset {e}")
+        except ValueError as e:
+            self.send_error(400, str(e))
+
+    def send_asset(self, name, scale, query):
+        ga = self.generator.current()
+        size, seed, palette, tile = parse_request(ga, name, scale, query)
+        key = (name, size, seed, repr(palette), tile, self.generator.source_hash(name))
+        etag = '"' + hashlib.sha256(repr(key).encode()).hexdigest()[:32] + '"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        with self.generator.lock:
+            data = self.cache.get(key)
+            if data is None:
+                t0 = time.perf_counter()
+                data = to_buffer(ga.render(name, size, seed, palette, tile=tile)).getvalue()
+                self.cache.put(key, data)
+                self.log_message("rendered %s %dx%d in %.0f ms", name, *size, (time.perf_counter() - t0) * 1000)
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")  # always revalidate: a 304 is free
+        self.end_headers()
+        self.wfile.write(data)
+
+    def end_headers(self):
+        if not self.path.startswith("/assets/"):
+            self.send_header("Cache-Control", "no-cache")
+        super().end_headers()
+
+def serve(port=8000, cache_mb=DEFAULT_CACHE_MB, host="127.0.0.1"):
+    """Run the preview server until interrupted."""
+    PreviewHandler.generator = Generator()
+    PreviewHandler.cache = RenderCache(cache_mb * 1024 * 1024)
+    PreviewHandler.generator.current()
+    server = ThreadingHTTPServer((host, port), PreviewHandler)
+    print(f"Previewing assets at http://{host}:{port}/ (render cache {cache_mb} MB), Ctrl-C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache = PreviewHandler.cache
+        print(f"\n{cache.hits} cache hit(s), {cache.misses} render(s), {cache.bytes/1024:.0f} KB cached")
+    return 0
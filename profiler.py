@@ -0,0 +1,203 @@
+"""
+Opt-in profiler for the asset generator (generate_assets.py --profile PATH).
+While a Profiler is active, the Pillow primitives the renderers call
+(ImageDraw shapes, Image.new/fromarray, paste, alpha_composite, convert,
+filter, save...) are wrapped to count calls, time them and add up the
+pixels they touch, and every function of this repo on the way to them is
+tracked with sys.setprofile. Time is charged to call stacks rooted at the
+asset being rendered and written as collapsed stacks, one
+"asset;render_x;helper;ImageDraw.ellipse <microseconds>" line each, which
+flamegraph.pl, inferno and speedscope read; report() prints the summary.
+"""
+from collections import defaultdict
+import contextlib
+import functools
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+OWN_CODE = "(own code)"  # leaf for time a function spends outside the primitives and its callees
+# comprehensions get frames of their own; their time stays with the function they are in
+INLINE = {"<listcomp>", "<dictcomp>", "<setcomp>", "<genexpr>"}
+
+DRAW_PRIMITIVES = ("rectangle", "rounded_rectangle", "ellipse", "arc", "chord", "pieslice",
+                   "line", "polygon", "point", "text")
+# Image methods and what their pixel count is of: the image itself, the
+# image passed in (or the box it goes to), or the image returned.
+IMAGE_METHODS = {"paste": "arg", "alpha_composite": "arg", "convert": "self", "filter": "self",
+                 "point": "self", "putalpha": "self", "quantize": "self", "getchannel": "self",
+                 "split": "self", "getbbox": "self", "copy": "self", "save": "self",
+                 "crop": "out", "resize": "out"}
+
+
+def _area(img):
+    return img.width * img.height if isinstance(img, Image.Image) else 0
+
+def _draw_pixels(name, args, kwargs):
+    """Pixels in the bounding box of an ImageDraw shape (draw, xy, ...), clipped to the image."""
+    draw, xy = args[0], args[1] if len(args) > 1 else kwargs.get("xy")
+    width = 1
+    if name == "line":
+        width = kwargs.get("width", args[3] if len(args) > 3 else 1) or 1
+    flat = [v for p in xy for v in (p if isinstance(p, (tuple, list)) else (p,))] if xy else []
+    if len(flat) < 2:
+        return 0
+    xs, ys = flat[0::2], flat[1::2]
+    w, h = draw.im.size
+    x0, y0 = max(int(min(xs)) - width // 2, 0), max(int(min(ys)) - width // 2, 0)
+    x1, y1 = min(int(max(xs)) + width // 2, w - 1), min(int(max(ys)) + width // 2, h - 1)
+    return max(x1 - x0 + 1, 0) * max(y1 - y0 + 1, 0)
+
+def _image_pixels(kind, img, args, out):
+    if kind == "self":
+        return _area(img)
+    if kind == "out":
+        return _area(out)
+    src = args[0] if args else None
+    if isinstance(src, Image.Image):
+        return _area(src)
+    box = args[1] if len(args) > 1 else None
+    if isinstance(box, (tuple, list)) and len(box) == 4:
+        return max(box[2] - box[0], 0) * max(box[3] - box[1], 0)
+    mask = args[2] if len(args) > 2 else None
+    return _area(mask) or _area(img)
+
+class Profiler:
+    """Call counts, time and pixels per call stack, from the asset down to each primitive."""
+
+    def __init__(self):
+        # stack of labels -> [calls, self seconds, pixels]
+        self.stacks = defaultdict(lambda: [0, 0.0, 0])
+        self._frames = []  # [label, frame or None, start, seconds in callees]
+        self._in_primitive = False
+        self._local = {}
+        self._patches = []
+
+    # ----- stack -----
+
+    def _push(self, label, frame=None):
+        self._frames.append([label, frame, time.perf_counter(), 0.0])
+
+    def _pop(self, pixels=0):
+        label, _, start, inner = self._frames[-1]
+        elapsed = time.perf_counter() - start
+        entry = self.stacks[tuple(f[0] for f in self._frames)]
+        entry[0] += 1
+        entry[1] += elapsed - inner
+        entry[2] += pixels
+        self._frames.pop()
+        if self._frames:
+            self._frames[-1][3] += elapsed
+        return elapsed
+
+    def _is_local(self, code):
+        filename = code.co_filename
+        local = self._local.get(filename)
+        if local is None:
+            path = os.path.abspath(filename)
+            local = self._local[filename] = os.path.dirname(path) == ROOT and path != os.path.abspath(__file__)
+        return local and code.co_name not in INLINE
+
+    def _trace(self, frame, event, arg):
+        if not self._frames or self._in_primitive:
+            return
+        if event == "call" and self._is_local(frame.f_code):
+            self._push(getattr(frame.f_code, "co_qualname", frame.f_code.co_name), frame)
+        elif event == "return" and self._frames[-1][1] is frame:
+            self._pop()
+
+    @contextlib.contextmanager
+    def frame(self, label):
+        """Charge everything run inside to a stack rooted at `label` (an asset)."""
+        self._push(label)
+        try:
+            yield
+        finally:
+            while self._frames[-1][1] is not None:  # unwound by an exception
+                self._pop()
+            self._pop()
+
+    # ----- primitives -----
+
+    def _wrap(self, owner, attr, label, pixels):
+        orig = getattr(owner, attr)
+        prof = self
+
+        @functools.wraps(orig)
+        def primitive(*args, **kwargs):
+            if not prof._frames or prof._in_primitive:
+                return orig(*args, **kwargs)
+            prof._push(label)
+            prof._in_primitive = True
+            out = None
+            try:
+                out = orig(*args, **kwargs)
+                return out
+            finally:
+                prof._in_primitive = False
+                prof._pop(pixels(args, kwargs, out))
+        self._patches.append((owner, attr, orig))
+        setattr(owner, attr, primitive)
+
+    def __enter__(self):
+        for name in DRAW_PRIMITIVES:
+            self._wrap(ImageDraw.ImageDraw, name, f"ImageDraw.{name}",
+                       lambda a, kw, out, name=name: _draw_pixels(name, a, kw))
+        for name, kind in IMAGE_METHODS.items():
+            self._wrap(Image.Image, name, f"Image.{name}",
+                       lambda a, kw, out, kind=kind: _image_pixels(kind, a[0], a[1:], out))
+        self._wrap(Image, "new", "Image.new", lambda a, kw, out: _area(out))
+        self._wrap(Image, "fromarray", "Image.fromarray", lambda a, kw, out: _area(out))
+        sys.setprofile(self._trace)
+        return self
+
+    def __exit__(self, *exc):
+        sys.setprofile(None)
+        for owner, attr, orig in reversed(self._patches):
+            setattr(owner, attr, orig)
+        self._patches.clear()
+
+    # ----- output -----
+
+    def _leaf(self, stack):
+        """(helper, primitive or OWN_CODE) a stack's self time is charged to."""
+        if stack[-1].startswith(("ImageDraw.", "Image.")):
+            return (stack[-2] if len(stack) > 1 else stack[0]), stack[-1]
+        return stack[-1], OWN_CODE
+
+    def write(self, path):
+        """Write the collapsed stacks, weighted in microseconds of self time."""
+        with open(path, "w") as f:
+            for stack, (_, secs, _) in sorted(self.stacks.items()):
+                if round(secs * 1e6) > 0:
+                    f.write(f"{';'.join(stack)} {round(secs * 1e6)}\n")
+
+    def report(self, top=20):
+        """Print per-asset totals and the helper/primitive pairs that take the most time."""
+        assets = defaultdict(lambda: [0.0, 0, 0, defaultdict(float)])
+        pairs = defaultdict(lambda: [0, 0.0, 0])
+        for stack, (calls, secs, px) in self.stacks.items():
+            helper, leaf = self._leaf(stack)
+            a = assets[stack[0]]
+            a[0] += secs
+            if leaf != OWN_CODE:
+                a[1] += calls
+                a[2] += px
+                a[3][leaf] += secs
+            p = pairs[helper, leaf]
+            p[0] += calls if leaf != OWN_CODE else 0
+            p[1] += secs
+            p[2] += px
+        total = sum(a[0] for a in assets.values()) or 1
+        print(f"{'asset':<22} {'ms':>9} {'calls':>8} {'Mpx':>8}  hottest primitive")
+        for name, (secs, calls, px, prims) in sorted(assets.items(), key=lambda kv: -kv[1][0]):
+            hot = max(prims, key=prims.get) if prims else "-"
+            share = f" ({prims[hot] / secs:.0%})" if prims else ""
+            print(f"{name:<22} {secs*1000:9.1f} {calls:8d} {px/1e6:8.2f}  {hot}{share}")
+        print(f"\n{'helper > primitive':<52} {'calls':>8} {'ms':>9} {'Mpx':>8} {'share':>6}")
+        for (helper, leaf), (calls, secs, px) in sorted(pairs.items(), key=lambda kv: -kv[1][1])[:top]:
+            mpx = f"{px/1e6:.2f}" if px else ""
+            print(f"{helper + ' > ' + leaf:<52} {calls or '':>8} {secs*1000:9.1f} {mpx:>8} {secs/total:6.1%}")
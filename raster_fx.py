@@ -0,0 +1,523 @@
+"""
+Whole-array raster effects for the asset generator.
+Gradients, alpha ramps and radial falloffs are built as NumPy arrays and
+pasted or composited in one step instead of one draw call per scanline.
+
+Canvases made with canvas() carry a render scale; every helper here and
+ScaledDraw take logical (1x) coordinates and map them onto the real pixels.
+A canvas made with wrap=True repeats horizontally: shapes, overlays and
+lights that cross its left or right edge are drawn again on the other side.
+"""
+from PIL import Image, ImageDraw
+import numpy as np
+
+from asset_cache import cached_layer
+
+# LightBuffer.render keeps a lit area in the layer cache when it covers at most this share of the canvas
+CACHED_LIGHT_SHARE = 0.1
+
+
+def canvas(mode, size, scale=1, color=0, wrap=False):
+    """New image for a `size` (1x) asset rendered at `scale`, horizontally periodic if `wrap`."""
+    if wrap and size[0] * scale != round(size[0] * scale):
+        raise ValueError(f"a {size[0]} wide tile is not a whole number of pixels at {scale:g}x")
+    img = Image.new(mode, (round(size[0]*scale), round(size[1]*scale)), color)
+    img.info["scale"] = scale
+    if wrap:
+        img.info["wrap"] = size[0]
+    return img
+
+def scale_of(img):
+    return img.info.get("scale", 1)
+
+def wrap_of(img):
+    """Logical width a wrapping canvas repeats at, or None."""
+    return img.info.get("wrap")
+
+def wrap_shifts(x0, x1, period):
+    """Horizontal offsets at which something spanning logical x0..x1 shows on a canvas repeating every `period`."""
+    if not period:
+        return (0,)
+    # > -1: ImageDraw truncates, so a shape ending anywhere past -1 still touches column 0
+    return tuple(k * period for k in (-1, 0, 1) if x1 + k*period > -1 and x0 + k*period < period) or (0,)
+
+def logical_size(img):
+    s = scale_of(img)
+    return round(img.width / s), round(img.height / s)
+
+def _scale_pt(v, s):
+    """Map a pixel coordinate so pixel centers line up at any scale."""
+    return v if s == 1 else (v + 0.5) * s - 0.5
+
+def _scale_box(box, s):
+    """Map an inclusive [x0, y0, x1, y1] box so it covers the same area at any scale."""
+    if s == 1:
+        return box
+    (x0, y0), (x1, y1) = box
+    x0, y0 = x0 * s, y0 * s
+    return [(x0, y0), (max((x1+1)*s - 1, x0), max((y1+1)*s - 1, y0))]
+
+def _scale_width(width, s):
+    return width if s == 1 else max(1, round(width * s))
+
+class ScaledDraw:
+    """ImageDraw.Draw that takes logical coordinates and line widths."""
+
+    def __init__(self, img):
+        self.img = img
+        self.draw = ImageDraw.Draw(img)
+        self.s = scale_of(img)
+        self.period = wrap_of(img)
+
+    def _copies(self, xy, pad=0):
+        """Logical points of xy, once per horizontal offset they show at on a wrapping canvas."""
+        pts = _points(xy)
+        if not self.period:
+            return [pts]
+        xs = [x for x, _ in pts]
+        return [[(x+dx, y) for x, y in pts] for dx in wrap_shifts(min(xs) - pad, max(xs) + pad, self.period)]
+
+    def _pts(self, pts):
+        return [(_scale_pt(x, self.s), _scale_pt(y, self.s)) for x, y in pts]
+
+    def rectangle(self, xy, fill=None, outline=None, width=1):
+        for pts in self._copies(xy):
+            self.draw.rectangle(_scale_box(pts, self.s), fill, outline, _scale_width(width, self.s))
+
+    def rectangles(self, boxes, fill):
+        """Fill many [x0, y0, x1, y1] boxes with one colour in a single array write.
+
+        Pixel for pixel the same as a rectangle(box, fill) call per box, for
+        boxes given as an (n, 4) array; meant for many small ones such as
+        windows, where the per-call overhead is most of the cost.
+        """
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if self.period:
+            boxes = np.concatenate([boxes + (dx, 0, dx, 0) for dx in (-self.period, 0, self.period)])
+        x0, y0, x1, y1 = boxes.T
+        if self.s != 1:
+            x0, y0 = x0 * self.s, y0 * self.s
+            x1, y1 = np.maximum((x1+1) * self.s - 1, x0), np.maximum((y1+1) * self.s - 1, y0)
+        # ImageDraw truncates coordinates, then clips to the image
+        w, h = self.img.size
+        x0, y0 = np.maximum(np.trunc(x0), 0).astype(np.intp), np.maximum(np.trunc(y0), 0).astype(np.intp)
+        x1, y1 = np.minimum(np.trunc(x1), w-1).astype(np.intp), np.minimum(np.trunc(y1), h-1).astype(np.intp)
+        keep = (x0 <= x1) & (y0 <= y1)
+        if not keep.any():
+            return
+        x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+        # every box as the same (bh, bw) grid of pixels, masked down to its own extent
+        bx0, by0 = x0.min(), y0.min()
+        xs = (x0 - bx0)[:, None, None] + np.arange((x1 - x0).max() + 1)[None, None, :]
+        ys = (y0 - by0)[:, None, None] + np.arange((y1 - y0).max() + 1)[None, :, None]
+        inside = (xs <= (x1 - bx0)[:, None, None]) & (ys <= (y1 - by0)[:, None, None])
+        ys, xs = np.broadcast_arrays(ys, xs)
+        mask = np.zeros((int(y1.max() - by0) + 1, int(x1.max() - bx0) + 1), dtype=bool)
+        mask[ys[inside], xs[inside]] = True
+        # through a "1" mask, paste is a plain write like ImageDraw's, with no blending
+        # and without copying the image out to an array and back
+        self.img.paste(fill, (int(bx0), int(by0)), Image.fromarray(mask))
+
+    def rounded_rectangle(self, xy, radius=0, fill=None, outline=None, width=1):
+        for pts in self._copies(xy):
+            self.draw.rounded_rectangle(_scale_box(pts, self.s), radius * self.s, fill, outline,
+                                        _scale_width(width, self.s))
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        for pts in self._copies(xy):
+            self.draw.ellipse(_scale_box(pts, self.s), fill, outline, _scale_width(width, self.s))
+
+    def arc(self, xy, start, end, fill=None, width=1):
+        for pts in self._copies(xy):
+            self.draw.arc(_scale_box(pts, self.s), start, end, fill, _scale_width(width, self.s))
+
+    def line(self, xy, fill=None, width=1):
+        for pts in self._copies(xy, pad=width):
+            self.draw.line(self._pts(pts), fill, _scale_width(width, self.s))
+
+    def polygon(self, xy, fill=None, outline=None):
+        for pts in self._copies(xy):
+            self.draw.polygon(self._pts(pts), fill, outline)
+
+
+def _rows(h, span):
+    """Interpolation factor per row, matching the old `row / span` loops."""
+    return np.arange(h, dtype=np.float64) / (span if span is not None else max(h-1, 1))
+
+def linear_gradient(w, h, top_color, bot_color, span=None):
+    """(h, w, 3) uint8 vertical gradient, truncated exactly like lerp_color."""
+    t = _rows(h, span)[:, None]
+    c1 = np.array(top_color[:3], dtype=np.int64)
+    c2 = np.array(bot_color[:3], dtype=np.int64)
+    row = (c1 + (c2 - c1) * t).astype(np.uint8)
+    return np.broadcast_to(row[:, None, :], (h, w, 3))
+
+def alpha_ramp(w, h, color, max_alpha, span=None):
+    """(h, w, 4) uint8 layer of one color whose alpha rises from 0 towards max_alpha."""
+    a = (max_alpha * _rows(h, span)).astype(np.uint8)
+    layer = np.empty((h, w, 4), dtype=np.uint8)
+    layer[..., :3] = color[:3]
+    layer[..., 3] = a[:, None]
+    return layer
+
+def radial_falloff(w, h, cx, cy, radius, inner=0):
+    """(h, w) float32 weights `1 - d/radius`, held flat inside `inner`.
+
+    This is the smooth version of drawing `for r in range(radius, inner, -step)`
+    ellipses with alpha `A*(1 - r/radius)`. cx, cy are relative to the
+    array's top-left corner, so callers can build just a light's bounding box.
+    """
+    ys = np.arange(h, dtype=np.float32)[:, None] - cy
+    xs = np.arange(w, dtype=np.float32)[None, :] - cx
+    d = np.maximum(np.sqrt(xs*xs + ys*ys), inner)
+    return np.clip(1 - d / radius, 0, 1)
+
+def _clip_box(img, x, y, w, h):
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, img.width), min(y + h, img.height)
+    return x0, y0, x1, y1
+
+def gradient_rect(img, x, y, w, h, top_color, bot_color, span=None):
+    """Fill rows y..y+h-1, columns x..x+w (inclusive, like draw.line) with a gradient."""
+    s = scale_of(img)
+    if s != 1:
+        x, y, w, h = round(x*s), round(y*s), round((x+w+1)*s) - round(x*s) - 1, round((y+h)*s) - round(y*s)
+        span = span * s if span is not None else None
+    x0, y0, x1, y1 = _clip_box(img, x, y, w + 1, h)
+    if x1 <= x0 or y1 <= y0:
+        return
+    # every column is the same, so one is built (and kept) and stretched across
+    column = gradient_column(h, tuple(top_color[:3]), tuple(bot_color[:3]), span, y0 - y, y1 - y)
+    img.paste(column.resize((x1 - x0, y1 - y0), Image.NEAREST), (x0, y0))
+
+@cached_layer
+def gradient_column(h, top_color, bot_color, span, row0, row1):
+    """1-pixel-wide RGB image of rows row0..row1-1 of a linear_gradient; shared, so never draw on it."""
+    grad = linear_gradient(1, h, top_color, bot_color, span)[row0:row1]
+    return Image.fromarray(np.ascontiguousarray(grad), "RGB")
+
+def composite_ramp(img, y0, y1, color, max_alpha, span=None):
+    """Alpha-composite a full-width ramp over rows y0..y1-1; returns an RGBA image."""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    s = scale_of(img)
+    span = (span if span is not None else y1 - y0) * s
+    y0, y1 = round(y0 * s), round(y1 * s)
+    h = min(y1, img.height) - y0
+    if h <= 0:
+        return img
+    band = Image.fromarray(alpha_ramp(img.width, h, color, max_alpha, span), "RGBA")
+    img.alpha_composite(band, (0, y0))
+    return img
+
+class LightBuffer:
+    """Radial lights accumulated into one buffer and composited in a single pass.
+
+    Lights are queued with add() and only rasterized by composite(), into a
+    buffer covering the union of their bounding boxes, so the cost follows
+    the lit area rather than the canvas size. Overlapping lights combine
+    like stacked alpha_composite layers.
+    """
+
+    def __init__(self):
+        self.lights = []
+
+    def add(self, cx, cy, radius, color, alpha, inner=0):
+        """Queue a light whose alpha falls from `alpha*(1 - inner/radius)` to 0 at `radius`."""
+        self.lights.append((cx, cy, radius, tuple(color[:3]), alpha, inner))
+
+    def periodic(self, period):
+        """This buffer, or a copy with lights crossing a wrapping canvas's edge repeated across it."""
+        if not period:
+            return self
+        out = LightBuffer()
+        out.lights = [(cx+dx, cy, r, color, alpha, inner) for cx, cy, r, color, alpha, inner in self.lights
+                      for dx in wrap_shifts(cx - r, cx + r, period)]
+        return out
+
+    def _scaled(self, scale):
+        if scale == 1:
+            return self.lights
+        return [(_scale_pt(cx, scale), _scale_pt(cy, scale), r*scale, color, alpha, inner*scale)
+                for cx, cy, r, color, alpha, inner in self.lights]
+
+    def bbox(self, size, scale=1):
+        """Union of the lights' bounding boxes, clipped to `size`, or None."""
+        w, h = size
+        boxes = [(int(cx-r), int(cy-r), int(cx+r)+1, int(cy+r)+1) for cx, cy, r, *_ in self._scaled(scale)]
+        if not boxes:
+            return None
+        x0, y0 = max(min(b[0] for b in boxes), 0), max(min(b[1] for b in boxes), 0)
+        x1, y1 = min(max(b[2] for b in boxes), w), min(max(b[3] for b in boxes), h)
+        return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+    def render(self, size, scale=1):
+        """Rasterize into ((x0, y0), (h, w, 4) uint8 RGBA array), or None if nothing is lit.
+
+        The array is shared with every other buffer holding the same lights, so it is read-only.
+        """
+        box = self.bbox(size, scale)
+        if box is None:
+            return None
+        x0, y0, x1, y1 = box
+        # only lit areas well smaller than the canvas are kept: holding a big one would
+        # raise every render's peak memory for a saving seen only on a repeat render
+        small = (x1-x0) * (y1-y0) <= size[0] * size[1] * CACHED_LIGHT_SHARE
+        return (_render_lights if small else _render_lights.__wrapped__)(tuple(self._scaled(scale)), box)
+
+    def composite(self, img):
+        """Composite all lights onto img; returns it as RGBA (the same object if it already was)."""
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        rendered = self.periodic(wrap_of(img)).render(img.size, scale_of(img))
+        if rendered is not None:
+            dest, layer = rendered
+            img.alpha_composite(Image.fromarray(layer, "RGBA"), dest)
+        return img
+
+def _render_light(light, box):
+    """_render_lights of a lone light, whose box is its own. With nothing to blend with,
+    its colour is flat wherever it is lit and its alpha is its weight."""
+    cx, cy, r, color, alpha, inner = light
+    bx0, by0, bx1, by1 = box
+    wgt = radial_falloff(bx1-bx0, by1-by0, cx-bx0, cy-by0, r, inner)
+    wgt *= alpha / 255
+    np.clip(wgt, 0, 1, out=wgt)
+    # whole RGBA pixels as little-endian words: one pass instead of four strided ones
+    px = np.rint(wgt * 255).astype("<u4") << 24
+    px |= (wgt > 0) * np.uint32(color[0] | color[1] << 8 | color[2] << 16)
+    out = px.view(np.uint8).reshape(wgt.shape + (4,))
+    out.flags.writeable = False
+    return (bx0, by0), out
+
+@cached_layer
+def _render_lights(lights, box):
+    """LightBuffer.render of scaled lights into their bounding box."""
+    bx0, by0, bx1, by1 = box
+    h, w = by1-by0, bx1-bx0
+    if len(lights) == 1:
+        return _render_light(lights[0], box)
+    prem = np.zeros((3, h, w), dtype=np.float32)  # premultiplied color, channel-first
+    acc = np.zeros((h, w), dtype=np.float32)
+    for cx, cy, r, color, alpha, inner in lights:
+        x0, y0 = max(int(cx-r), bx0), max(int(cy-r), by0)
+        x1, y1 = min(int(cx+r)+1, bx1), min(int(cy+r)+1, by1)
+        if x1 <= x0 or y1 <= y0:
+            continue
+        wgt = radial_falloff(x1-x0, y1-y0, cx-x0, cy-y0, r, inner)
+        wgt *= alpha / 255
+        np.clip(wgt, 0, 1, out=wgt)
+        keep = 1 - wgt
+        sub = (slice(y0-by0, y1-by0), slice(x0-bx0, x1-bx0))
+        for c in range(3):
+            p = prem[c][sub]
+            p *= keep
+            p += wgt * color[c]
+        a = acc[sub]
+        a *= keep
+        a += wgt
+    out = np.empty((h, w, 4), dtype=np.uint8)
+    lit = acc > 0
+    for c in range(3):
+        np.divide(prem[c], acc, out=prem[c], where=lit)
+        out[..., c] = np.rint(prem[c]).clip(0, 255)
+    out[..., 3] = np.rint(acc * 255)
+    out.flags.writeable = False
+    return (bx0, by0), out
+
+def _points(xy):
+    """Flatten ImageDraw-style coordinates ([x0, y0, ...] or [(x, y), ...]) into (x, y) pairs."""
+    flat = [v for p in xy for v in (p if isinstance(p, (tuple, list)) else (p,))]
+    return list(zip(flat[0::2], flat[1::2]))
+
+class Overlay:
+    """One translucent layer that shapes and lights are queued onto.
+
+    Each queued op is rasterized only over its own bounding box and blended
+    into a single RGBA layer that covers the union of all ops; flatten()
+    then composites that layer onto the base image once. Ops stack in
+    order like separate alpha_composite layers would.
+    """
+
+    def __init__(self):
+        self.ops = []
+
+    def polygon(self, xy, fill):
+        self.ops.append(("polygon", _points(xy), tuple(fill), 0))
+
+    def ellipse(self, xy, fill):
+        self.ops.append(("ellipse", _points(xy), tuple(fill), 0))
+
+    def rectangle(self, xy, fill):
+        self.ops.append(("rectangle", _points(xy), tuple(fill), 0))
+
+    def line(self, xy, fill, width=1):
+        self.ops.append(("line", _points(xy), tuple(fill), width))
+
+    def fill(self, color):
+        """Tint the whole image."""
+        self.ops.append(("fill", None, tuple(color), 0))
+
+    def light(self, cx, cy, radius, color, alpha, inner=0):
+        """Queue a radial light; see LightBuffer.add."""
+        self.ops.append(("light", (cx, cy, radius, inner), tuple(color[:3]) + (alpha,), 0))
+
+    def periodic(self, period):
+        """This overlay, or a copy with ops crossing a wrapping canvas's edge repeated across it."""
+        if not period:
+            return self
+        out = Overlay()
+        for kind, pts, color, width in self.ops:
+            if kind == "fill":
+                out.ops.append((kind, pts, color, width))
+            elif kind == "light":
+                cx, cy, r, inner = pts
+                out.ops += [(kind, (cx+dx, cy, r, inner), color, width) for dx in wrap_shifts(cx - r, cx + r, period)]
+            else:
+                xs = [x for x, _ in pts]
+                out.ops += [(kind, [(x+dx, y) for x, y in pts], color, width)
+                            for dx in wrap_shifts(min(xs) - width, max(xs) + width, period)]
+        return out
+
+    def _box(self, op, size):
+        kind, pts, _, width = op
+        if kind == "fill":
+            return (0, 0) + size
+        if kind == "light":
+            cx, cy, r, _ = pts
+            box = (int(cx-r), int(cy-r), int(cx+r)+1, int(cy+r)+1)
+        else:
+            xs, ys = [p[0] for p in pts], [p[1] for p in pts]
+            pad = width + 1
+            box = (int(min(xs))-pad, int(min(ys))-pad, int(max(xs))+pad+1, int(max(ys))+pad+1)
+        return (max(box[0], 0), max(box[1], 0), min(box[2], size[0]), min(box[3], size[1]))
+
+    def _render_op(self, op, box):
+        """RGBA image of one op over `box`."""
+        kind, pts, color, width = op
+        x0, y0, x1, y1 = box
+        if kind == "fill":
+            return Image.new("RGBA", (x1-x0, y1-y0), color)
+        if kind == "light":
+            cx, cy, r, inner = pts
+            lights = LightBuffer()
+            lights.add(cx-x0, cy-y0, r, color[:3], color[3], inner)
+            rendered = lights.render((x1-x0, y1-y0))
+            # the light's box is the op's box, so its buffer is the whole image
+            return Image.fromarray(rendered[1], "RGBA")
+        mask = Image.new("L", (x1-x0, y1-y0), 0)
+        shifted = [(x-x0, y-y0) for x, y in pts]
+        md = ImageDraw.Draw(mask)
+        if kind == "line":
+            md.line(shifted, fill=255, width=width)
+        else:
+            getattr(md, kind)(shifted, fill=255)
+        alpha = color[3] if len(color) > 3 else 255
+        src = Image.new("RGBA", mask.size, color[:3] + (0,))
+        src.putalpha(mask.point(lambda v: v * alpha // 255))
+        return src
+
+    def _scaled(self, scale):
+        if scale == 1:
+            return self.ops
+        ops = []
+        for kind, pts, color, width in self.ops:
+            if kind == "light":
+                cx, cy, r, inner = pts
+                pts = (_scale_pt(cx, scale), _scale_pt(cy, scale), r*scale, inner*scale)
+            elif kind in ("ellipse", "rectangle"):
+                pts = _scale_box(pts, scale)
+            elif kind != "fill":
+                pts = [(_scale_pt(x, scale), _scale_pt(y, scale)) for x, y in pts]
+            ops.append((kind, pts, color, _scale_width(width, scale) if width else width))
+        return ops
+
+    def render(self, size, scale=1):
+        """Rasterize into ((x0, y0), RGBA layer image), or None if nothing was queued on-canvas.
+
+        An op whose box doesn't touch anything drawn before it lands on
+        transparent pixels, where "over" is a plain write, so it is drawn
+        straight into the layer; only overlapping ops go through a
+        per-op scratch image and alpha_composite.
+        """
+        ops = self._scaled(scale)
+        boxes = [(op, self._box(op, size)) for op in ops]
+        boxes = [(op, b) for op, b in boxes if b[2] > b[0] and b[3] > b[1]]
+        if not boxes:
+            return None
+        if len(boxes) == 1 and boxes[0][0][0] == "light":
+            # a lone light (the victory glow) is its own layer: nothing to paste it into
+            op, box = boxes[0]
+            return box[:2], self._render_op(op, box)
+        ux0, uy0 = min(b[0] for _, b in boxes), min(b[1] for _, b in boxes)
+        ux1, uy1 = max(b[2] for _, b in boxes), max(b[3] for _, b in boxes)
+        first, _ = boxes[0]
+        if first[0] == "fill":
+            layer = Image.new("RGBA", (ux1-ux0, uy1-uy0), first[2])
+            boxes = boxes[1:]
+            painted = [(0, 0) + size]
+        else:
+            layer = Image.new("RGBA", (ux1-ux0, uy1-uy0), (0, 0, 0, 0))
+            painted = []
+        draw = ImageDraw.Draw(layer)
+        for op, box in boxes:
+            kind, pts, color, width = op
+            dest = (box[0]-ux0, box[1]-uy0)
+            clear = not any(box[0] < p[2] and p[0] < box[2] and box[1] < p[3] and p[1] < box[3] for p in painted)
+            painted.append(box)
+            if clear and kind not in ("fill", "light"):
+                shifted = [(x-ux0, y-uy0) for x, y in pts]
+                if kind == "line":
+                    draw.line(shifted, fill=color, width=width)
+                else:
+                    getattr(draw, kind)(shifted, fill=color)
+            elif clear:
+                layer.paste(self._render_op(op, box), dest)
+            else:
+                layer.alpha_composite(self._render_op(op, box), dest)
+        return (ux0, uy0), layer
+
+    def flatten(self, img):
+        """Composite the layer onto img; returns it as RGBA (the same object if it already was)."""
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        rendered = self.periodic(wrap_of(img)).render(img.size, scale_of(img))
+        if rendered is not None:
+            dest, layer = rendered
+            img.alpha_composite(layer, dest)
+        return img
+
+class Layers:
+    """Named depth layers an asset is painted into, back to front.
+
+    Unsplit, every name maps to one shared image and painting is exactly
+    the single-canvas render. Split, the first layer used is an opaque
+    canvas and every later one its own transparent canvas, so each can be
+    exported and scrolled separately. Effects that replace an image
+    (Overlay.flatten, LightBuffer.composite) are stored back with
+    layers[name] = ...
+    """
+
+    def __init__(self, mode, size, scale=1, split=False, wrap=False):
+        self.size, self.scale, self.split, self.wrap = size, scale, split, wrap
+        self.base = canvas(mode, size, scale, wrap=wrap)
+        self.images = {}
+
+    def __getitem__(self, name):
+        if not self.split:
+            return self.base
+        if name not in self.images:
+            self.images[name] = self.base if not self.images else canvas("RGBA", self.size, self.scale, wrap=self.wrap)
+        return self.images[name]
+
+    def __setitem__(self, name, img):
+        if self.split:
+            self.images[name] = img
+        else:
+            self.base = img
+
+    def result(self, mode=None):
+        """The finished image (converted to `mode` if given) unsplit, {name: RGBA image} split."""
+        if self.split:
+            return {name: img.convert("RGBA") for name, img in self.images.items()}
+        return self.base.convert(mode) if mode and self.base.mode != mode else self.base
@@ -0,0 +1,97 @@
+"""
+Output sinks for rendered assets.
+A sink takes (name, image) pairs from the renderers and stores them encoded:
+as files in a directory, as in-memory buffers, or as members of one zip or
+tar bundle written in a single pass. Every sink's write() returns the size
+report of encode().
+"""
+import io
+import os
+import tarfile
+import time
+import zipfile
+
+from encode import DEFAULT_ENCODING, encode, encode_bytes
+
+BUNDLE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz")
+
+
+def to_buffer(img, format="PNG", **params):
+    """The image encoded into a rewound BytesIO, for callers that want no files at all."""
+    buf = io.BytesIO()
+    img.save(buf, format=format, **params)
+    buf.seek(0)
+    return buf
+
+class Sink:
+    def __init__(self, encoding=DEFAULT_ENCODING):
+        self.encoding = encoding
+
+    def write(self, name, img):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class DirectorySink(Sink):
+    """<out_dir>/<name>.png plus its siblings; stale siblings are removed."""
+
+    def __init__(self, out_dir, encoding=DEFAULT_ENCODING):
+        super().__init__(encoding)
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, name, img):
+        return encode(img, os.path.join(self.out_dir, name), self.encoding)
+
+class MemorySink(Sink):
+    """Encoded files kept in `files` as {"<name>.<ext>": bytes}."""
+
+    def __init__(self, encoding=DEFAULT_ENCODING):
+        super().__init__(encoding)
+        self.files = {}
+
+    def write(self, name, img):
+        files, stats = encode_bytes(img, self.encoding)
+        self.files.update({f"{name}.{ext}": data for ext, data in files.items()})
+        return stats
+
+class BundleSink(Sink):
+    """One .zip, .tar, .tar.gz or .tgz archive with every file under `prefix`.
+
+    PNG, WebP and AVIF are already compressed, so zip members are stored.
+    """
+
+    def __init__(self, path, encoding=DEFAULT_ENCODING, prefix="assets/"):
+        super().__init__(encoding)
+        self.prefix = prefix
+        if path.endswith(".zip"):
+            self.zip, self.tar = zipfile.ZipFile(path, "w", zipfile.ZIP_STORED), None
+        elif path.endswith(BUNDLE_EXTENSIONS):
+            self.zip, self.tar = None, tarfile.open(path, "w:gz" if path.endswith("gz") else "w")
+        else:
+            raise ValueError(f"bundle must be .zip, .tar, .tar.gz or .tgz: {path}")
+
+    def add(self, filename, data):
+        arcname = self.prefix + filename
+        if self.zip is not None:
+            self.zip.writestr(arcname, data)
+        else:
+            info = tarfile.TarInfo(arcname)
+            info.size, info.mtime = len(data), int(time.time())
+            self.tar.addfile(info, io.BytesIO(data))
+
+    def write(self, name, img):
+        files, stats = encode_bytes(img, self.encoding)
+        for ext, data in files.items():
+            self.add(f"{name}.{ext}", data)
+        return stats
+
+    def close(self):
+        (self.zip or self.tar).close()
@@ -1,50 +1,100 @@
-const CACHE = 'darkwing-v3';
-const ASSETS = [
+// The app shell, replaced as a whole when CACHE changes.
+const CACHE = 'darkwing-v4';
+const SHELL = [
   '/darkwing-duck-game/',
   '/darkwing-duck-game/index.html',
   '/darkwing-duck-game/manifest.json',
   '/darkwing-duck-game/icon-192.svg',
   '/darkwing-duck-game/icon-512.svg',
-  '/darkwing-duck-game/assets/titleBg.png',
-  '/darkwing-duck-game/assets/bgRooftops.png',
-  '/darkwing-duck-game/assets/bgFunhouse.png',
-  '/darkwing-duck-game/assets/bgGreenhouse.png',
-  '/darkwing-duck-game/assets/bgDam.png',
-  '/darkwing-duck-game/assets/bgFortress.png',
-  '/darkwing-duck-game/assets/portraitDarkwing.png',
-  '/darkwing-duck-game/assets/portraitMegavolt.png',
-  '/darkwing-duck-game/assets/portraitQuackerjack.png',
-  '/darkwing-duck-game/assets/portraitBushroot.png',
-  '/darkwing-duck-game/assets/portraitLiquidator.png',
-  '/darkwing-duck-game/assets/portraitNegaduck.png',
-  '/darkwing-duck-game/assets/portraitLaunchpad.png',
-  '/darkwing-duck-game/assets/portraitGosalyn.png',
-  '/darkwing-duck-game/assets/portraitMorgana.png',
-  '/darkwing-duck-game/assets/portraitGizmoduck.png',
-  '/darkwing-duck-game/assets/gameOver.png',
-  '/darkwing-duck-game/assets/victory.png',
+];
+// Assets, kept across versions: their URLs carry a content hash (?v=), so a changed file is a
+// new URL and the only one downloaded. One version of each path is kept.
+const ASSET_CACHE = 'darkwing-assets';
+const ASSET_PREFIX = '/darkwing-duck-game/assets/';
+const ASSETS = [
+  // <generated-assets> from generate_assets.py, do not edit
+  '/darkwing-duck-game/assets/titleBg.png?v=4fc0e57133a6',
+  '/darkwing-duck-game/assets/bgRooftops.png?v=9b01f53cd65d',
+  '/darkwing-duck-game/assets/bgFunhouse.png?v=e4d3497f91a3',
+  '/darkwing-duck-game/assets/bgGreenhouse.png?v=baf1ddccba74',
+  '/darkwing-duck-game/assets/bgDam.png?v=77b47fe94332',
+  '/darkwing-duck-game/assets/bgFortress.png?v=58481a4b777a',
+  '/darkwing-duck-game/assets/portraitDarkwing.png?v=c0c31cc6a298',
+  '/darkwing-duck-game/assets/portraitMegavolt.png?v=9727971cc7ef',
+  '/darkwing-duck-game/assets/portraitQuackerjack.png?v=68b70e6cd21c',
+  '/darkwing-duck-game/assets/portraitBushroot.png?v=f12259eecd8f',
+  '/darkwing-duck-game/assets/portraitLiquidator.png?v=deb00e0760dd',
+  '/darkwing-duck-game/assets/portraitNegaduck.png?v=df67ba2dd157',
+  '/darkwing-duck-game/assets/portraitLaunchpad.png?v=82feb772e1b2',
+  '/darkwing-duck-game/assets/portraitGosalyn.png?v=dd4420e3e2d5',
+  '/darkwing-duck-game/assets/portraitMorgana.png?v=73161e47b220',
+  '/darkwing-duck-game/assets/portraitGizmoduck.png?v=5a4d125b6c57',
+  '/darkwing-duck-game/assets/gameOver.png?v=cfbc4e33ae4e',
+  '/darkwing-duck-game/assets/victory.png?v=b2041ebefa30',
+  // </generated-assets>
 ];
 
+// Formats this browser decodes, probed with the same 1x1 images as index.html's loader, so a file
+// listed with its AVIF/WebP siblings is precached as the one the page will ask for.
+const FORMAT_PROBES = {
+  avif: 'data:image/avif;base64,AAAAIGZ0eXBhdmlmAAAAAGF2aWZtaWYxbWlhZk1BMUIAAADrbWV0YQAAAAAAAAAhaGRscgAAAAAAAAAAcGljdAAAAAAAAAAAAAAAAAAAAAAOcGl0bQAAAAAAAQAAAB5pbG9jAAAAAEQAAAEAAQAAAAEAAAETAAAAIwAAAChpaW5mAAAAAAABAAAAGmluZmUCAAAAAAEAAGF2MDFDb2xvcgAAAABqaXBycAAAAEtpcGNvAAAAFGlzcGUAAAAAAAAAAQAAAAEAAAAQcGl4aQAAAAADCAgIAAAADGF2MUOBAAwAAAAAE2NvbHJuY2x4AAEADQAGgAAAABdpcG1hAAAAAAAAAAEAAQQBAoMEAAAAK21kYXQSAAoIGAAGiAhoNCAyFRTHh4ZlAgggnlAAAABIWtlc1jAXYA==',
+  webp: 'data:image/webp;base64,UklGRhoAAABXRUJQVlA4TA0AAAAvAAAAEAcQERGIiP4HAA==',
+};
+const decodable = () => Promise.all(Object.entries(FORMAT_PROBES).map(([format, uri]) =>
+  fetch(uri).then(r => r.blob()).then(createImageBitmap).then(() => format, () => null)))
+  .then(formats => new Set(formats.filter(Boolean)));
+// The URL to precache of one ASSETS entry: itself, or the first of its candidates the browser
+// decodes (the PNG, last, always does).
+const pick = (entry, formats) => typeof entry === 'string' ? entry
+  : entry.find(url => formats.has(url.split('?')[0].split('.').pop())) || entry[entry.length - 1];
+
+// Store a response; for an asset, drop the other versions of its path.
+function keep(name, request, resp) {
+  return caches.open(name).then(c => c.put(request, resp).then(() => {
+    if (name !== ASSET_CACHE) return;
+    const path = new URL(request.url).pathname;
+    return c.keys().then(keys => Promise.all(keys
+      .filter(k => k.url !== request.url && new URL(k.url).pathname === path).map(k => c.delete(k))));
+  }));
+}
+
 self.addEventListener('install', e => {
-  e.waitUntil(caches.open(CACHE).then(c => c.addAll(ASSETS)));
+  e.waitUntil(Promise.all([
+    caches.open(CACHE).then(c => c.addAll(SHELL)),
+    Promise.all([caches.open(ASSET_CACHE), decodable()]).then(([c, formats]) =>
+      Promise.all(ASSETS.map(entry => pick(entry, formats)).map(url => c.match(url).then(hit => hit ||
+        fetch(url).then(resp => {
+          if (!resp.ok) throw new Error(`${url}: ${resp.status}`);
+          return keep(ASSET_CACHE, new Request(url), resp);
+        })))))
+  ]));
   self.skipWaiting();
 });
 
 self.addEventListener('activate', e => {
   e.waitUntil(caches.keys().then(keys =>
-    Promise.all(keys.filter(k => k !== CACHE).map(k => caches.delete(k)))
+    Promise.all(keys.filter(k => k !== CACHE && k !== ASSET_CACHE).map(k => caches.delete(k)))
   ));
   self.clients.claim();
 });
 
 self.addEventListener('fetch', e => {
+  const url = new URL(e.request.url);
+  const asset = url.pathname.startsWith(ASSET_PREFIX);
+  // the indexes change with every build and carry the hashes: network first, cached copy offline
+  if (asset && url.pathname.endsWith('.json')) {
+    e.respondWith(fetch(e.request).then(resp => {
+      if (resp.ok) keep(ASSET_CACHE, e.request, resp.clone());
+      return resp;
+    }).catch(() => caches.match(e.request, {ignoreSearch: true})));
+    return;
+  }
+  // an unversioned asset URL (no bundles.json) takes whichever version is cached
+  const versioned = url.searchParams.has('v');
   e.respondWith(
-    caches.match(e.request).then(r => r || fetch(e.request).then(resp => {
-      if (resp.ok) {
-        const clone = resp.clone();
-        caches.open(CACHE).then(c => c.put(e.request, clone));
-      }
+    caches.match(e.request, {ignoreSearch: asset && !versioned}).then(r => r || fetch(e.request).then(resp => {
+      if (resp.ok) keep(asset ? ASSET_CACHE : CACHE, e.request, resp.clone());
       return resp;
-    })).catch(() => caches.match('/darkwing-duck-game/'))
+    })).catch(() => caches.match(e.request, {ignoreSearch: true}).then(r => r || caches.match('/darkwing-duck-game/')))
   );
 });